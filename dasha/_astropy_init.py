@@ -8,6 +8,16 @@ try:
 except ImportError:
     __version__ = ''
 
-# Create the test function for self test
-from astropy.tests.runner import TestRunner
-test = TestRunner.make_test_runner_in(os.path.dirname(__file__))
+
+def test(*args, **kwargs):
+    """Run the self test of the package.
+
+    astropy is slow to import so the test runner is created only when
+    needed.
+    """
+    from astropy.tests.runner import TestRunner
+    runner = TestRunner.make_test_runner_in(os.path.dirname(__file__))
+    return runner(*args, **kwargs)
+
+
+test.__test__ = False
@@ -11,7 +11,9 @@ from tollan.utils.log import init_log, get_logger
 from tollan.utils import hookit
 
 
-__all__ = ['load_env_helper', 'run_demo', 'run_site', 'run_flask']
+__all__ = [
+    'load_env_helper', 'run_demo', 'run_site', 'run_flask',
+    'run_profile_startup']
 
 
 def load_env_helper():
@@ -60,8 +62,57 @@ def _add_site_env_arg(parser):
     return parser, handle_site_env_args
 
 
+def _profile_startup(output=None, min_time=0.001):
+    """Build the site and report the profiled boot time breakdown.
+
+    The text tree is printed and the JSON tree is saved to `output`.
+    """
+    from .utils.profiler import StartupProfiler, profile_section
+    profiler = StartupProfiler(name='dasha startup')
+    with profiler.profile(track_imports=True):
+        with profile_section('import dasha.web'):
+            from .web import create_app
+        with profile_section('create_app'):
+            create_app()
+        with profile_section('serialize layout'):
+            from plotly.io.json import to_json_plotly
+            from .web.extensions.dasha import dash_app
+            to_json_plotly(dash_app.layout)
+    click.echo(profiler.format_tree(min_time=min_time))
+    if output is not None:
+        with open(output, 'w') as fo:
+            fo.write(profiler.to_json(min_time=min_time, indent=2))
+        click.echo(f"profile saved to {output}")
+    return profiler
+
+
+def _build_assets():
+    """Build the site and report the bundled assets."""
+    os.environ['DASHA_HOT_RELOAD'] = '0'
+    from .web import create_app
+    from .web.extensions.dasha import get_dasha_instances
+    server = create_app()
+    for ext in get_dasha_instances(server):
+        bundle = ext.asset_bundle
+        if bundle is None:
+            click.echo("no assets bundled")
+            continue
+        for name in bundle.files:
+            if bundle.output_dir is None:
+                click.echo(name)
+            else:
+                click.echo(f"{bundle.output_dir.joinpath(name)}")
+
+
+def _use_hot_reload():
+    """True if the incremental reloader is used instead of restarting."""
+    return os.environ.get('DASHA_HOT_RELOAD', None) == '1'
+
+
 def _add_ext_arg(parser):
-    _all_ext_procs = ['flask', 'celery', 'beat', 'flower']
+    _all_ext_procs = [
+        'flask', 'serve', 'celery', 'beat', 'flower', 'profile-startup',
+        'build-assets', 'vendor-assets']
     parser.add_argument(
             'extension',
             metavar='EXT',
@@ -118,7 +169,20 @@ def _add_ext_arg(parser):
 ~~~~ dasha is running: http://{host}:{port} ~~~~~
 ''')
                 hk.set_post_func(dasha_splash_screen)
-                app.run(host=host, debug=True, port=port)
+                app.run(
+                    host=host, debug=True, port=port,
+                    use_reloader=not _use_hot_reload())
+        elif args.extension == 'serve':
+            from .web.serve import serve
+            serve()
+        elif args.extension == 'build-assets':
+            _build_assets()
+        elif args.extension == 'vendor-assets':
+            from .web.vendor import download_vendor_assets
+            for url, filepath in download_vendor_assets().items():
+                click.echo(f"{url} -> {filepath}")
+        elif args.extension == 'profile-startup':
+            _profile_startup(output='dasha_startup_profile.json')
         elif args.extension in ['celery', 'beat', 'flower']:
             e = args.extension
             dispatch_cmd = {
@@ -137,11 +201,36 @@ def run_site(args=None):
             description='Run DashA site.')
     parser, handle_site_env_args = _add_site_env_arg(parser)
     parser, handle_ext_args = _add_ext_arg(parser)
+
+    init_log(level='INFO')
+
     args = parser.parse_args(args=args)
     handle_site_env_args(args)
     handle_ext_args(args)
 
 
+def run_profile_startup(args=None):
+    """A helper utility to profile the startup of DashA site."""
+
+    parser = argparse.ArgumentParser(
+            description='Profile the startup of DashA site.')
+    parser, handle_site_env_args = _add_site_env_arg(parser)
+    parser.add_argument(
+            '--output', '-o',
+            metavar='FILE',
+            default='dasha_startup_profile.json',
+            help='Path to save the profile tree as JSON.')
+    parser.add_argument(
+            '--min_time',
+            metavar='SEC',
+            type=float,
+            default=0.001,
+            help='Omit sections that take less than this time.')
+    args = parser.parse_args(args=args)
+    handle_site_env_args(args)
+    _profile_startup(output=args.output, min_time=args.min_time)
+
+
 def run_demo():
     """A helper utility to run the examples in `~dasha.examples`"""
 
@@ -201,7 +290,8 @@ def run_flask(ctx, args):
     except Exception:
         port = 8050
     from flask.cli import run_command
-    ctx.parent.invoke(run_command, reload=True, port=port)
+    ctx.parent.invoke(
+        run_command, reload=not _use_hot_reload(), port=port)
 
 
 if __name__ == "__main__":
@@ -1,12 +1,18 @@
 #! /usr/bin/env python
 
+import ast
 import flask
+import threading
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
 import importlib.util
 from collections.abc import Mapping
 from dataclasses import dataclass, field
 from typing import Sequence
-from schema import Use
+from schema import Use, Or
+from wrapt import ObjectProxy
 
 from tollan.utils.fmt import pformat_yaml
 from tollan.utils.log import get_logger, timeit, logit
@@ -15,8 +21,11 @@ from tollan.utils import rupdate
 from tollan.utils.dataclass_schema import add_schema
 from tollan.utils.schema import ObjectSchema
 
+from .utils import get_rss
+from .utils.profiler import profile_section
 
-__all__ = ['Extension', 'Site']
+
+__all__ = ['Extension', 'ExtensionProxy', 'Site']
 
 
 DASHA_SITE_VAR_NAME = 'DASHA_SITE'
@@ -29,6 +38,22 @@ def _ensure_obj(arg):
     return arg
 
 
+def _get_module_name(arg):
+    """Return the name of extension module `arg` without loading it."""
+    if isinstance(arg, str):
+        return arg
+    return getattr(arg, '__name__', None)
+
+
+_ext_module_schema = ObjectSchema(
+    attrs_required=('init_ext', 'init_app'),
+    base_schema=Use(_ensure_obj))
+
+
+_lazy_extensions = dict()
+"""The registry of lazy extensions, keyed by the module name."""
+
+
 @add_schema
 @dataclass
 class Extension(object):
@@ -49,6 +74,26 @@ class Extension(object):
         flask extension object and a config dict. It is called to setup the
         flask extension with respect to the given app.
 
+    The module may also define ``requires``, a list of names of the extension
+    modules whose ``init_app`` has to be called before that of this one. More
+    can be added via the ``requires`` item. Those not present in the site are
+    ignored.
+
+    The module may also define ``post_fork``, a function that takes the
+    flask server and the config dict. It is called in the child process after
+    a fork to re-create the resources such as connection pools that can not
+    be shared with the parent process.
+
+    The module may also define ``teardown``, a function that takes the flask
+    server and the config dict. It is called when the site shuts down to
+    close the resources such as connection pools.
+
+    The module may also define ``mount_config``, a function that takes the
+    config dict and a URL prefix, and returns the config to serve the
+    extension under that prefix. Such extensions have one instance per site
+    when multiple sites are hosted in one server (see
+    :meth:`Site.from_multi`), while the others are shared among the sites.
+
     2. ``config``. The config dict to be passed to ``init_ext`` and
     ``init_app``.
 
@@ -59,15 +104,18 @@ class Extension(object):
 
     The underlying extension object is also available as attribute :attr:`ext`.
 
+    When ``lazy`` is True, importing the module (if specified as str) and
+    calling ``init_ext`` are deferred until the extension is first used, i.e.,
+    when :attr:`ext` is accessed, :meth:`init_app` is called, or an attribute
+    of the `ExtensionProxy` defined in the module is accessed.
+
     For an example of extension module, see `~dasha.web.extensions.db`
     """
 
     module: object = field(
         metadata={
             'description': 'The extension module.',
-            'schema': ObjectSchema(
-                attrs_required=('init_ext', 'init_app'),
-                base_schema=Use(_ensure_obj))
+            'schema': Or(str, _ext_module_schema)
             }
         )
     config: dict = field(
@@ -76,19 +124,154 @@ class Extension(object):
             'description': 'The extension config dict.',
             }
         )
+    lazy: bool = field(
+        default=False,
+        metadata={
+            'description': 'Defer loading the extension until first use.',
+            }
+        )
+    requires: list = field(
+        default_factory=list,
+        metadata={
+            'description': 'The extension modules to init before this one.',
+            }
+        )
+
+    logger = get_logger()
 
     def __post_init__(self, *args, **kwargs):
-        self._ext = self.module.init_ext(self.config)
+        self._ext = None
+        self._loaded = False
+        self._load_info = None
+        self._init_time = None
+        self._lock = threading.RLock()
+        # keep the name as specified so it does not change after loading.
+        self._module_name = _get_module_name(self.module)
+        if self.lazy:
+            _lazy_extensions[self.module_name] = self
+        else:
+            self.load()
+
+    @property
+    def module_name(self):
+        """The name of the extension module."""
+        return self._module_name
+
+    @property
+    def loaded(self):
+        """True if the extension module is loaded."""
+        return self._loaded
+
+    @property
+    def init_time(self):
+        """The time spent in :meth:`init_app`, or None if not called."""
+        return self._init_time
+
+    @property
+    def dependencies(self):
+        """The names of the extension modules this one requires.
+
+        This loads the extension module.
+        """
+        self.load()
+        return list(getattr(self.module, 'requires', list())) + list(
+            self.requires)
+
+    @property
+    def load_info(self):
+        """The time and RSS spent on loading the lazy extension.
+
+        This is None if the extension is not lazy or not loaded yet.
+        """
+        return self._load_info
+
+    def load(self):
+        """Load the extension module and create the extension object.
+
+        This is called at construction time unless :attr:`lazy` is True.
+        """
+        with self._lock:
+            if self._loaded:
+                return self._ext
+            t0 = time.perf_counter()
+            rss0 = get_rss()
+            with profile_section(f'init_ext {self.module_name}'):
+                self.module = _ext_module_schema.validate(self.module)
+                self._ext = self.module.init_ext(self.config)
+            self._loaded = True
+            if self.lazy:
+                self._load_info = {
+                    'time': time.perf_counter() - t0,
+                    'rss': get_rss() - rss0,
+                    }
+                self.logger.info(
+                    f"loaded lazy extension {self.module_name} in "
+                    f"{self._load_info['time']:.3f}s, "
+                    f"rss +{self._load_info['rss'] / 2 ** 20:.1f}MiB")
+        return self._ext
 
     def init_app(self, server):
         """Set up the extension module for app.
 
         """
-        self.module.init_app(server, self.config)
+        self.load()
+        t0 = time.perf_counter()
+        with profile_section(f'init_app {self.module_name}'):
+            self.module.init_app(server, self.config)
+        self._init_time = time.perf_counter() - t0
+
+    def post_fork(self, server):
+        """Re-initialize the extension resources in a forked child process.
+
+        This is a no-op if the extension is not loaded or the module does not
+        define ``post_fork``.
+        """
+        if not self._loaded:
+            return
+        post_fork = getattr(self.module, 'post_fork', None)
+        if post_fork is not None:
+            post_fork(server, self.config)
+
+    def teardown(self, server):
+        """Close the extension resources when the site shuts down.
+
+        This is a no-op if the extension is not loaded or the module does not
+        define ``teardown``.
+        """
+        if not self._loaded:
+            return
+        teardown = getattr(self.module, 'teardown', None)
+        if teardown is not None:
+            teardown(server, self.config)
 
     @property
     def ext(self):
-        return self._ext
+        return self.load()
+
+
+class ExtensionProxy(ObjectProxy):
+    """A proxy to the underlying flask extension object of an extension
+    module.
+
+    Accessing attributes of the proxy before the ``__wrapped__`` object is set
+    loads the lazy `Extension` of module `module_name`, if any.
+
+    Parameters
+    ----------
+    module_name : str
+        The name of the extension module, typically ``__name__``.
+    """
+
+    def __init__(self, module_name, wrapped=None):
+        super().__init__(wrapped)
+        self._self_module_name = module_name
+
+    def __getattr__(self, name):
+        if self.__wrapped__ is None and not name.startswith('_'):
+            ext = _lazy_extensions.get(self._self_module_name, None)
+            if ext is not None:
+                ext.load()
+        return getattr(self.__wrapped__, name)
 
 
 def _resolve_ext(ext):
@@ -116,12 +299,194 @@ def _make_ext_list(exts):
     # check extension of same module and merge the config
     for ext in exts:
         if ext.module in ext_dict:
-            rupdate(ext_dict[ext.module].config, ext.config)
+            if _is_multi_instance_ext(ext.module):
+                ext_dict[(ext.module, id(ext))] = ext
+            else:
+                rupdate(ext_dict[ext.module].config, ext.config)
         else:
             ext_dict[ext.module] = ext
+    # make sure the lazy extensions registered are the ones in use.
+    for ext in ext_dict.values():
+        if ext.lazy:
+            _lazy_extensions[ext.module_name] = ext
     return list(ext_dict.values())
 
 
+def _source_defines(path, name):
+    """Return True if the object of import `path` defines attribute `name`,
+    or None if this can not be told from the source.
+
+    The source of the module is parsed so the module is not imported.
+    """
+    module_name, _, obj_name = path.partition(':')
+    try:
+        spec = importlib.util.find_spec(module_name)
+    except (ImportError, ValueError):
+        return None
+    if spec is None or not (spec.origin or '').endswith('.py'):
+        return None
+    try:
+        body = ast.parse(Path(spec.origin).read_text()).body
+    except (OSError, SyntaxError, ValueError):
+        return None
+    if obj_name:
+        classes = [
+            n for n in body
+            if isinstance(n, ast.ClassDef) and n.name == obj_name]
+        if not classes:
+            return None
+        body = classes[0].body
+    for node in body:
+        if isinstance(
+                node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names = [node.name]
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) \
+                else [node.target]
+            names = [t.id for t in targets if isinstance(t, ast.Name)]
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            names = [a.asname or a.name for a in node.names]
+        else:
+            continue
+        if name in names:
+            return True
+    return False
+
+
+def _is_multi_instance_ext(module):
+    """True if extension `module` defines ``mount_config``.
+
+    The module specified as str is not imported if this can be told from
+    its source, so the lazy extensions stay unloaded.
+    """
+    if isinstance(module, str):
+        result = _source_defines(module, 'mount_config')
+        if result is not None:
+            return result
+    return getattr(_ensure_obj(module), 'mount_config', None) is not None
+
+
+def _merge_config(dest, src, name):
+    """Merge `src` to `dest` in place.
+
+    `ValueError` is raised for items that have different values.
+    """
+    for k, v in src.items():
+        if k not in dest:
+            # copy the dicts so the merge does not modify the sources.
+            if isinstance(v, Mapping):
+                v = _merge_config(dict(), v, f'{name}.{k}')
+            dest[k] = v
+        elif isinstance(dest[k], Mapping) and isinstance(v, Mapping):
+            _merge_config(dest[k], v, f'{name}.{k}')
+        elif dest[k] != v:
+            raise ValueError(
+                f"conflicting values of {name}.{k}: {dest[k]} and {v}")
+    return dest
+
+
+def _merge_site_dicts(site_dicts):
+    """Return the site dict that hosts all sites in `site_dicts`.
+
+    Parameters
+    ----------
+    site_dicts : dict
+        The site dicts keyed by the URL prefix.
+    """
+    server = None
+    server_config = dict()
+    init_max_workers = 1
+    exts = list()
+    shared_exts = dict()
+    for prefix, d in site_dicts.items():
+        if d.get('server', None) is not None:
+            if server is not None and d['server'] is not server:
+                raise ValueError("sites have to use the same server.")
+            server = d['server']
+        site_server_config = d.get('server_config', dict())
+        if not isinstance(site_server_config, Mapping):
+            raise ValueError(
+                f"server_config of site {prefix} has to be a dict.")
+        _merge_config(server_config, site_server_config, 'server_config')
+        init_max_workers = max(
+            init_max_workers, d.get('init_max_workers', 1))
+        for ext in d.get('extensions', list()):
+            if isinstance(ext, Extension):
+                ext = {
+                    'module': ext.module, 'config': ext.config,
+                    'lazy': ext.lazy, 'requires': ext.requires}
+            ext = dict(ext)
+            config = _merge_config(
+                dict(), ext.get('config', dict()), 'config')
+            if _is_multi_instance_ext(ext['module']):
+                module = _ensure_obj(ext['module'])
+                ext['config'] = module.mount_config(config, prefix)
+                exts.append(ext)
+                continue
+            # the shared extensions are merged
+            name = _get_module_name(ext['module'])
+            if name in shared_exts:
+                _merge_config(
+                    shared_exts[name]['config'], config, f'{name}.config')
+                shared_exts[name]['requires'] = list(dict.fromkeys(
+                    shared_exts[name].get('requires', list())
+                    + ext.get('requires', list())))
+                continue
+            ext['config'] = config
+            shared_exts[name] = ext
+            exts.append(ext)
+    d = {
+        'server_config': server_config,
+        'extensions': exts,
+        'init_max_workers': init_max_workers,
+        }
+    if server is not None:
+        d['server'] = server
+    return d
+
+
+def _resolve_ext_dependencies(exts):
+    """Return the indices of extensions each of `exts` depends on."""
+    index = dict()
+    for i, ext in enumerate(exts):
+        index[ext.module_name] = i
+        index.setdefault(getattr(ext.module, '__name__', None), i)
+    deps = dict()
+    last_instance = dict()
+    for i, ext in enumerate(exts):
+        deps[i] = {
+            index[name] for name in ext.dependencies
+            if name in index and index[name] != i}
+        # the instances of the same module are initialized in order, so the
+        # ids generated in them do not depend on the thread scheduling.
+        if ext.module_name in last_instance:
+            deps[i].add(last_instance[ext.module_name])
+        last_instance[ext.module_name] = i
+    # check cycles by topological sorting.
+    _toposort_ext_dependencies(deps)
+    return deps
+
+
+def _toposort_ext_dependencies(deps):
+    """Return the extension indices in an order that satisfies `deps`.
+
+    The original order is kept when possible.
+    """
+    result = list()
+    done = set()
+    remaining = dict(deps)
+    while remaining:
+        ready = [i for i in sorted(remaining) if remaining[i] <= done]
+        if not ready:
+            raise ValueError(
+                f"circular dependencies in extensions: {sorted(remaining)}")
+        i = ready[0]
+        del remaining[i]
+        done.add(i)
+        result.append(i)
+    return result
+
+
 def _make_flask_server():
     """Return a basic flask server used as default when server is not specifed
     in `Site`.
@@ -159,6 +524,11 @@ class Site(object):
     2. ``extensions``. The shall be a list of items that an
         `~dasha.core.Extension` object could be created from.
 
+    3. ``init_max_workers``. Optional. When larger than 1, the ``init_app``
+    of the extensions are run in a thread pool of this size, in the order
+    allowed by the extension dependencies. This reduces the boot time when
+    extensions wait on network round trips.
+
     Instance of this class is typically created via the ``from_*`` class
     methods.
     """
@@ -185,8 +555,21 @@ class Site(object):
             }
         )
 
+    init_max_workers: int = field(
+        default=1,
+        metadata={
+            'description': (
+                'The number of threads to run extension init_app. '
+                'Values larger than 1 enables concurrent initialization.'),
+            }
+        )
+
     logger = get_logger()
 
+    def __post_init__(self, *args, **kwargs):
+        self._post_fork_hooks = list()
+        self._warmup_hooks = list()
+
     @timeit
     def init_app(self):
         """Initialize server and the extensions.
@@ -207,12 +590,206 @@ class Site(object):
                 server.config.update(config)
             else:
                 server.config.from_object(config)
-        for ext in self.extensions:
-            with logit(
-                    logger.debug, f"init extension {ext}"):
-                ext.init_app(server)
+        exts = self.extensions
+        deps = _resolve_ext_dependencies(exts)
+        t0 = time.perf_counter()
+        if self.init_max_workers > 1:
+            self._init_extensions_concurrent(server, deps)
+        else:
+            for i in _toposort_ext_dependencies(deps):
+                self._init_extension(exts[i], server)
+        logger.info(
+            f"initialized {len(exts)} extensions in "
+            f"{time.perf_counter() - t0:.3f}s:\n" + '\n'.join(
+                f"  {ext.module_name}: {ext.init_time:.3f}s"
+                for ext in exts))
+        lazy_report = self.report_lazy_extensions()
+        if lazy_report:
+            logger.info(
+                "lazy extensions:\n" + '\n'.join(
+                    f"  {name}: {self._format_load_info(info)}"
+                    for name, info in lazy_report.items()))
         return server
 
+    @staticmethod
+    def _format_load_info(info):
+        if info is None:
+            return 'not loaded'
+        return (
+            f"{info['time']:.3f}s, rss +{info['rss'] / 2 ** 20:.1f}MiB")
+
+    def _init_extension(self, ext, server):
+        logger = get_logger()
+        with logit(logger.debug, f"init extension {ext}"):
+            ext.init_app(server)
+
+    def _init_extensions_concurrent(self, server, deps):
+        # the init_app are submitted once all their dependencies are done.
+        # the first error cancels all pending ones and is re-raised.
+        exts = self.extensions
+        remaining = dict(deps)
+        done = set()
+        running = dict()
+        with ThreadPoolExecutor(
+                max_workers=self.init_max_workers,
+                thread_name_prefix='dasha_init') as executor:
+
+            def submit_ready():
+                for i in sorted(remaining):
+                    if remaining[i] <= done:
+                        del remaining[i]
+                        # copy the context so the profile sections are
+                        # nested properly.
+                        ctx = contextvars.copy_context()
+                        future = executor.submit(
+                            ctx.run, self._init_extension, exts[i], server)
+                        running[future] = i
+
+            submit_ready()
+            while running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    i = running.pop(future)
+                    e = future.exception()
+                    if e is not None:
+                        for f in running:
+                            f.cancel()
+                        raise e
+                    done.add(i)
+                submit_ready()
+
+    def register_post_fork(self, func):
+        """Register `func` to be called by :meth:`post_fork`.
+
+        This can be used as a decorator.
+        """
+        self._post_fork_hooks.append(func)
+        return func
+
+    def post_fork(self):
+        """Re-initialize the resources in a forked child process.
+
+        This calls :meth:`Extension.post_fork` of all extensions, followed by
+        the functions registered via :meth:`register_post_fork`. Errors are
+        logged per extension and hook, so one failure does not skip the rest.
+        """
+        logger = get_logger()
+        server = self.server
+        for ext in self.extensions:
+            try:
+                with logit(logger.debug, f"post fork extension {ext}"):
+                    ext.post_fork(server)
+            except Exception as e:
+                logger.error(
+                    f"failed to run post fork of extension {ext}: {e}",
+                    exc_info=True)
+        for func in self._post_fork_hooks:
+            try:
+                func()
+            except Exception as e:
+                logger.error(
+                    f"failed to run post fork hook {func}: {e}",
+                    exc_info=True)
+
+    def register_warmup(self, func):
+        """Register `func` to be called by :meth:`warmup`.
+
+        This can be used as a decorator.
+        """
+        self._warmup_hooks.append(func)
+        return func
+
+    def warmup(self, requests=None):
+        """Warm up the caches and connections before serving.
+
+        The `requests` are replayed against the server in process, followed
+        by the functions registered via :meth:`register_warmup`. Failed
+        requests and functions are logged and do not stop the warmup.
+
+        Parameters
+        ----------
+        requests : list of dict, optional
+            The requests to replay. Each item has key ``path``, and optional
+            keys ``method`` (default ``GET``), ``json``, and ``headers``.
+
+        Returns
+        -------
+        dict
+            The number of requests, the numbers of failed requests and
+            functions, and the elapsed time.
+        """
+        logger = get_logger()
+        requests = requests or list()
+        n_failed = 0
+        t0 = time.perf_counter()
+        with profile_section('Site.warmup'):
+            client = self.server.test_client()
+            for req in requests:
+                method = req.get('method', 'GET')
+                path = req.get('path', None)
+                try:
+                    resp = client.open(
+                        path, method=method, json=req.get('json', None),
+                        headers=req.get('headers', None))
+                    failed = resp.status_code >= 400
+                    resp.close()
+                except Exception as e:
+                    logger.debug(
+                        f"warmup {method} {path} failed: {e}",
+                        exc_info=True)
+                    failed = True
+                if failed:
+                    n_failed += 1
+                    logger.warning(f"warmup {method} {path} failed")
+            n_hooks_failed = 0
+            for func in self._warmup_hooks:
+                try:
+                    func()
+                except Exception as e:
+                    n_hooks_failed += 1
+                    logger.warning(
+                        f"warmup function {func} failed: {e}",
+                        exc_info=True)
+        report = {
+            'n_requests': len(requests),
+            'n_failed': n_failed,
+            'n_hooks_failed': n_hooks_failed,
+            'elapsed': time.perf_counter() - t0,
+            }
+        logger.info(
+            f"warmup done in {report['elapsed']:.3f}s with "
+            f"{report['n_requests']} requests, {n_failed} failed")
+        return report
+
+    def teardown(self):
+        """Close the resources of the extensions.
+
+        This calls :meth:`Extension.teardown` of all extensions in reversed
+        order. Errors are logged so the rest can still be closed.
+        """
+        logger = get_logger()
+        server = self.server
+        for ext in reversed(self.extensions):
+            try:
+                with logit(logger.debug, f"teardown extension {ext}"):
+                    ext.teardown(server)
+            except Exception as e:
+                logger.error(
+                    f"failed to teardown extension {ext.module_name}: {e}",
+                    exc_info=True)
+
+    def report_lazy_extensions(self):
+        """Return the loading cost of the lazy extensions.
+
+        The returned dict maps the module name of each lazy extension to its
+        :attr:`Extension.load_info`, which is the time and RSS deferred from
+        the site startup. Extensions never used map to None.
+        """
+        return {
+            ext.module_name: ext.load_info
+            for ext in self.extensions if ext.lazy
+            }
+
     @classmethod
     def from_dict(cls, d):
         cls.logger.debug(f"create site from\n{pformat_yaml(d)}")
@@ -220,6 +797,33 @@ class Site(object):
         # already
         return cls.from_dict_(d)
 
+    @classmethod
+    def from_multi(cls, sites):
+        """Create a site that hosts multiple sites in one server.
+
+        The extensions that define ``mount_config`` (e.g., the DashA
+        extension) are created for each site and served under its URL
+        prefix. The other extensions are shared, for which the configs of
+        the sites are merged. `ValueError` is raised if the configs
+        conflict.
+
+        Parameters
+        ----------
+        sites : dict
+            The sites keyed by the URL prefix. The values can be anything
+            accepted by :meth:`from_any`.
+
+        Returns
+        -------
+        `~dasha.core.Site`
+            A `~dasha.core.Site` instance.
+        """
+        with profile_section('Site.from_multi'):
+            site_dicts = {
+                prefix: _load_site_dict(site)
+                for prefix, site in sites.items()}
+            return cls.from_dict(_merge_site_dicts(site_dicts))
+
     @classmethod
     def from_filepath(cls, filepath):
         """Create a site from a python source file.
@@ -237,13 +841,7 @@ class Site(object):
         `~dasha.core.Site`
             A `~dasha.core.Site` instance.
         """
-        with timeit(f'import site module from {filepath}'):
-            filepath = Path(filepath).expanduser().resolve()
-            spec = importlib.util.spec_from_file_location(
-                    f"dasha_site_{filepath.stem}", filepath.as_posix())
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
-        return cls.from_object(module)
+        return cls.from_object(_import_site_file(filepath))
 
     @classmethod
     def from_object(cls, arg):
@@ -260,18 +858,7 @@ class Site(object):
         `~dasha.core.Site`
             A `~dasha.core.Site` instance.
         """
-        if isinstance(arg, str):
-            with timeit(f'import site module from {arg}'):
-                obj = getobj(arg)
-        else:
-            obj = arg
-        if not hasattr(obj, DASHA_SITE_VAR_NAME):
-            raise ValueError(
-                f"Object {obj} does not define a DASHA_SITE variable")
-        DASHA_SITE = obj.DASHA_SITE
-        if callable(DASHA_SITE):
-            DASHA_SITE = DASHA_SITE()
-        return cls.from_dict(DASHA_SITE)
+        return cls.from_dict(_get_site_dict(arg))
 
     @classmethod
     def from_any(cls, arg):
@@ -280,12 +867,62 @@ class Site(object):
         It checks the value of `arg` and dispatches to the most probable
         ``from_*`` factory method.
         """
+        with profile_section('Site.from_any'):
+            return cls._from_any(arg)
 
-        if isinstance(arg, str):
-            # this could be a filepath or module path
-            p = Path(arg)
-            if p.exists() and (not p.is_dir()) and (p.suffix == '.py'):
-                return cls.from_filepath(p)
+    @classmethod
+    def _from_any(cls, arg):
+        if _is_site_file(arg):
+            return cls.from_filepath(arg)
         if isinstance(arg, Mapping):
             return cls.from_dict(arg)
         return cls.from_object(arg)
+
+
+def _is_site_file(arg):
+    if not isinstance(arg, str):
+        return False
+    # this could be a filepath or module path
+    p = Path(arg)
+    return p.exists() and (not p.is_dir()) and (p.suffix == '.py')
+
+
+def _import_site_file(filepath):
+    """Return the module imported from site source file `filepath`."""
+    with timeit(f'import site module from {filepath}'), \
+            profile_section(f'import site module from {filepath}'):
+        filepath = Path(filepath).expanduser().resolve()
+        spec = importlib.util.spec_from_file_location(
+                f"dasha_site_{filepath.stem}", filepath.as_posix())
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return module
+
+
+def _get_site_dict(arg):
+    """Return the site dict defined in object `arg`.
+
+    If `arg` is str, `~tollan.utils.getobj` is used to import the object.
+    """
+    if isinstance(arg, str):
+        with timeit(f'import site module from {arg}'), \
+                profile_section(f'import site module from {arg}'):
+            obj = getobj(arg)
+    else:
+        obj = arg
+    if not hasattr(obj, DASHA_SITE_VAR_NAME):
+        raise ValueError(
+            f"Object {obj} does not define a DASHA_SITE variable")
+    DASHA_SITE = obj.DASHA_SITE
+    if callable(DASHA_SITE):
+        DASHA_SITE = DASHA_SITE()
+    return DASHA_SITE
+
+
+def _load_site_dict(arg):
+    """Return the site dict from `arg` as accepted by `Site.from_any`."""
+    if _is_site_file(arg):
+        return _get_site_dict(_import_site_file(arg))
+    if isinstance(arg, Mapping):
+        return arg
+    return _get_site_dict(arg)
@@ -0,0 +1,79 @@
+// Decode the typed arrays in the Dash callback responses.
+// See dasha.web.typed_arrays.
+(function() {
+    var ctors = {
+        f8: Float64Array, f4: Float32Array,
+        i4: Int32Array, i2: Int16Array, i1: Int8Array,
+        u4: Uint32Array, u2: Uint16Array, u1: Uint8Array
+    };
+
+    // typed arrays sent back in callback inputs are plain lists.
+    Object.keys(ctors).forEach(function(k) {
+        var proto = ctors[k].prototype;
+        if (!proto.toJSON) {
+            proto.toJSON = function() { return Array.from(this); };
+        }
+    });
+
+    function isTypedArraySpec(v) {
+        return (
+            typeof v.bdata === 'string' && typeof v.dtype === 'string' &&
+            ctors.hasOwnProperty(v.dtype));
+    }
+
+    function decodeSpec(v) {
+        var s = atob(v.bdata);
+        var bytes = new Uint8Array(s.length);
+        for (var i = 0; i < s.length; i++) {
+            bytes[i] = s.charCodeAt(i);
+        }
+        var arr = new ctors[v.dtype](bytes.buffer);
+        var shape = String(v.shape || arr.length).split(',').map(Number);
+        if (shape.length !== 2) {
+            return arr;
+        }
+        var rows = [];
+        var n = shape[1];
+        for (var j = 0; j < shape[0]; j++) {
+            rows.push(arr.subarray(j * n, (j + 1) * n));
+        }
+        return rows;
+    }
+
+    function decode(v) {
+        if (Array.isArray(v)) {
+            for (var i = 0; i < v.length; i++) {
+                v[i] = decode(v[i]);
+            }
+            return v;
+        }
+        if (v === null || typeof v !== 'object') {
+            return v;
+        }
+        if (isTypedArraySpec(v)) {
+            return decodeSpec(v);
+        }
+        for (var k in v) {
+            if (v.hasOwnProperty(k)) {
+                v[k] = decode(v[k]);
+            }
+        }
+        return v;
+    }
+
+    var fetch = window.fetch;
+    window.fetch = function(input, init) {
+        var url = typeof input === 'string' ? input : input.url;
+        var result = fetch.apply(this, arguments);
+        if (url.indexOf('_dash-update-component') < 0) {
+            return result;
+        }
+        return result.then(function(response) {
+            var json = response.json;
+            response.json = function() {
+                return json.call(response).then(decode);
+            };
+            return response;
+        });
+    };
+})();
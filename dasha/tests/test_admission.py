@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+
+import time
+import threading
+
+import pytest
+from dash import Dash, html, Input, Output
+from dash.exceptions import PreventUpdate
+
+from ..web.admission import (
+    AdmissionPolicy, CallbackLimiter, init_callback_limits, get_stats,
+    wrap_callbacks, notify_callbacks_changed)
+
+
+def test_admission_policy():
+    with pytest.raises(ValueError):
+        AdmissionPolicy(max_concurrent=0)
+    with pytest.raises(ValueError):
+        AdmissionPolicy(on_busy='wait')
+
+
+def test_callback_limiter():
+    limiter = CallbackLimiter(
+        'test_limiter.value', AdmissionPolicy(
+            max_concurrent=1, max_queue=1, timeout=5, on_busy='cached'))
+    started = threading.Event()
+    release = threading.Event()
+
+    def func(x):
+        started.set()
+        release.wait(5)
+        return x * 2
+
+    limited = limiter.wrap(func)
+    results = list()
+    t0 = threading.Thread(target=lambda: results.append(limited(1)))
+    t0.start()
+    started.wait(5)
+    # the second call waits in the queue
+    t1 = threading.Thread(target=lambda: results.append(limited(2)))
+    t1.start()
+    while limiter.n_waiting == 0:
+        time.sleep(0.01)
+    # the queue is full, and there is no cached value
+    with pytest.raises(PreventUpdate):
+        limited(1)
+    release.set()
+    t0.join()
+    t1.join()
+    assert sorted(results) == [2, 4]
+    assert limiter.n_running == 0
+
+    # the cached value is returned when busy.
+    release.clear()
+    started.clear()
+    t0 = threading.Thread(target=lambda: limited(3))
+    t0.start()
+    started.wait(5)
+    t1 = threading.Thread(target=lambda: limited(3))
+    t1.start()
+    while limiter.n_waiting == 0:
+        time.sleep(0.01)
+    assert limited(1) == 2
+    release.set()
+    t0.join()
+    t1.join()
+    stats = get_stats()
+    assert stats['callback_limits.test_limiter.value.n_rejected'] == 2
+    assert stats['callback_limits.test_limiter.value.n_cached'] == 1
+    assert stats['callback_limits.test_limiter.value.n_admitted'] == 4
+
+
+def test_init_callback_limits():
+    app = Dash(__name__)
+    app.layout = html.Div([html.Div(id='slow'), html.Div(id='fast')])
+    init_callback_limits(app, {'slow': {'max_concurrent': 1}})
+    started = threading.Event()
+    release = threading.Event()
+
+    @app.callback(Output('slow', 'children'), Input('slow', 'title'))
+    def slow(title):
+        started.set()
+        release.wait(5)
+        return title
+
+    @app.callback(Output('fast', 'children'), Input('fast', 'title'))
+    def fast(title):
+        return title
+
+    def request(id):
+        return app.server.test_client().post(
+            '/_dash-update-component', json={
+                'output': f'{id}.children',
+                'outputs': {'id': id, 'property': 'children'},
+                'inputs': [
+                    {'id': id, 'property': 'title', 'value': 'a'}],
+                'changedPropIds': [f'{id}.title'],
+                })
+
+    responses = list()
+    t = threading.Thread(target=lambda: responses.append(request('slow')))
+    t.start()
+    started.wait(5)
+    assert request('slow').status_code == 204
+    assert request('fast').status_code == 200
+    release.set()
+    t.join()
+    assert responses[0].status_code == 200
+    assert hasattr(app.callback_map['slow.children']['callback'],
+                   '_dasha_limiter')
+    assert not hasattr(app.callback_map['fast.children']['callback'],
+                       '_dasha_limiter')
+
+
+def test_wrap_callbacks():
+    app = Dash(__name__)
+    app.layout = html.Div(id='a')
+    calls = list()
+
+    def make_wrapper(cid, func):
+        calls.append(cid)
+        return lambda *args, **kwargs: func(*args, **kwargs)
+
+    def callback_request():
+        with app.server.test_request_context(
+                '/_dash-update-component', method='POST'):
+            app.server.preprocess_request()
+
+    wrap_callbacks(app, make_wrapper, '_test_wrapped')
+
+    @app.callback(Output('a', 'children'), Input('a', 'title'))
+    def a(title):
+        return title
+
+    callback_request()
+    assert calls == ['a.children']
+    func = app.callback_map['a.children']['callback']
+    assert hasattr(func, '_test_wrapped')
+
+    # the callbacks are replaced, e.g., by the rebuild of a page.
+    app.callback_map['a.children'] = dict(
+        app.callback_map['a.children'], callback=a)
+    callback_request()
+    assert calls == ['a.children']
+    notify_callbacks_changed(app)
+    callback_request()
+    assert calls == ['a.children'] * 2
+    assert app.callback_map['a.children']['callback'] is not func
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+
+import gzip
+
+import flask
+
+from ..web.assets import AssetBundle, minify_js, minify_css
+
+
+def test_minify():
+    js = minify_js(
+        'var a = {\n    // comment\n    f: function(x) {\n'
+        '        console.log(x)\n        console.log(f(\n'
+        '            x));\n        return x;\n    }\n};\n',
+        strip_console=True)
+    assert js == (
+        'var a = {\nf: function(x) {\nconsole.log(f(\nx));\n'
+        'return x;\n}\n};')
+    # the braceless bodies are kept.
+    source = (
+        'if (x)\n    console.log(x);\nelse\n    console.log(y);\n'
+        'f();\nconsole.log(z);\n')
+    assert minify_js(source, strip_console=True) == (
+        'if (x)\nconsole.log(x);\nelse\nconsole.log(y);\nf();')
+    assert minify_js(source) == (
+        'if (x)\nconsole.log(x);\nelse\nconsole.log(y);\nf();\n'
+        'console.log(z);')
+    # the template literals are kept.
+    assert minify_js(
+        '    var s = `a  \n  // b\n\n    c`;\n  // d\n') == \
+        'var s = `a  \n  // b\n\n    c`;'
+    assert minify_css(
+        '/* c */\n.a .b,\n.c > .d\n{\n    color: red;\n}\n') == \
+        '.a .b,.c>.d{color: red;}'
+
+
+def test_asset_bundle(tmp_path):
+    assets_folder = tmp_path.joinpath('assets')
+    assets_folder.mkdir()
+    assets_folder.joinpath('b.js').write_text('var b = 1;\n' * 100)
+    assets_folder.joinpath('a.js').write_text('var a = 1;\n')
+    assets_folder.joinpath('a.css').write_text('.a { color: red; }\n')
+    assets_folder.joinpath('skip.js').write_text('var skip = 1;\n')
+    output_dir = tmp_path.joinpath('output')
+
+    bundle = AssetBundle(assets_folder, output_dir=output_dir, ignore='skip')
+    names = bundle.build()
+    assert set(names.keys()) == {'.js', '.css'}
+    assert names['.js'].startswith('bundle.')
+    js = output_dir.joinpath(names['.js']).read_text()
+    assert js.startswith('var a = 1;\n;\nvar b = 1;')
+    assert 'skip' not in js
+    assert gzip.decompress(
+        output_dir.joinpath(names['.js'] + '.gz').read_bytes()) == js.encode()
+    # same content gets the same names
+    assert AssetBundle(
+        assets_folder, output_dir=output_dir, ignore='skip').build() == names
+
+    server = flask.Flask(__name__)
+    server.add_url_rule(
+        '/<path:filename>', endpoint='assets', view_func=bundle.serve)
+    client = server.test_client()
+    r = client.get(f"/{names['.js']}", headers={'Accept-Encoding': 'gzip'})
+    assert r.headers['Content-Encoding'] == 'gzip'
+    assert 'immutable' in r.headers['Cache-Control']
+    assert gzip.decompress(r.data).decode() == js
+    r = client.get(f"/{names['.css']}")
+    assert 'Content-Encoding' not in r.headers
+    assert r.data == b'.a{color: red;}'
+    assert client.get('/a.js').status_code == 404
+
+
+def test_asset_bundle_output_dir(tmp_path):
+    assets_folder = tmp_path.joinpath('assets')
+    assets_folder.mkdir()
+    assets_folder.joinpath('a.js').write_text('var a = 1;\n')
+    # the bundles are not written by default.
+    bundle = AssetBundle(assets_folder)
+    assert bundle.output_dir is None
+    names = bundle.build()
+    assert bundle.files == [names['.js']]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['assets']
+    # the write errors do not stop the build.
+    output_dir = tmp_path.joinpath('output')
+    output_dir.write_text('not a dir')
+    bundle = AssetBundle(assets_folder, output_dir=output_dir)
+    assert bundle.build() == names
+    assert bundle.files == [names['.js']]
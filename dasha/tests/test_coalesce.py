@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+
+import time
+import threading
+
+import pytest
+from dash import Dash, html, Input, Output
+
+from ..web.coalesce import Singleflight, init_callback_coalescing, get_stats
+
+
+def test_singleflight():
+    sf = Singleflight('test_singleflight')
+    started = threading.Event()
+    release = threading.Event()
+    calls = list()
+
+    def func(x):
+        calls.append(x)
+        started.set()
+        release.wait(5)
+        if x < 0:
+            raise ValueError(x)
+        return x * 2
+
+    def run(key, x):
+        try:
+            results.append(sf.do(key, func, x))
+        except ValueError as e:
+            results.append(e)
+
+    for i, x in enumerate((1, -1)):
+        results = list()
+        threads = [
+            threading.Thread(target=run, args=(x, x)) for _ in range(4)]
+        for t in threads:
+            t.start()
+        # the leader is in func and the others have joined its flight.
+        assert started.wait(5)
+        t0 = time.monotonic()
+        while sf._counters['n_coalesced'].value != 3 * (i + 1):
+            assert time.monotonic() - t0 < 5
+            time.sleep(0.01)
+        release.set()
+        for t in threads:
+            t.join()
+        started.clear()
+        release.clear()
+        assert len(results) == 4
+        if x > 0:
+            assert results == [2] * 4
+        else:
+            assert all(isinstance(r, ValueError) for r in results)
+    assert calls == [1, -1]
+    # no call in flight
+    release.set()
+    assert sf.do(1, func, 3) == 6
+    stats = get_stats()
+    assert stats['coalesce.test_singleflight.n_calls'] == 9
+    assert stats['coalesce.test_singleflight.n_coalesced'] == 6
+    assert stats['coalesce.test_singleflight.ratio'] == pytest.approx(6 / 9)
+
+
+def test_init_callback_coalescing():
+    app = Dash(__name__)
+    app.layout = html.Div([html.Div(id='a'), html.Div(id='b')])
+    init_callback_coalescing(app, ['a.*'])
+
+    @app.callback(Output('a', 'children'), Input('a', 'title'))
+    def a(title):
+        return title
+
+    @app.callback(Output('b', 'children'), Input('b', 'title'))
+    def b(title):
+        return title
+
+    r = app.server.test_client().post(
+        '/_dash-update-component', json={
+            'output': 'a.children',
+            'outputs': {'id': 'a', 'property': 'children'},
+            'inputs': [{'id': 'a', 'property': 'title', 'value': 'x'}],
+            'changedPropIds': ['a.title'],
+            })
+    assert r.json['response'] == {'a': {'children': 'x'}}
+    assert hasattr(
+        app.callback_map['a.children']['callback'], '_dasha_coalesce')
+    assert not hasattr(
+        app.callback_map['b.children']['callback'], '_dasha_coalesce')
+    assert get_stats()['coalesce.a.children.n_calls'] == 1
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+
+from dash import html
+from dash_component_template import ComponentTemplate
+
+from ..web.templates import compactid
+from ..web.templates.utils import PatternMatchingId
+
+
+class _Container(ComponentTemplate):
+
+    class Meta:
+        component_cls = html.Div
+
+
+def test_compact_ids():
+    readable = _Container()
+    readable_id = readable.child(html.Div).child(html.P).id
+    with compactid.use_compact_ids():
+        assert compactid.compact_ids_enabled()
+        root = _Container()
+        child = root.child(html.Div).child(html.P)
+        # the ids are made when accessed.
+        ids = [root.id, child.parent.id, child.id]
+        pmid = PatternMatchingId(container_id=root.id, type='')
+        pm = pmid(type='section-toggle')
+    assert not compactid.compact_ids_enabled()
+    assert _Container().id.startswith('_container')
+
+    assert all(len(i) == 8 for i in ids)
+    assert child.id != readable_id
+    assert compactid.get_readable_id(child.id) == \
+        f'{compactid.get_readable_id(child.parent.id)}-{child.idbase}'
+    assert compactid.get_readable_id(child.id).startswith(
+        f'{compactid.get_readable_id(root.id)}-')
+    assert pm['container_id'] == root.id
+    assert pm['index'] == 0
+    assert compactid.get_readable_id(pm['type']) == 'type=section-toggle'
+
+    s = f'{{"id": "{child.id}"}}'
+    assert compactid.expand_compact_ids(s) == \
+        f'{{"id": "{compactid.get_readable_id(child.id)}"}}'
+    sizes = compactid.measure_compact_ids(layout=s)
+    assert sizes['layout']['readable'] > sizes['layout']['compact']
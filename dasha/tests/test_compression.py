@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+
+import gzip
+
+import flask
+from werkzeug.test import Client
+
+from ..web.compression import CompressionMiddleware
+from ..web.metrics import metrics
+
+
+def _make_server():
+    server = flask.Flask(__name__)
+
+    @server.route('/small')
+    def small():
+        return flask.jsonify({'a': 1})
+
+    @server.route('/large')
+    def large():
+        return flask.jsonify({'a': list(range(1000))})
+
+    @server.route('/stream')
+    def stream():
+        def _gen():
+            for i in range(100):
+                yield f'line {i}\n' * 10
+        return flask.Response(_gen(), mimetype='text/plain')
+
+    @server.route('/image')
+    def image():
+        return flask.Response(b'\0' * 4096, mimetype='image/png')
+
+    server.wsgi_app = CompressionMiddleware(
+        server.wsgi_app, min_size=1024, brotli=False)
+    return server
+
+
+def test_compression():
+    metrics.reset()
+    server = _make_server()
+    client = Client(server)
+    headers = {'Accept-Encoding': 'gzip, deflate'}
+
+    r = client.get('/large', headers=headers)
+    assert r.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in r.headers['Vary']
+    assert gzip.decompress(r.data) == \
+        server.test_client().get('/large').data
+
+    r = client.get('/stream', headers=headers)
+    assert r.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(r.data).decode().count('\n') == 1000
+
+    for path in ['/small', '/image']:
+        r = client.get(path, headers=headers)
+        assert 'Content-Encoding' not in r.headers
+
+    r = client.get('/large')
+    assert 'Content-Encoding' not in r.headers
+    r = client.get('/large', headers={'Accept-Encoding': 'gzip;q=0'})
+    assert 'Content-Encoding' not in r.headers
+
+    stats = CompressionMiddleware.get_stats()
+    assert stats['compression.n_compressed'] == 2
+    assert stats['compression.n_skipped'] == 2
+    assert 0 < stats['compression.ratio'] < 1
+
+
+def test_compression_no_start_response():
+    def app(environ, start_response):
+        def _gen():
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return
+            yield
+        return _gen()
+
+    headers = {'Accept-Encoding': 'gzip'}
+    r = Client(CompressionMiddleware(app)).get('/', headers=headers)
+    assert r.status_code == 200
+    assert r.data == b''
+    # the error of not calling start_response is left for the server.
+    calls = list()
+    result = CompressionMiddleware(lambda e, s: [])(
+        {'HTTP_ACCEPT_ENCODING': 'gzip'}, lambda *args: calls.append(args))
+    assert list(result) == []
+    assert calls == []
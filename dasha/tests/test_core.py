@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 
-from ..core import Extension, Site
+import pytest
+
+from ..core import Extension, ExtensionProxy, Site
 
 
 class MockExt:
@@ -17,6 +19,24 @@ class MockExt:
         return cls.config
 
 
+mock_lazy_ext = ExtensionProxy('dasha.tests.test_core:MockLazyExt')
+
+
+class MockLazyExt:
+
+    n_init_ext = 0
+
+    @classmethod
+    def init_app(cls, server, config):
+        pass
+
+    @classmethod
+    def init_ext(cls, config):
+        cls.n_init_ext += 1
+        ext = mock_lazy_ext.__wrapped__ = dict(config)
+        return ext
+
+
 def test_ext():
     ext = Extension.from_dict(dict(module=MockExt, config={'a': 1}))
 
@@ -79,3 +99,279 @@ def test_site():
     assert site.extensions[0].ext == {'a': 1, 'b': 2}
     assert site.server == 2
     assert site.server_config == dict()
+
+
+def test_ext_lazy():
+    MockLazyExt.n_init_ext = 0
+    mock_lazy_ext.__wrapped__ = None
+
+    ext = Extension.from_dict(dict(
+        module='dasha.tests.test_core:MockLazyExt', config={'a': 1},
+        lazy=True))
+
+    assert not ext.loaded
+    assert ext.module == 'dasha.tests.test_core:MockLazyExt'
+    assert ext.load_info is None
+    assert MockLazyExt.n_init_ext == 0
+
+    assert ext.ext == {'a': 1}
+    assert ext.loaded
+    assert ext.module is MockLazyExt
+    assert ext.load_info['time'] >= 0
+    assert MockLazyExt.n_init_ext == 1
+
+    # the extension is only loaded once
+    ext.init_app(None)
+    assert MockLazyExt.n_init_ext == 1
+
+
+def test_ext_lazy_proxy():
+    MockLazyExt.n_init_ext = 0
+    mock_lazy_ext.__wrapped__ = None
+
+    site = Site.from_dict({
+        'extensions': [
+            {
+                'module': 'dasha.tests.test_core:MockLazyExt',
+                'config': {'a': 1},
+                'lazy': True,
+                },
+            ],
+        })
+    assert MockLazyExt.n_init_ext == 0
+    assert site.report_lazy_extensions() == {
+        'dasha.tests.test_core:MockLazyExt': None}
+
+    # touching the proxy loads the extension
+    assert mock_lazy_ext.get('a') == 1
+    assert MockLazyExt.n_init_ext == 1
+    assert site.extensions[0].loaded
+    assert site.report_lazy_extensions()[
+        'dasha.tests.test_core:MockLazyExt'] is not None
+
+
+class MockForkExt:
+
+    n_post_fork = 0
+
+    @classmethod
+    def init_app(cls, server, config):
+        pass
+
+    @classmethod
+    def init_ext(cls, config):
+        return cls
+
+    @classmethod
+    def post_fork(cls, server, config):
+        cls.n_post_fork += 1
+
+
+def test_site_post_fork():
+    site = Site.from_dict({
+        'extensions': [
+            {
+                'module': MockForkExt,
+                },
+            {
+                'module': MockExt,
+                },
+            ],
+        'server': 1,
+        })
+    hook_calls = list()
+
+    @site.register_post_fork
+    def hook():
+        hook_calls.append(1)
+
+    site.post_fork()
+    assert MockForkExt.n_post_fork == 1
+    assert hook_calls == [1]
+
+
+class MockFailingForkExt(MockForkExt):
+
+    @classmethod
+    def post_fork(cls, server, config):
+        raise RuntimeError("post fork failed")
+
+
+def test_site_post_fork_error():
+    MockForkExt.n_post_fork = 0
+    site = Site.from_dict({
+        'extensions': [
+            {
+                'module': MockFailingForkExt,
+                },
+            {
+                'module': MockForkExt,
+                },
+            ],
+        'server': 1,
+        })
+    hook_calls = list()
+
+    @site.register_post_fork
+    def failing_hook():
+        raise RuntimeError("hook failed")
+
+    @site.register_post_fork
+    def hook():
+        hook_calls.append(1)
+
+    # the failures are logged and the rest still run.
+    site.post_fork()
+    assert MockForkExt.n_post_fork == 1
+    assert hook_calls == [1]
+
+
+def _make_mock_dep_ext(name, requires=None, fail=False):
+
+    def init_app(server, config):
+        if fail:
+            raise RuntimeError(f"{name} failed")
+        config['calls'].append(name)
+
+    return type(name, (), {
+        'requires': requires or list(),
+        'init_ext': staticmethod(lambda config: config),
+        'init_app': staticmethod(init_app),
+        })
+
+
+def test_site_init_app_requires():
+    for init_max_workers in (1, 4):
+        calls = list()
+        exts = [
+            _make_mock_dep_ext('MockDepC', requires=['MockDepB', 'unknown']),
+            _make_mock_dep_ext('MockDepB', requires=['MockDepA']),
+            _make_mock_dep_ext('MockDepA'),
+            ]
+        site = Site.from_dict({
+            'extensions': [
+                {'module': e, 'config': {'calls': calls}} for e in exts],
+            'init_max_workers': init_max_workers,
+            })
+        site.init_app()
+        assert calls == ['MockDepA', 'MockDepB', 'MockDepC']
+        assert all(ext.init_time is not None for ext in site.extensions)
+
+
+def test_site_init_app_requires_errors():
+    site = Site.from_dict({
+        'extensions': [
+            {'module': _make_mock_dep_ext('MockDepA', requires=['MockDepB'])},
+            {'module': _make_mock_dep_ext('MockDepB', requires=['MockDepA'])},
+            ],
+        })
+    with pytest.raises(ValueError, match='circular'):
+        site.init_app()
+
+    calls = list()
+    site = Site.from_dict({
+        'extensions': [
+            {'module': _make_mock_dep_ext('MockDepA', fail=True)},
+            {
+                'module': _make_mock_dep_ext(
+                    'MockDepB', requires=['MockDepA']),
+                'config': {'calls': calls},
+                },
+            ],
+        'init_max_workers': 2,
+        })
+    with pytest.raises(RuntimeError, match='MockDepA failed'):
+        site.init_app()
+    assert calls == list()
+
+
+class MockMountExt:
+
+    @classmethod
+    def init_app(cls, server, config):
+        pass
+
+    @classmethod
+    def init_ext(cls, config):
+        return dict(config)
+
+    @classmethod
+    def mount_config(cls, config, prefix):
+        return dict(config, prefix=prefix)
+
+
+def test_site_from_multi():
+    MockExt.config.clear()
+
+    def make_site_dict(name):
+        return {
+            'extensions': [
+                {'module': MockExt, 'config': {'db': {'x': 1, name: 2}}},
+                {'module': MockMountExt, 'config': {'name': name}},
+                ],
+            'server_config': {name: 3},
+            }
+
+    site = Site.from_multi({
+        '/a': make_site_dict('a'),
+        '/b': make_site_dict('b'),
+        })
+    assert site.server_config == {'a': 3, 'b': 3}
+    assert len(site.extensions) == 3
+    assert site.extensions[0].config == {'db': {'x': 1, 'a': 2, 'b': 2}}
+    assert [ext.ext for ext in site.extensions[1:]] == [
+        {'name': 'a', 'prefix': '/a'},
+        {'name': 'b', 'prefix': '/b'},
+        ]
+
+    site_c = make_site_dict('c')
+    site_c['extensions'][0]['config']['db']['x'] = 0
+    with pytest.raises(ValueError, match='conflicting'):
+        Site.from_multi({'/a': make_site_dict('a'), '/c': site_c})
+
+
+def test_is_multi_instance_ext(monkeypatch):
+    from .. import core
+
+    def getobj(arg):
+        raise AssertionError(f"{arg} is imported")
+
+    # the modules are not imported to tell this.
+    monkeypatch.setattr(core, 'getobj', getobj)
+    assert core._is_multi_instance_ext('dasha.web.extensions.dasha')
+    assert not core._is_multi_instance_ext('dasha.web.extensions.celery')
+    assert core._is_multi_instance_ext(
+        'dasha.tests.test_core:MockMountExt')
+    assert not core._is_multi_instance_ext('dasha.tests.test_core:MockExt')
+    assert core._is_multi_instance_ext(MockMountExt)
+
+
+def test_site_init_app_lazy_report(monkeypatch):
+    from .. import core
+
+    messages = list()
+
+    class Logger(object):
+        def info(self, msg):
+            messages.append(msg)
+
+        def debug(self, msg):
+            pass
+
+    monkeypatch.setattr(core, 'get_logger', Logger)
+    MockLazyExt.n_init_ext = 0
+    site = Site.from_dict({
+        'extensions': [
+            {
+                'module': 'dasha.tests.test_core:MockLazyExt',
+                'config': {'a': 1},
+                'lazy': True,
+                },
+            ],
+        })
+    site.init_app()
+    assert MockLazyExt.n_init_ext == 1
+    report = messages[-1]
+    assert report.startswith('lazy extensions:')
+    assert 'dasha.tests.test_core:MockLazyExt: ' in report
+    assert 'not loaded' not in report
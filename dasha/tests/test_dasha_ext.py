@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+
+import flask
+from dash import html
+from dash_component_template import ComponentTemplate
+from plotly.io.json import to_json_plotly
+
+from ..web.extensions import dasha as dasha_ext
+from ..web.extensions.dasha import _CachedJSONView
+from ..web import snapshot
+from ..web.templates import compactid
+from ..web.snapshot import LayoutSnapshot
+
+
+def test_cached_json_view():
+    server = flask.Flask(__name__)
+    calls = list()
+    version = [0]
+
+    def get_json():
+        calls.append(version[0])
+        return '{"a": %d}' % version[0]
+
+    server.add_url_rule(
+        '/data', endpoint='data', view_func=_CachedJSONView(
+            get_json, get_version=lambda: version[0]))
+    client = server.test_client()
+
+    r = client.get('/data')
+    assert r.status_code == 200
+    assert r.json == {'a': 0}
+    assert r.headers['Cache-Control'] == 'no-cache'
+    etag = r.headers['ETag']
+    assert not etag.startswith('W/')
+
+    r = client.get('/data', headers={'If-None-Match': etag})
+    assert r.status_code == 304
+    assert r.data == b''
+    # weak comparison, as the compressed responses have weak ETag.
+    r = client.get('/data', headers={'If-None-Match': f'W/{etag}'})
+    assert r.status_code == 304
+    assert calls == [0]
+
+    version[0] = 1
+    r = client.get('/data', headers={'If-None-Match': etag})
+    assert r.status_code == 200
+    assert r.json == {'a': 1}
+    assert r.headers['ETag'] != etag
+    assert calls == [0, 1]
+
+
+class _SiteTemplate(ComponentTemplate):
+
+    class Meta:
+        component_cls = html.Div
+
+    def setup_layout(self, app):
+        self.child(html.Div, id='content', children='hello')
+        super().setup_layout(app)
+
+
+def _init_dasha(server, config):
+    ext = dasha_ext.init_ext(config)
+    dasha_ext.init_app(server, config)
+    return ext
+
+
+def test_multi_site_dash_app():
+    config = {'template': _SiteTemplate, 'ASSETS_BUNDLE': False}
+    # a DashA of another server is not used to resolve the apps.
+    _init_dasha(flask.Flask(__name__), dasha_ext.mount_config(config, '/a'))
+
+    server = flask.Flask(__name__)
+    exts = [
+        _init_dasha(server, dasha_ext.mount_config(
+            dict(config, MINIFY_LAYOUT=minify), prefix))
+        for prefix, minify in [('/a', True), ('/b', False)]]
+    assert dasha_ext.get_dasha_instances(server) == exts
+    assert dasha_ext._pending_instances == []
+    with server.test_request_context('/b/page'):
+        assert dasha_ext.get_dash_app() is exts[1].dash_app
+        assert dasha_ext.resolve_url('/page') == '/b/page'
+        assert not dasha_ext.get_dasha_config()['MINIFY_LAYOUT']
+    with server.test_request_context('/a/'):
+        assert dasha_ext.get_dash_app() is exts[0].dash_app
+        assert dasha_ext.get_dasha_config()['MINIFY_LAYOUT']
+
+
+def test_compact_ids_per_app():
+    config = {'template': _SiteTemplate, 'ASSETS_BUNDLE': False}
+    server = flask.Flask(__name__)
+    exts = [
+        _init_dasha(server, dasha_ext.mount_config(
+            dict(config, COMPACT_IDS=compact), prefix))
+        for prefix, compact in [('/a', True), ('/b', False)]]
+    ids = [ext.dash_app.layout.id for ext in exts]
+    assert compactid.get_readable_id(ids[0]).startswith('_sitetemplate')
+    assert ids[0] != compactid.get_readable_id(ids[0])
+    assert ids[1].startswith('_sitetemplate')
+    # the templates outside of the apps keep the readable ids.
+    assert _SiteTemplate().id.startswith('_sitetemplate')
+    with server.test_request_context('/a/'):
+        assert compactid.compact_ids_enabled()
+    with server.test_request_context('/b/'):
+        assert not compactid.compact_ids_enabled()
+
+
+def test_layout_snapshot(tmp_path, monkeypatch):
+    config = {
+        'template': _SiteTemplate, 'ASSETS_BUNDLE': False,
+        'LAYOUT_SNAPSHOT_DIR': tmp_path.as_posix()}
+    # miss
+    ext = _init_dasha(flask.Flask(__name__), config)
+    assert len(list(tmp_path.glob('dasha_snapshot_*.json'))) == 1
+    layout_json = ext.get_layout_json()
+
+    # hit, for which the snapshot is not saved again.
+    def save(*args, **kwargs):
+        raise AssertionError("snapshot saved on hit")
+
+    monkeypatch.setattr(LayoutSnapshot, 'save', save)
+    n_loads = list()
+
+    def load_layout(layout_json):
+        n_loads.append(1)
+        return snapshot.load_layout(layout_json)
+
+    monkeypatch.setattr(dasha_ext, 'load_layout', load_layout)
+    server = flask.Flask(__name__)
+    ext = _init_dasha(server, config)
+    # the components are not re-created at startup.
+    assert n_loads == []
+    assert ext.get_layout_json() == layout_json
+    assert server.test_client().get('/_dash-layout').data.decode() == \
+        layout_json
+    # the app layout is re-created from the snapshot once when read.
+    layout = ext.dash_app._layout_value()
+    assert ext.dash_app._layout_value() is layout
+    assert n_loads == [1]
+    assert isinstance(layout, html.Div)
+    assert layout['content'].children == 'hello'
+    assert to_json_plotly(layout) == layout_json
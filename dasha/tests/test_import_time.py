@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import subprocess
+
+import pytest
+
+
+# the budget in seconds of the cumulative import time of the example sites
+# on top of dash, which can be overridden for slow machines.
+IMPORT_TIME_BUDGET = float(os.environ.get('DASHA_IMPORT_TIME_BUDGET', 2.))
+
+
+def _run_python(code, *args):
+    return subprocess.run(
+        [sys.executable, *args, '-c', code],
+        capture_output=True, text=True, check=True)
+
+
+def _get_n_imported(module, baseline):
+    """Return the number of modules loaded by `module` in addition to
+    those loaded by `baseline`."""
+    result = _run_python(
+        f'import sys, {baseline}; n = len(sys.modules); '
+        f'import {module}; print(len(sys.modules) - n)')
+    return int(result.stdout)
+
+
+def _get_import_time(module, baseline, n_runs=3):
+    """Return the cumulative ``-X importtime`` of `module` in seconds, in
+    addition to that of `baseline`.
+
+    The min of `n_runs` runs is returned to reduce the noise.
+    """
+    result = list()
+    for _ in range(n_runs):
+        stderr = _run_python(
+            f'import {baseline}; import {module}', '-X', 'importtime').stderr
+        # the lines are: import time: self [us] | cumulative | package
+        for line in stderr.splitlines():
+            if not line.startswith('import time:'):
+                continue
+            _, cumulative, name = line.split('|')
+            if name.strip() == module:
+                result.append(int(cumulative) / 1e6)
+                break
+        else:
+            raise ValueError(f"no import time found for {module}")
+    return min(result)
+
+
+def _get_imported(module, names):
+    """Return the modules among `names` that are loaded by `module`."""
+    result = _run_python(
+        f'import sys, {module}; '
+        f'print(" ".join(n for n in {names!r} if n in sys.modules))')
+    return result.stdout.split()
+
+
+@pytest.mark.parametrize('module', [
+    'dasha.web',
+    'dasha.web.extensions.db',
+    ])
+def test_import_count(module):
+    # the import count is compared to that of dash so it does not depend
+    # on the speed of the machine.
+    n_module = _get_n_imported(module, 'flask')
+    n_dash = _get_n_imported('dash', 'flask')
+    assert n_module < n_dash / 2
+
+
+@pytest.mark.parametrize('module', [
+    'dasha.examples.dasha_intro',
+    ])
+def test_import_time_budget(module):
+    pytest.importorskip('dash_component_template')
+    assert _get_import_time(module, 'dash') < IMPORT_TIME_BUDGET
+
+
+@pytest.mark.parametrize('module,names', [
+    ('dasha', ['astropy']),
+    ('dasha.web.extensions.db', [
+        'flask_sqlalchemy', 'sqlalchemy', 'tollan.utils.db']),
+    ('dasha.web.extensions.celery', ['celery_once', 'flask_celeryext']),
+    ('dasha.web.extensions.slurm', ['fabric']),
+    ('dasha.web.templates.aladinlite', ['dash_defer_js_import']),
+    ('dasha.web.templates.utils', ['plotly.subplots']),
+    ])
+def test_import_lazy(module, names):
+    pytest.importorskip('dash_component_template')
+    assert _get_imported(module, names) == list()
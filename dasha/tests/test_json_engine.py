@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+
+import flask
+import numpy as np
+import pytest
+
+from ..web.json_engine import init_json_engine, resolve_json_engine
+
+
+def test_resolve_json_engine():
+    assert resolve_json_engine('json') == 'json'
+    assert resolve_json_engine('auto') in ('json', 'orjson')
+    with pytest.raises(ValueError, match='invalid JSON engine'):
+        resolve_json_engine('ujson')
+
+
+def test_orjson_engine():
+    pytest.importorskip('orjson')
+    import plotly.io.json
+    default_engine = plotly.io.json.config.default_engine
+    server = flask.Flask(__name__)
+
+    @server.route('/echo', methods=['POST'])
+    def echo():
+        d = flask.request.get_json()
+        d['array'] = np.arange(3)
+        return flask.jsonify(d)
+
+    try:
+        assert init_json_engine(server, 'orjson') == 'orjson'
+        assert plotly.io.json.config.default_engine == 'orjson'
+    finally:
+        plotly.io.json.config.default_engine = default_engine
+    r = server.test_client().post('/echo', json={'b': 1, 'a': [1.5]})
+    assert r.data.strip() == b'{"a":[1.5],"array":[0,1,2],"b":1}'
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+
+import signal
+import threading
+
+from werkzeug.test import Client
+from werkzeug.wrappers import Response
+
+from ..web.lifecycle import Lifecycle
+
+
+def test_lifecycle_drain():
+    started = threading.Event()
+    release = threading.Event()
+
+    def app(environ, start_response):
+        started.set()
+        release.wait(5)
+        return Response('done')(environ, start_response)
+
+    lifecycle = Lifecycle(drain_timeout=5)
+    client = Client(lifecycle.wrap(app))
+    assert client.get('/_dasha-health').status_code == 200
+
+    responses = list()
+    thread = threading.Thread(
+        target=lambda: responses.append(client.get('/', buffered=True)))
+    thread.start()
+    started.wait(5)
+    assert lifecycle.n_inflight == 1
+    # the in-flight request is not finished in time.
+    assert not lifecycle.drain(timeout=0.1)
+    assert lifecycle.state == 'draining'
+    assert client.get('/').status_code == 503
+    assert client.get('/_dasha-health').status_code == 503
+
+    release.set()
+    assert lifecycle.drain(timeout=5)
+    thread.join()
+    assert responses[0].get_data() == b'done'
+    assert lifecycle.n_inflight == 0
+
+
+def test_gunicorn_hooks(monkeypatch):
+    from ..web import serve
+
+    lifecycle = Lifecycle(drain_timeout=5)
+    monkeypatch.setattr(serve, 'lifecycle', lifecycle)
+    handlers = dict()
+    monkeypatch.setattr(
+        serve.signal, 'signal',
+        lambda signum, handler: handlers.__setitem__(signum, handler))
+
+    class Worker(object):
+        n_exit = 0
+
+        def handle_exit(self, signum, frame):
+            self.n_exit += 1
+
+    worker = Worker()
+    serve._gunicorn_post_worker_init(worker)
+    assert lifecycle.accepting
+    handlers[signal.SIGTERM](signal.SIGTERM, None)
+    assert worker.n_exit == 1
+    assert lifecycle.state == 'draining'
+    client = Client(lifecycle.wrap(Response('done')))
+    assert client.get('/_dasha-health').status_code == 503
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+
+from dash import html, dcc
+import dash_bootstrap_components as dbc
+
+from ..web.templates.minify import (
+    get_default_props, get_dependency_props, minify_layout)
+
+
+def test_get_default_props():
+    assert get_default_props(html.Div)['n_clicks'] == 0
+    assert get_default_props(dcc.Checklist)['persisted_props'] == ['value']
+    assert get_default_props(dcc.Checklist)['persistence_type'] == 'local'
+
+
+def test_get_dependency_props():
+    callback_list = [
+        {
+            'output': '..a.children...{"index":["MATCH"],"type":"b"}.value..',
+            'inputs': [{'id': 'c', 'property': 'n_clicks'}],
+            'state': [],
+            },
+        ]
+    assert get_dependency_props(callback_list) == {
+        ('a', 'children'), ('{', 'value'), ('c', 'n_clicks')}
+
+
+def test_minify_layout():
+    button = html.Button('b', id='button', n_clicks=0)
+    layout = html.Div([
+        html.Div(html.Div(
+            html.Div([button, html.Div(n_clicks=0)]),
+            id='wrapper')),
+        html.Div(html.P('p'), className='x'),
+        html.Div(html.P('p'), id='target'),
+        dbc.Tooltip('t', target='target'),
+        html.Div('text'),
+        ], id='root')
+    callback_list = [
+        {'output': 'root.children', 'inputs': [], 'state': []}]
+    result, stats = minify_layout(layout, callback_list)
+    # the input layout is not modified
+    assert button.n_clicks == 0
+    assert len(layout.children[0].children.children.children) == 2
+
+    assert result.id == 'root'
+    c0, c1, c2, c3, c4 = result.children
+    # nested wrappers collapsed, button kept, empty div props removed
+    assert isinstance(c0, html.Div) and not hasattr(c0, 'id')
+    assert c0.children[0] is not button
+    assert c0.children[0].id == 'button'
+    assert not hasattr(c0.children[0], 'n_clicks')
+    assert not hasattr(c0.children[1], 'n_clicks')
+    # class name and referenced ids are kept
+    assert c1.className == 'x'
+    assert c2.id == 'target'
+    assert c4.children == 'text'
+    assert stats['n_nodes_before'] == 12
+    assert stats['n_nodes_after'] == 10
+    assert stats['n_props_removed'] == 2
+
+    # props used in callbacks are kept
+    result, _ = minify_layout(layout, [{
+        'output': 'button.n_clicks', 'inputs': [], 'state': []}])
+    assert result.children[0].children[0].n_clicks == 0
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+import json
+
+from dash import Dash, html, dcc
+import dash_bootstrap_components as dbc
+from plotly.io.json import to_json_plotly
+
+from ..web.prerender import render_html, init_prerender
+
+
+def _make_layout():
+    return dbc.Container([
+        dcc.Location(id='location'),
+        dbc.Row(dbc.Col(
+            dcc.Link('home', href='/', className='navbar-brand'),
+            width='auto'), align='center'),
+        dbc.Nav(
+            dbc.NavLink('page', href='/page', active=True),
+            vertical=True, pills=True),
+        html.Div(id='content', style={'fontSize': 12, 'flexGrow': 1}),
+        ], fluid=True)
+
+
+def test_render_html():
+    s = render_html(_make_layout())
+    assert s == (
+        '<div class="container-fluid">'
+        '<div class="row align-items-center"><div class="col-auto">'
+        '<a class="navbar-brand" href="/">home</a></div></div>'
+        '<div class="nav flex-column nav-pills">'
+        '<a class="nav-link active" href="/page">page</a></div>'
+        '<div id="content" style="font-size: 12px; flex-grow: 1"></div>'
+        '</div>')
+    assert render_html(to_json_plotly(_make_layout())) == s
+    s = render_html(
+        _make_layout(),
+        fills={'content': [html.P('a < b'), html.Br()]})
+    assert '<div id="content" style="font-size: 12px; flex-grow: 1">' \
+        '<p>a &lt; b</p><br></div>' in s
+
+
+def test_init_prerender():
+    app = Dash(__name__)
+    app.layout = _make_layout()
+    init_prerender(
+        app, lambda: to_json_plotly(app.layout),
+        get_fills=lambda path: {'content': html.P(path)})
+    client = app.server.test_client()
+    r = client.get('/page')
+    s = r.get_data(as_text=True)
+    assert '<div id="react-entry-point"><div class="container-fluid">' in s
+    assert '<p>/page</p>' in s
+    assert 'Loading...' not in s
+    assert 'rel="preload" href="/_dash-layout"' in s
+    # the layout is served as is.
+    r = client.get('/_dash-layout')
+    assert r.json == json.loads(to_json_plotly(app.layout))
+
+
+def test_init_prerender_cache():
+    app = Dash(__name__)
+    app.layout = _make_layout()
+    calls = list()
+
+    def get_fills(path):
+        calls.append(path)
+        return {'content': html.P(path)}
+
+    init_prerender(
+        app, lambda: to_json_plotly(app.layout), get_fills=get_fills,
+        get_page=lambda path: path if path == '/page' else None)
+    client = app.server.test_client()
+    for _ in range(2):
+        assert '<p>/page</p>' in client.get('/page').get_data(as_text=True)
+    assert calls == ['/page']
+    # the other paths get the layout only.
+    s = client.get('/other').get_data(as_text=True)
+    assert '<div class="container-fluid">' in s
+    assert '<p>/other</p>' not in s
+    assert calls == ['/page']
+
+    app = Dash(__name__)
+    app.layout = _make_layout()
+    calls.clear()
+    init_prerender(
+        app, lambda: to_json_plotly(app.layout), get_fills=get_fills,
+        cache=False)
+    client = app.server.test_client()
+    for _ in range(2):
+        client.get('/page')
+    assert calls == ['/page', '/page']
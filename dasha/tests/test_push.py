@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+
+import json
+import itertools
+from unittest.mock import patch
+
+from dash import Dash, html
+
+from ..web.push import Channel, PushBroker
+
+
+def _parse(message):
+    return json.loads(message.split('data: ', 1)[1])
+
+
+def test_channel():
+    counter = itertools.count()
+    channel = Channel('test', lambda: next(counter), interval=3600)
+    # the first update is made by the thread started by the subscriber.
+    queues = [channel.subscribe() for _ in range(3)]
+    assert channel.n_subscribers == 3
+    for q in queues:
+        assert _parse(q.get(timeout=5))['value'] == 0
+    channel.update()
+    for q in queues:
+        assert _parse(q.get_nowait())['value'] == 1
+    # the value is computed once per update for all subscribers
+    assert next(counter) == 2
+    for q in queues:
+        channel.unsubscribe(q)
+    assert channel.n_subscribers == 0
+
+
+def test_channel_maxsize():
+    channel = Channel('test', lambda: 'a', interval=3600, maxsize=2)
+    q = channel.subscribe()
+    for _ in range(5):
+        channel.update()
+    assert q.qsize() == 2
+    seqs = [_parse(q.get_nowait())['seq'] for _ in range(2)]
+    assert seqs[1] == seqs[0] + 1 == channel._seq - 1
+    channel.unsubscribe(q)
+
+
+def test_push_broker():
+    broker = PushBroker()
+    app = Dash(__name__)
+    app.layout = html.Div()
+    broker.init_app(app)
+    broker.init_app(app)
+    assert broker.get_url(app, 'a') == '/_dasha-push/a'
+    channel = broker.add_channel('a', lambda: {'x': 1}, interval=3600)
+    assert broker.add_channel('a', lambda: {'x': 2}) is channel
+    client = app.server.test_client()
+    assert client.get('/_dasha-push/b').status_code == 404
+    r = client.get('/_dasha-push/a')
+    assert r.mimetype == 'text/event-stream'
+    stream = iter(r.response)
+    assert next(stream) == b'retry: 3000\n\n'
+    assert _parse(next(stream).decode())['value'] == {'x': 2}
+    assert channel.n_subscribers == 1
+    r.close()
+    assert channel.n_subscribers == 0
+
+
+def test_check_push_streams():
+    from ..web.serve import ServeConfig, _check_push_streams
+    broker = PushBroker()
+    config = ServeConfig(backend='waitress', threads=4)
+    with patch('dasha.web.push.push_broker', broker):
+        assert not _check_push_streams(config)
+        broker.init_app(Dash(__name__))
+        assert broker.enabled
+        assert _check_push_streams(config)
+        assert not _check_push_streams(
+            ServeConfig(backend='gunicorn', worker_class='gevent'))
+        assert not _check_push_streams(ServeConfig(backend='werkzeug'))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+
+import dash
+import pytest
+from dash import html, dcc, Input, Output
+from dash_component_template import ComponentTemplate, NullComponent
+
+from ..web.templates.multipage import PageTree
+
+
+class MockPage(ComponentTemplate):
+
+    class Meta:
+        component_cls = html.Div
+
+    def setup_layout(self, app):
+        button = self.child(html.Button)
+        output = self.child(html.Div)
+
+        @app.callback(
+            Output(output.id, 'children'),
+            Input(button.id, 'n_clicks'))
+        def update(n_clicks):
+            return n_clicks
+
+        super().setup_layout(app)
+
+
+class MockFixedIdPage(ComponentTemplate):
+
+    class Meta:
+        component_cls = html.Div
+
+    def setup_layout(self, app):
+        button = self.child(html.Button, id='fixed-button')
+        output = self.child(html.Div, id='fixed-output')
+
+        @app.callback(
+            Output(output.id, 'children'),
+            Input(button.id, 'n_clicks'))
+        def update(n_clicks):
+            return n_clicks
+
+        super().setup_layout(app)
+
+
+def _make_page_tree(app, template):
+    root = NullComponent(id='root')
+    location = root.child(dcc.Location)
+    content = root.child(html.Div)
+    page_tree = PageTree({
+        'title_text': 'test',
+        'pages': [{'template': template}],
+        })
+    page_tree.setup_page_layouts(app, location, content)
+    return page_tree
+
+
+def test_page_tree_rebuild_page():
+    app = dash.Dash(__name__)
+    page_tree = _make_page_tree(app, MockPage)
+    route_name = page_tree.route_names[0]
+    node = page_tree._page_index[route_name]
+    old_page = node.page
+    old_callback_ids = set(node.callbacks.callback_map)
+    n_callbacks = len(app.callback_map)
+    assert len(old_callback_ids) == 1
+
+    page_tree.rebuild_page(route_name)
+    assert node.page is not old_page
+    assert len(node.callbacks.callback_map) == 1
+    assert old_callback_ids.isdisjoint(node.callbacks.callback_map)
+    assert len(app.callback_map) == n_callbacks
+    assert all(
+        c['output'] not in old_callback_ids for c in app._callback_list)
+
+
+def test_page_tree_rebuild_page_same_ids(monkeypatch):
+    app = dash.Dash(__name__)
+    page_tree = _make_page_tree(app, MockFixedIdPage)
+    route_name = page_tree.route_names[0]
+    node = page_tree._page_index[route_name]
+    old_callback = app.callback_map['fixed-output.children']['callback']
+    n_callbacks = len(app._callback_list)
+
+    for _ in range(2):
+        page_tree.rebuild_page(route_name)
+        assert list(node.callbacks.callback_map) == ['fixed-output.children']
+        assert len(app._callback_list) == n_callbacks
+        callback = app.callback_map['fixed-output.children']['callback']
+        assert callback is not old_callback
+        assert [
+            c for c in app._callback_list
+            if c['output'] == 'fixed-output.children'
+            ] == node.callbacks.callback_list
+        old_callback = callback
+
+    # the old callbacks are restored if the setup fails.
+    def setup_layout(self, app):
+        raise RuntimeError('failed')
+
+    monkeypatch.setattr(MockFixedIdPage, 'setup_layout', setup_layout)
+    with pytest.raises(RuntimeError, match='failed'):
+        page_tree.rebuild_page(route_name)
+    assert app.callback_map['fixed-output.children']['callback'] is \
+        old_callback
+    assert len(app._callback_list) == n_callbacks
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+
+import threading
+
+import flask
+import pytest
+from werkzeug.serving import make_server
+
+from ..web import serve
+from ..web.serve import ServeConfig, self_check
+
+
+def test_serve_config_from_env(monkeypatch):
+    for name in [
+            'DASHA_SERVE_BACKEND', 'FLASK_RUN_HOST', 'FLASK_RUN_PORT',
+            'DASHA_SERVE_WORKERS', 'DASHA_SERVE_THREADS',
+            'DASHA_SERVE_WORKER_CLASS', 'DASHA_SERVE_KEEPALIVE',
+            'DASHA_SERVE_BACKLOG', 'DASHA_SERVE_SELF_CHECK',
+            'DASHA_SERVE_SELF_CHECK_PATH']:
+        monkeypatch.delenv(name, raising=False)
+    config = ServeConfig.from_env()
+    assert config == ServeConfig()
+
+    monkeypatch.setenv('DASHA_SERVE_BACKEND', 'werkzeug')
+    monkeypatch.setenv('FLASK_RUN_HOST', '0.0.0.0')
+    monkeypatch.setenv('FLASK_RUN_PORT', '9000')
+    monkeypatch.setenv('DASHA_SERVE_THREADS', '16')
+    # empty values use the defaults.
+    monkeypatch.setenv('DASHA_SERVE_KEEPALIVE', '')
+    config = ServeConfig.from_env()
+    assert config.backend == 'werkzeug'
+    assert config.port == 9000
+    assert config.threads == 16
+    assert config.keepalive == ServeConfig().keepalive
+    assert config.url == 'http://127.0.0.1:9000'
+
+    monkeypatch.setenv('DASHA_SERVE_WORKERS', 'many')
+    with pytest.raises(ValueError, match='DASHA_SERVE_WORKERS'):
+        ServeConfig.from_env()
+    monkeypatch.setenv('DASHA_SERVE_WORKERS', '2')
+    monkeypatch.setenv('DASHA_SERVE_BACKEND', 'uwsgi')
+    with pytest.raises(ValueError, match='invalid serve backend'):
+        ServeConfig.from_env()
+
+
+@pytest.mark.parametrize('installed,backend', [
+    ({'gunicorn', 'waitress'}, 'gunicorn'),
+    ({'waitress'}, 'waitress'),
+    (set(), 'werkzeug'),
+    ])
+def test_serve_default_backend(monkeypatch, installed, backend):
+    monkeypatch.setattr(
+        serve.importlib.util, 'find_spec',
+        lambda name: object() if name in installed else None)
+    assert ServeConfig().backend == backend
+
+
+def test_serve_dispatch(monkeypatch):
+    calls = list()
+    for name in ('gunicorn', 'waitress', 'werkzeug'):
+        monkeypatch.setattr(
+            serve, f'_serve_{name}',
+            lambda config, name=name: calls.append((name, config)))
+    config = ServeConfig(backend='waitress')
+    serve.serve(config)
+    assert calls == [('waitress', config)]
+
+
+def test_self_check():
+    server = flask.Flask(__name__)
+
+    @server.route('/')
+    def index():
+        return 'ok'
+
+    @server.route('/error')
+    def error():
+        flask.abort(500)
+
+    httpd = make_server('127.0.0.1', 0, server, threaded=True)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = f'http://127.0.0.1:{httpd.server_port}'
+        stats = self_check(f'{url}/', n_requests=10, concurrency=2)
+        assert stats['n_requests'] == 10
+        assert stats['n_failed'] == 0
+        assert stats['requests_per_second'] > 0
+        with pytest.raises(RuntimeError, match='unable to reach'):
+            self_check(f'{url}/error', n_requests=1, timeout=0.1)
+    finally:
+        httpd.shutdown()
+        thread.join()
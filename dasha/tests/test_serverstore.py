@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+
+import sys
+import time
+
+import pytest
+
+from ..web.serverstore import ServerStore, FileSystemBackend
+
+
+@pytest.mark.parametrize('backend', ['memory', 'filesystem'])
+def test_server_store(tmp_path, backend):
+    kwargs = {'cache_dir': tmp_path} if backend == 'filesystem' else {}
+    store = ServerStore().configure(backend=backend, **kwargs)
+    assert store.get('a', None, default=1) == 1
+    ref = store.set('a', {'x': [1, 2]})
+    assert set(ref.keys()) == {'token', 'version'}
+    assert ref['version'] == 0
+    assert store.get('a', ref) == {'x': [1, 2]}
+    # the stores and the sessions are separated
+    assert store.get('b', ref) is None
+    other = store.set('a', 'other')
+    assert other['token'] != ref['token']
+    ref1 = store.set('a', {'x': 3}, ref)
+    assert ref1 == {'token': ref['token'], 'version': 1}
+    assert store.get('a', ref1) == {'x': 3}
+    assert store.get('a', other) == 'other'
+    store.delete('a', ref1)
+    assert store.get('a', ref1, default=0) == 0
+    with pytest.raises(ValueError):
+        store.configure(backend='redis')
+
+
+def test_server_store_default_backend():
+    store = ServerStore()
+    assert isinstance(store.backend, FileSystemBackend)
+    store.backend.cache_dir.rmdir()
+
+
+class _StaleValue(object):
+    pass
+
+
+def test_filesystem_backend_stale(tmp_path, monkeypatch):
+    backend = FileSystemBackend(cache_dir=tmp_path)
+    backend.set('a', 0, _StaleValue())
+    # the class is gone, e.g., after the module is reloaded.
+    monkeypatch.delattr(sys.modules[__name__], '_StaleValue')
+    assert backend.get('a') is None
+
+
+def test_filesystem_backend_ttl(tmp_path):
+    backend = FileSystemBackend(cache_dir=tmp_path, ttl=0.1)
+    backend.set('a', 0, 'value')
+    assert backend.get('a') == (0, 'value')
+    time.sleep(0.2)
+    assert backend.get('a') is None
+    backend.cleanup_interval = 0
+    backend.set('b', 0, 'value')
+    assert len(list(tmp_path.glob('*.pickle'))) == 1
+
+
+def test_filesystem_backend_cache_dir(tmp_path):
+    backend = FileSystemBackend()
+    assert backend.cache_dir.stat().st_mode & 0o077 == 0
+    backend.cache_dir.rmdir()
+    cache_dir = tmp_path.joinpath('store')
+    FileSystemBackend(cache_dir=cache_dir)
+    assert cache_dir.stat().st_mode & 0o777 == 0o700
+    cache_dir.chmod(0o777)
+    with pytest.raises(ValueError, match='writable by other'):
+        FileSystemBackend(cache_dir=cache_dir)
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+
+from dasha.web.snapshot import LayoutSnapshot, load_layout
+from dash import html, dcc
+from plotly.io.json import to_json_plotly
+
+
+def test_snapshot_key():
+
+    config = {
+        'template': 'dasha.tests.test_templates:MyTemplate',
+        'a': 1,
+        'b': html.Div,
+        }
+    key = LayoutSnapshot.make_key(config)
+    assert key == LayoutSnapshot.make_key(dict(reversed(config.items())))
+    assert key != LayoutSnapshot.make_key(dict(config, a=2))
+
+
+def test_snapshot_save_load(tmp_path):
+
+    snapshot = LayoutSnapshot(tmp_path, key='abc')
+    assert snapshot.load() is None
+    snapshot.save('{"a": 1}', [{'output': 'a.children'}])
+    d = snapshot.load()
+    assert d['layout'] == '{"a": 1}'
+    assert d['callbacks'] == [{'output': 'a.children'}]
+    assert LayoutSnapshot(tmp_path, key='def').load() is None
+
+
+def test_load_layout():
+    layout = html.Div([
+        html.H1('a', id='h'),
+        dcc.Dropdown(
+            id='d', options=[{'label': html.B('x'), 'value': 1}]),
+        ], id='root', **{'data-x': 1})
+    layout_json = to_json_plotly(layout)
+    result = load_layout(layout_json)
+    assert isinstance(result['d'], dcc.Dropdown)
+    assert isinstance(result['d'].options[0]['label'], html.B)
+    assert to_json_plotly(result) == layout_json
@@ -43,3 +43,25 @@ def test_resolve_template():
         })
     assert t.a == 1
     assert isinstance(t, MyTemplate)
+
+
+def test_class_name_order():
+    from dasha.web.templates.utils import (
+        update_class_name, remove_class_name)
+    assert update_class_name('c b', 'a  b', 'd') == 'c b a d'
+    assert remove_class_name('c b a', 'b') == 'c a'
+    assert update_class_name(None, '') == ''
+
+
+def test_layout_hash():
+    from dasha.web.templates.utils import layout_hash
+    from plotly.io.json import to_json_plotly
+
+    def make_layout():
+        return html.Div(
+            [html.P('a', className='x y'), html.P('b')], id='root')
+
+    h = layout_hash(make_layout())
+    assert h == layout_hash(make_layout())
+    assert h == layout_hash(to_json_plotly(make_layout()))
+    assert h != layout_hash(html.Div(id='root'))
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+import base64
+import json
+
+import numpy as np
+import plotly.graph_objects as go
+from dash import Dash, dcc, html, no_update
+from dash.dependencies import Input, Output
+
+from ..web.typed_arrays import encode_arrays, init_typed_arrays
+
+
+def test_encode_arrays():
+    x = np.arange(2000, dtype='int64')
+    y = np.linspace(0, 1, 2000)
+    value = encode_arrays([{'x': x, 'y': y}, np.arange(3), 'a'])
+    assert value[0]['x']['dtype'] == 'i4'
+    assert value[0]['y'] == {
+        'dtype': 'f8', 'shape': '2000',
+        'bdata': base64.b64encode(y.tobytes()).decode()}
+    assert np.array_equal(
+        np.frombuffer(
+            base64.b64decode(value[0]['x']['bdata']), dtype='<i4'), x)
+    # small arrays are kept.
+    assert np.array_equal(value[1], np.arange(3))
+    assert value[2] == 'a'
+    z = encode_arrays(np.ones((3, 400), dtype='float32'))
+    assert z['dtype'] == 'f4'
+    assert z['shape'] == '3, 400'
+    fig = encode_arrays(go.Figure(go.Scattergl(x=x, y=y)))
+    assert 'bdata' in fig['data'][0]['y']
+
+
+def test_init_typed_arrays():
+    app = Dash(__name__)
+    init_typed_arrays(app, min_size=10)
+    app.layout = html.Div([dcc.Input(id='n', value=20), dcc.Store(id='s')])
+
+    @app.callback(Output('s', 'data'), Input('n', 'value'))
+    def update(n):
+        return {'x': np.arange(n, dtype='float64')}
+
+    assert app.config.external_scripts[-1] == '/dasha/typed_arrays.js'
+    client = app.server.test_client()
+    assert client.get('/dasha/typed_arrays.js').status_code == 200
+    r = client.post('/_dash-update-component', json={
+        'output': 's.data',
+        'outputs': {'id': 's', 'property': 'data'},
+        'inputs': [{'id': 'n', 'property': 'value', 'value': 20}],
+        'changedPropIds': ['n.value'],
+        })
+    data = json.loads(r.data)['response']['s']['data']
+    assert data['x']['dtype'] == 'f8'
+    assert data['x']['shape'] == '20'
+
+
+def test_typed_arrays_no_update():
+    assert encode_arrays(no_update) is no_update
+    assert encode_arrays([no_update, 1])[0] is no_update
+
+    app = Dash(__name__)
+    init_typed_arrays(app)
+    app.layout = html.Div([
+        dcc.Input(id='n', value=20), dcc.Store(id='s'), dcc.Store(id='t')])
+
+    @app.callback(
+        Output('s', 'data'), Output('t', 'data'), Input('n', 'value'))
+    def update(n):
+        return no_update, n
+
+    client = app.server.test_client()
+    r = client.post('/_dash-update-component', json={
+        'output': '..s.data...t.data..',
+        'outputs': [
+            {'id': 's', 'property': 'data'},
+            {'id': 't', 'property': 'data'}],
+        'inputs': [{'id': 'n', 'property': 'value', 'value': 20}],
+        'changedPropIds': ['n.value'],
+        })
+    response = json.loads(r.data)['response']
+    assert 's' not in response
+    assert response['t']['data'] == 20
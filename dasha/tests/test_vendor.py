@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+
+from ..web.vendor import download_vendor_assets, vendor_url
+
+
+def test_vendor(tmp_path):
+    cdn = tmp_path.joinpath('cdn')
+    cdn.joinpath('css').mkdir(parents=True)
+    cdn.joinpath('fonts').mkdir()
+    cdn.joinpath('css', 'a.css').write_text(
+        '@font-face { src: url("../fonts/a.woff2?v=1") }\n'
+        '.b { background: url(data:image/png;base64,AAAA) }\n')
+    cdn.joinpath('fonts', 'a.woff2').write_bytes(b'\0')
+    url = cdn.joinpath('css', 'a.css').as_uri()
+    vendor_dir = tmp_path.joinpath('vendor')
+
+    remote = 'https://cdn.example.org/a.css'
+    assert vendor_url(remote, url_base='/', vendor_dir=vendor_dir) == remote
+
+    result = download_vendor_assets([url], vendor_dir=vendor_dir)
+    assert len(result) == 2
+    for filepath in result.values():
+        assert filepath.is_file()
+        assert filepath.relative_to(vendor_dir)
+    font = vendor_dir.joinpath(
+        cdn.joinpath('fonts', 'a.woff2').as_posix().lstrip('/'))
+    assert font.read_bytes() == b'\0'
+
+    local = vendor_url(
+        url.replace('file://', 'https://'), url_base='/site/',
+        vendor_dir=vendor_dir)
+    assert local.startswith('/site/_dasha-vendor/')
+    assert '/cdn/css/a.css?m=' in local
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+
+import flask
+from werkzeug.test import Client
+
+from ..core import Site
+from ..web.warmup import (
+    WarmupRecorder, load_warmup_requests, filter_warmup_requests)
+
+
+def _make_server(calls):
+    server = flask.Flask(__name__)
+
+    @server.route('/page')
+    def page():
+        calls.append('page')
+        return 'page'
+
+    @server.route('/_dash-update-component', methods=['POST'])
+    def update():
+        calls.append(flask.request.get_json())
+        return flask.jsonify({})
+
+    return server
+
+
+def test_warmup(tmp_path):
+    calls = list()
+    server = _make_server(calls)
+    filepath = tmp_path.joinpath('warmup.json')
+    recorder = WarmupRecorder(server.wsgi_app, filepath)
+    server.wsgi_app = recorder
+    client = Client(server)
+    for _ in range(2):
+        client.get('/page')
+    client.post('/_dash-update-component', json={'inputs': [1]})
+    client.get('/_dash-layout')
+    assert calls == ['page', 'page', {'inputs': [1]}]
+    recorder.save()
+
+    requests = load_warmup_requests(filepath)
+    assert requests == [
+        {'method': 'GET', 'path': '/page', 'count': 2},
+        {
+            'method': 'POST', 'path': '/_dash-update-component',
+            'count': 1, 'json': {'inputs': [1]}},
+        ]
+
+    calls.clear()
+    site = Site.from_dict({'server': lambda: _make_server(calls)})
+    site.init_app()
+    warmup_calls = list()
+
+    def fail():
+        raise RuntimeError('failed')
+
+    site.register_warmup(fail)
+    site.register_warmup(lambda: warmup_calls.append(1))
+    report = site.warmup(requests)
+    assert calls == ['page', {'inputs': [1]}]
+    assert warmup_calls == [1]
+    assert report['n_requests'] == 2
+    assert report['n_failed'] == 0
+    assert report['n_hooks_failed'] == 1
+
+
+def test_filter_warmup_requests():
+    requests = [
+        {'method': 'GET', 'path': '/page'},
+        {
+            'method': 'POST', 'path': '/_dash-update-component',
+            'json': {'output': 'graph.figure'}},
+        {
+            'method': 'POST', 'path': '/_dash-update-component',
+            'json': {'output': '..job.children...job.disabled..'}},
+        {'method': 'POST', 'path': '/_dash-update-component'},
+        ]
+    assert filter_warmup_requests(requests) == requests[:1]
+    assert filter_warmup_requests(requests, ['graph']) == requests[:2]
+    assert filter_warmup_requests(
+        requests, ['*.children']) == [requests[0], requests[2]]
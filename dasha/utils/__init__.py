@@ -2,3 +2,28 @@
 
 # This sub-module is destined for common non-package specific utility
 # functions.
+
+import sys
+
+
+__all__ = ['get_rss', ]
+
+
+def get_rss():
+    """Return the resident set size of the current process in bytes."""
+    try:
+        with open('/proc/self/statm', 'r') as fo:
+            n_pages = int(fo.read().split()[1])
+        import resource
+        return n_pages * resource.getpagesize()
+    except (OSError, ImportError, IndexError, ValueError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    # ru_maxrss is the peak RSS, in bytes on macOS and in KiB elsewhere.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return rss
+    return rss * 1024
@@ -0,0 +1,197 @@
+#! /usr/bin/env python
+
+"""A light-weight hierarchical profiler for the startup of DashA sites.
+
+The profiled sections are declared in code with :func:`profile_section`,
+which is a no-op unless a `StartupProfiler` is active in the current
+context.
+"""
+
+import sys
+import json
+import time
+import contextvars
+from contextlib import contextmanager, ExitStack
+
+
+__all__ = ['ProfileNode', 'StartupProfiler', 'profile_section']
+
+
+_current_node = contextvars.ContextVar('dasha_profile_node', default=None)
+
+
+class ProfileNode(object):
+    """A node in the profile tree.
+
+    Parameters
+    ----------
+    name : str
+        The name of the profiled section.
+    parent : `ProfileNode`, optional
+        The parent node.
+    """
+
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.wall = 0.
+        self.cpu = 0.
+        self.children = list()
+        if parent is not None:
+            parent.children.append(self)
+
+    def __repr__(self):
+        return (
+            f'{self.__class__.__name__}({self.name}, '
+            f'wall={self.wall:.3f}s, cpu={self.cpu:.3f}s)')
+
+    def to_dict(self, min_time=0.):
+        """Return the tree as nested dict.
+
+        Children with wall time less than `min_time` are dropped.
+        """
+        return {
+            'name': self.name,
+            'wall': self.wall,
+            'cpu': self.cpu,
+            'children': [
+                c.to_dict(min_time=min_time) for c in self.children
+                if c.wall >= min_time
+                ],
+            }
+
+
+@contextmanager
+def profile_section(name):
+    """Record the wall and CPU time of the enclosed code as section `name`.
+
+    The section is nested under the enclosing section. Nothing is recorded
+    if no profiler is active. The CPU time is that of the current thread.
+    """
+    parent = _current_node.get()
+    if parent is None:
+        yield None
+        return
+    node = ProfileNode(name, parent=parent)
+    token = _current_node.set(node)
+    t0 = time.perf_counter()
+    c0 = time.thread_time()
+    try:
+        yield node
+    finally:
+        node.wall = time.perf_counter() - t0
+        node.cpu = time.thread_time() - c0
+        _current_node.reset(token)
+
+
+class _ProfiledLoader(object):
+    """A loader wrapper that profiles the module execution."""
+
+    def __init__(self, loader):
+        self._loader = loader
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        # restore the loader so that the module does not see the wrapper.
+        module.__loader__ = self._loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self._loader
+        with profile_section(f'import {module.__name__}'):
+            self._loader.exec_module(module)
+
+
+class _ImportProfiler(object):
+    """A meta path finder that profiles the imports of modules."""
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+            spec.loader = _ProfiledLoader(spec.loader)
+        return spec
+
+
+class StartupProfiler(object):
+    """A class to collect a tree of profiled sections.
+
+    Parameters
+    ----------
+    name : str
+        The name of the root section.
+    """
+
+    def __init__(self, name='startup'):
+        self.root = ProfileNode(name)
+
+    @contextmanager
+    def profile(self, track_imports=True):
+        """Activate the profiler for the enclosed code.
+
+        Parameters
+        ----------
+        track_imports : bool
+            If True, imports of modules are recorded as sections.
+        """
+        root = self.root
+        token = _current_node.set(root)
+        t0 = time.perf_counter()
+        c0 = time.thread_time()
+        with ExitStack() as es:
+            if track_imports:
+                finder = _ImportProfiler()
+                sys.meta_path.insert(0, finder)
+                es.callback(sys.meta_path.remove, finder)
+            try:
+                yield self
+            finally:
+                root.wall = time.perf_counter() - t0
+                root.cpu = time.thread_time() - c0
+                _current_node.reset(token)
+
+    def to_dict(self, min_time=0.):
+        """Return the profile tree as nested dict."""
+        return self.root.to_dict(min_time=min_time)
+
+    def to_json(self, min_time=0., **kwargs):
+        """Return the profile tree as JSON."""
+        return json.dumps(self.to_dict(min_time=min_time), **kwargs)
+
+    def format_tree(self, min_time=0., bar_width=30):
+        """Return the profile tree as a flame-style text tree.
+
+        Each line shows the wall time, the CPU time and the fraction of total
+        wall time as a bar.
+
+        Parameters
+        ----------
+        min_time : float
+            Sections with wall time less than this are omitted.
+        bar_width : int
+            The width of the bar for the root section.
+        """
+        total = self.root.wall or 1.
+        lines = list()
+
+        def _format(node, depth):
+            frac = node.wall / total
+            bar = '█' * int(round(frac * bar_width))
+            lines.append(
+                f'{node.wall:8.3f}s {node.cpu:8.3f}s {frac:6.1%} '
+                f'{bar:<{bar_width}} {"  " * depth}{node.name}')
+            for c in node.children:
+                if c.wall >= min_time:
+                    _format(c, depth + 1)
+
+        _format(self.root, 0)
+        header = f'{"wall":>9} {"cpu":>9} {"frac":>6} {"":<{bar_width}} name'
+        return '\n'.join([header] + lines)
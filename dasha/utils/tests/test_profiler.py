@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+
+import json
+from ..profiler import StartupProfiler, profile_section
+
+
+def test_profile_section_inactive():
+    with profile_section('a') as node:
+        assert node is None
+
+
+def test_startup_profiler():
+    profiler = StartupProfiler(name='root')
+    with profiler.profile(track_imports=False):
+        with profile_section('a'):
+            with profile_section('b'):
+                pass
+        with profile_section('c'):
+            pass
+    d = profiler.to_dict()
+    assert d['name'] == 'root'
+    assert [c['name'] for c in d['children']] == ['a', 'c']
+    assert d['children'][0]['children'][0]['name'] == 'b'
+    assert d['wall'] >= d['children'][0]['wall']
+    assert json.loads(profiler.to_json()) == d
+    tree = profiler.format_tree()
+    assert len(tree.split('\n')) == 5
+    # sections after the profiler is done are not recorded
+    with profile_section('d') as node:
+        assert node is None
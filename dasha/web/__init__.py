@@ -16,13 +16,6 @@ import atexit
 __all__ = ['site', 'create_site', 'create_app']
 
 
-# enable logging for the start up if flask development is set
-if os.environ.get('FLASK_ENV', None) == 'development':
-    init_log(level='DEBUG')
-else:
-    init_log(level='INFO')
-
-
 site = ObjectProxy(None)
 """
 A proxy to a global `~dasha.core.Site` instance, which is made available after
@@ -36,6 +29,14 @@ functions.
 """
 
 
+def _init_startup_log():
+    # enable logging for the start up if flask development is set
+    if os.environ.get('FLASK_ENV', None) == 'development':
+        init_log(level='DEBUG')
+    else:
+        init_log(level='INFO')
+
+
 @timeit
 def create_site():
     """DashA entry point.
@@ -48,6 +49,7 @@ def create_site():
         The site instance.
 
     """
+    _init_startup_log()
     logger = get_logger()
 
     env_registry.clear()
@@ -57,15 +59,50 @@ def create_site():
     env_registry.register(
             'DASHA_SITE', 'The site module or path.',
             'dasha.examples.dasha_intro')
+    env_registry.register(
+            'DASHA_SITES',
+            'The sites to host under URL prefixes, as comma separated '
+            'prefix=site items. This overrides DASHA_SITE.',
+            None)
     env_registry.register('DASHA_LOGFILE', 'The file for logging.', None)
     env_registry.register('DASHA_LOGLEVEL', 'The DashA log level.', 'Info')
+    env_registry.register(
+            'DASHA_HOT_RELOAD', 'Enable the incremental reloader.', '0')
+    env_registry.register(
+            'DASHA_WARMUP_FILE',
+            'The recorded requests to replay before serving.', None)
+    env_registry.register(
+            'DASHA_WARMUP_RECORD',
+            'The file to record the requests for warmup.', None)
+    env_registry.register(
+            'DASHA_WARMUP_CALLBACKS',
+            'The comma separated patterns of the output ids of the '
+            'callbacks to replay in warmup.', None)
     logger.info(f"registered env vars:\n{pformat_yaml(env_registry)}")
 
-    site.__wrapped__ = Site.from_any(env_registry.get('DASHA_SITE'))
+    sites = env_registry.get('DASHA_SITES')
+    if sites:
+        site.__wrapped__ = Site.from_multi(_parse_sites(sites))
+    else:
+        site.__wrapped__ = Site.from_any(env_registry.get('DASHA_SITE'))
     site.server_config.update(SECRET_KEY=env_registry.get('SECRET_KEY'))
     return site
 
 
+def _parse_sites(value):
+    """Return the sites keyed by URL prefix from ``DASHA_SITES`` value."""
+    result = dict()
+    for item in value.replace(',', ' ').split():
+        prefix, sep, site = item.partition('=')
+        if not sep or not site:
+            raise ValueError(
+                f"invalid DASHA_SITES item {item}, expect prefix=site.")
+        if prefix in result:
+            raise ValueError(f"duplicated DASHA_SITES prefix {prefix}.")
+        result[prefix] = site
+    return result
+
+
 @timeit
 def create_app():
     """Flask entry point.
@@ -85,16 +122,79 @@ def create_app():
     # python logging level is upper case.
     init_log(level=loglevel.upper(), file_=logfile)
     from werkzeug.middleware.proxy_fix import ProxyFix
-    server.wsgi_app = ProxyFix(server.wsgi_app, x_proto=1, x_host=1)
+    from .lifecycle import lifecycle
+    server.wsgi_app = lifecycle.wrap(
+        ProxyFix(server.wsgi_app, x_proto=1, x_host=1))
+    exit_stack.callback(site.teardown)
+    _setup_warmup(site, server)
+    if env_registry.get('DASHA_HOT_RELOAD') == '1':
+        _start_reloader()
     return server
 
 
+def _setup_warmup(site, server):
+    from .warmup import (
+        WarmupRecorder, load_warmup_requests, filter_warmup_requests)
+    logger = get_logger()
+    warmup_file = env_registry.get('DASHA_WARMUP_FILE')
+    if warmup_file:
+        try:
+            requests = load_warmup_requests(warmup_file)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(
+                f"unable to load warmup requests {warmup_file}: {e}")
+            requests = list()
+        callbacks = env_registry.get('DASHA_WARMUP_CALLBACKS') or ''
+        requests = filter_warmup_requests(
+            requests, [c.strip() for c in callbacks.split(',') if c.strip()])
+        try:
+            site.warmup(requests)
+        except Exception as e:
+            # the warmup should never stop the server from starting.
+            logger.error(f"warmup failed: {e}", exc_info=True)
+    record_file = env_registry.get('DASHA_WARMUP_RECORD')
+    if record_file:
+        recorder = WarmupRecorder(server.wsgi_app, record_file)
+        server.wsgi_app = recorder
+        exit_stack.callback(recorder.save)
+
+
+def _start_reloader():
+    from .extensions.dasha import dash_app
+    from .reloader import IncrementalReloader
+    if dash_app.__wrapped__ is None:
+        return
+    # this makes the client refresh the page when pages are rebuilt.
+    dash_app.enable_dev_tools(dev_tools_hot_reload=True)
+    reloader = IncrementalReloader(
+        dash_app, site=env_registry.get('DASHA_SITE'))
+    reloader.start()
+
+
+def _post_fork():
+    # this is called in the child process after fork, e.g., by gunicorn
+    # when the app is preloaded in the master process.
+    if site.__wrapped__ is None:
+        return
+    logger = get_logger()
+    try:
+        with logit(logger.debug, f'dasha post fork in pid={os.getpid()}'):
+            site.post_fork()
+    except Exception as e:
+        logger.error(f"failed to run dasha post fork: {e}", exc_info=True)
+
+
+if hasattr(os, 'register_at_fork'):
+    # not available on windows, where there is no fork.
+    os.register_at_fork(after_in_child=_post_fork)
+
+
 def _exit():
     logger = get_logger()
     with logit(logger.info, 'dasha clean up'):
         exit_stack.close()
 
 
+# the signals are handled in dasha.web.lifecycle when served
+# via dasha.web.serve.
 atexit.register(_exit)
-# signal.signal(signal.SIGTERM, _exit)
-# signal.signal(signal.SIGINT, _exit)
@@ -0,0 +1,300 @@
+#! /usr/bin/env python
+
+"""The admission control of the Dash callbacks.
+
+An expensive callback (e.g., one that runs commands over SSH, or queries a
+large table) can take all the server threads under load and stall the
+cheap ones. The ``CALLBACK_LIMITS`` config of the DashA extension sets
+`AdmissionPolicy` per callback, keyed by the `fnmatch` patterns of the
+output ids::
+
+    CALLBACK_LIMITS:
+      '*slurminfoview*':
+        max_concurrent: 2
+        max_queue: 4
+        timeout: 10
+        on_busy: cached
+
+The pattern is matched against the ids and the ``id.prop`` of the outputs
+of each callback, and the first matched one is used. A callback runs when
+there are less than ``max_concurrent`` running, otherwise it waits in a
+queue of ``max_queue`` for up to ``timeout`` seconds. When the queue is
+full or the wait times out, the request is rejected fast with:
+
+* ``prevent_update``: No update (status 204).
+* ``cached``: The last response of the callback for the same inputs, or
+  no update if there is none.
+
+The counts of the admitted, queued, rejected and cached requests are kept in
+`~dasha.web.metrics.metrics` with prefix ``callback_limits.``, and are
+returned by `get_stats`.
+"""
+
+import json
+import fnmatch
+import functools
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+
+import flask
+from dash.exceptions import PreventUpdate
+from tollan.utils.log import get_logger
+from tollan.utils.fmt import pformat_yaml
+
+from .metrics import metrics
+
+
+__all__ = [
+    'AdmissionPolicy', 'CallbackLimiter', 'match_callback_id',
+    'notify_callbacks_changed', 'wrap_callbacks', 'init_callback_limits',
+    'get_stats']
+
+
+_on_busy_choices = ('prevent_update', 'cached')
+
+
+@dataclass
+class AdmissionPolicy(object):
+    """The admission policy of a callback."""
+
+    max_concurrent: int = 1
+    max_queue: int = 0
+    timeout: float = 10.
+    on_busy: str = 'prevent_update'
+    cache_size: int = 16
+
+    def __post_init__(self):
+        if self.max_concurrent < 1:
+            raise ValueError("max_concurrent has to be at least 1.")
+        if self.max_queue < 0:
+            raise ValueError("max_queue cannot be negative.")
+        if self.on_busy not in _on_busy_choices:
+            raise ValueError(
+                f"invalid on_busy {self.on_busy}, "
+                f"choose from {_on_busy_choices}")
+
+
+class CallbackLimiter(object):
+    """A class to admit the calls of a callback by `AdmissionPolicy`.
+
+    Parameters
+    ----------
+    name : str
+        The callback id, which is used in the counter names.
+    policy : `AdmissionPolicy`
+        The policy.
+    """
+
+    def __init__(self, name, policy):
+        self.name = name
+        self.policy = policy
+        self._cond = threading.Condition()
+        self._n_running = 0
+        self._n_waiting = 0
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._counters = {
+            k: metrics.counter(f'callback_limits.{name}.{k}')
+            for k in ('n_admitted', 'n_queued', 'n_rejected', 'n_cached')}
+
+    @property
+    def n_running(self):
+        return self._n_running
+
+    @property
+    def n_waiting(self):
+        return self._n_waiting
+
+    def acquire(self):
+        """Return True if the call is admitted."""
+        policy = self.policy
+        with self._cond:
+            if self._n_running < policy.max_concurrent:
+                self._n_running += 1
+                return True
+            if self._n_waiting >= policy.max_queue:
+                return False
+            self._counters['n_queued'].inc()
+            self._n_waiting += 1
+            try:
+                admitted = self._cond.wait_for(
+                    lambda: self._n_running < policy.max_concurrent,
+                    timeout=policy.timeout)
+            finally:
+                self._n_waiting -= 1
+            if admitted:
+                self._n_running += 1
+            return admitted
+
+    def release(self):
+        with self._cond:
+            self._n_running -= 1
+            self._cond.notify()
+
+    @staticmethod
+    def _make_cache_key(args, kwargs):
+        return json.dumps(
+            [args, kwargs.get('outputs_list', None)],
+            sort_keys=True, default=str)
+
+    def _get_cached(self, key):
+        with self._cache_lock:
+            return self._cache.get(key, None)
+
+    def _set_cached(self, key, value):
+        with self._cache_lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.policy.cache_size:
+                self._cache.popitem(last=False)
+
+    def wrap(self, func):
+        """Return callback function `func` wrapped with the limits."""
+        use_cache = self.policy.on_busy == 'cached'
+
+        @functools.wraps(func)
+        def limited(*args, **kwargs):
+            key = self._make_cache_key(args, kwargs) if use_cache else None
+            if not self.acquire():
+                self._counters['n_rejected'].inc()
+                if use_cache:
+                    cached = self._get_cached(key)
+                    if cached is not None:
+                        self._counters['n_cached'].inc()
+                        return cached
+                raise PreventUpdate
+            self._counters['n_admitted'].inc()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                self.release()
+            if use_cache:
+                self._set_cached(key, result)
+            return result
+
+        return limited
+
+
+def _get_output_names(callback_id):
+    if callback_id.startswith('..'):
+        outputs = callback_id[2:-2].split('...')
+    else:
+        outputs = [callback_id]
+    for output in outputs:
+        yield output
+        yield output.rsplit('.', 1)[0]
+
+
+def match_callback_id(callback_id, patterns):
+    """Return the first of `patterns` that matches the output ids or the
+    ``id.prop`` of the outputs of `callback_id`, or None."""
+    names = list(_get_output_names(callback_id))
+    for pattern in patterns:
+        if any(fnmatch.fnmatchcase(n, pattern) for n in names):
+            return pattern
+    return None
+
+
+def notify_callbacks_changed(app):
+    """Make `wrap_callbacks` check the callbacks of Dash `app` again.
+
+    This has to be called when the callbacks are replaced without changing
+    the number of them, e.g., by the rebuild of a page.
+    """
+    app._dasha_callbacks_version = getattr(
+        app, '_dasha_callbacks_version', 0) + 1
+
+
+def wrap_callbacks(app, make_wrapper, attr):
+    """Wrap the functions of the callbacks of Dash `app`.
+
+    The callbacks registered later, including those registered with
+    ``dash.callback`` and those of the pages rebuilt by the reloader, are
+    wrapped before the next callback request. They are found when the
+    number of callbacks changes, or `notify_callbacks_changed` is called.
+
+    Parameters
+    ----------
+    app : `~dash.Dash`
+        The Dash app.
+    make_wrapper : callable
+        Called with the callback id and the function to return the wrapped
+        function, or None to keep the function.
+    attr : str
+        The attribute set on the wrapped functions to not wrap them again.
+    """
+    # the callbacks that are not wrapped.
+    skipped = set()
+    lock = threading.Lock()
+    applied = [None]
+
+    def get_version():
+        return (
+            len(app.callback_map),
+            getattr(app, '_dasha_callbacks_version', 0))
+
+    def apply():
+        version = get_version()
+        if version == applied[0]:
+            return
+        with lock:
+            # iterate over a copy since the callbacks may be registered
+            # at the same time.
+            for cid, cb in list(app.callback_map.items()):
+                func = cb.get('callback', None)
+                if func is None or cid in skipped or hasattr(func, attr):
+                    continue
+                wrapped = make_wrapper(cid, func)
+                if wrapped is None:
+                    skipped.add(cid)
+                    continue
+                setattr(wrapped, attr, True)
+                cb['callback'] = wrapped
+            applied[0] = version
+
+    update_path = f'{app.config.routes_pathname_prefix}_dash-update-component'
+
+    def before_request():
+        if flask.request.path == update_path:
+            apply()
+
+    apply()
+    app.server.before_request(before_request)
+    return app
+
+
+def init_callback_limits(app, config):
+    """Apply the admission policies to the callbacks of Dash `app`.
+
+    Parameters
+    ----------
+    app : `~dash.Dash`
+        The Dash app.
+    config : dict
+        The `AdmissionPolicy` or its keyword arguments, keyed by the
+        patterns of the output ids.
+    """
+    logger = get_logger()
+    policies = {
+        k: v if isinstance(v, AdmissionPolicy) else AdmissionPolicy(**v)
+        for k, v in config.items()}
+
+    def make_wrapper(cid, func):
+        pattern = match_callback_id(cid, policies.keys())
+        if pattern is None:
+            return None
+        policy = policies[pattern]
+        logger.debug(f"limit callback {cid}: {policy}")
+        return CallbackLimiter(cid, policy).wrap(func)
+
+    wrap_callbacks(app, make_wrapper, '_dasha_limiter')
+    logger.info(
+        "callback limits:\n" + pformat_yaml(
+            {k: asdict(v) for k, v in policies.items()}))
+    return app
+
+
+def get_stats():
+    """Return the counts of the limited callbacks."""
+    return metrics.snapshot(prefix='callback_limits.')
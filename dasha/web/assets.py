@@ -0,0 +1,281 @@
+#! /usr/bin/env python
+
+"""The bundling of the static assets of DashA sites.
+
+Dash serves each JS and CSS file in the assets folder in its own request
+with a short cache lifetime. The `AssetBundle` instead concatenates and
+minifies them into one JS and one CSS file with the content hash in the
+file names, along with the precompressed ``.gz`` and ``.br`` siblings. The
+bundles are served under ``_dasha-assets/`` with immutable cache headers,
+so the repeated page loads do not request them again.
+
+It is set up by the DashA extension with the ``ASSETS_BUNDLE`` config, which
+is a dict of the keyword arguments to `AssetBundle` (except
+``assets_folder``), or False to disable. It is disabled by default in
+debug mode and with the hot reload of the development server, where the
+assets are expected to change. The bundles can be built ahead of time with
+``dasha build-assets``.
+"""
+
+import os
+import re
+import gzip
+import hashlib
+from pathlib import Path
+
+import flask
+from tollan.utils.log import get_logger
+
+from .compression import _parse_accept_encoding, _has_brotli
+
+
+__all__ = ['AssetBundle', 'init_asset_bundle']
+
+
+_console_log_re = re.compile(r'^console\.log\((?P<args>[^`]*)\);?$')
+_backtick_re = re.compile(r'(?<!\\)`')
+_css_comment_re = re.compile(r'/\*.*?\*/', re.DOTALL)
+_css_space_re = re.compile(r'\s+')
+_css_punct_re = re.compile(r'\s*([{};,>])\s*')
+
+
+def _is_balanced(s):
+    return s.count('(') == s.count(')')
+
+
+def minify_js(source, strip_console=False):
+    """Return `source` with the comment lines and the indentation removed.
+
+    This is conservative: only the whole-line ``//`` comments are removed
+    and the line breaks are kept, so the semantics do not change. The lines
+    in multi-line template literals are kept as is.
+
+    Parameters
+    ----------
+    strip_console : bool
+        If True, also remove the single-line ``console.log`` statements
+        that follow a ``{``, ``;``, or ``}``, i.e., those that are not the
+        body of a braceless ``if``, ``else``, or loop.
+    """
+    lines = list()
+    in_template = False
+    for raw_line in source.splitlines():
+        # the backticks toggle the template literal state. This does not
+        # parse the strings and comments, which is good enough for assets.
+        toggle = len(_backtick_re.findall(raw_line)) % 2 == 1
+        if in_template:
+            lines.append(raw_line.rstrip() if toggle else raw_line)
+            in_template = not toggle
+            continue
+        if toggle:
+            # the trailing whitespaces are in the template literal.
+            lines.append(raw_line.lstrip())
+            in_template = True
+            continue
+        line = raw_line.strip()
+        if not line or line.startswith('//'):
+            continue
+        if strip_console and lines and lines[-1][-1:] in ('{', ';', '}'):
+            m = _console_log_re.match(line)
+            if m is not None and _is_balanced(m.group('args')):
+                continue
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def minify_css(source):
+    """Return `source` with the comments and the extra whitespaces
+    removed."""
+    source = _css_comment_re.sub('', source)
+    source = _css_space_re.sub(' ', source)
+    return _css_punct_re.sub(r'\1', source).strip()
+
+
+class AssetBundle(object):
+    """A class to build and serve the bundled assets.
+
+    Parameters
+    ----------
+    assets_folder : str or `~pathlib.Path`
+        The Dash assets folder.
+    output_dir : str or `~pathlib.Path`, optional
+        The directory to write the bundles to, e.g., to be served by a
+        reverse proxy. The bundles are always served from memory, and are not
+        written if this is None, which is the default. As the file names have
+        the content hash, it is safe to share the directory. The errors of
+        writing the files are logged.
+    ignore : str, optional
+        The regex of the file names to skip, same as the ``assets_ignore``
+        of Dash.
+    strip_console : bool
+        If True, remove the ``console.log`` statements in JS. See
+        `minify_js`.
+    """
+
+    logger = get_logger()
+
+    url_path = '_dasha-assets/'
+    """The URL path relative to the Dash routes to serve the bundles."""
+
+    cache_control = 'public, max-age=31536000, immutable'
+
+    _mimetypes = {
+        '.js': 'application/javascript',
+        '.css': 'text/css',
+        }
+
+    def __init__(
+            self, assets_folder, output_dir=None, ignore=None,
+            strip_console=False):
+        self.assets_folder = Path(assets_folder)
+        if output_dir is not None:
+            output_dir = Path(output_dir).expanduser()
+        self.output_dir = output_dir
+        self.ignore = ignore or None
+        self.strip_console = strip_console
+        # the built bundles keyed by name, then by encoding.
+        self._files = dict()
+
+    @property
+    def files(self):
+        """The names of the built bundles."""
+        return list(self._files.keys())
+
+    def get_sources(self, suffix):
+        """Return the asset files with `suffix`, in the order Dash loads
+        them."""
+        ignore = re.compile(self.ignore) if self.ignore else None
+        result = list()
+        for current, _, files in sorted(os.walk(self.assets_folder)):
+            for f in sorted(files):
+                if ignore is not None and ignore.search(f):
+                    continue
+                if f.endswith(suffix):
+                    result.append(Path(current).joinpath(f))
+        return result
+
+    def _bundle(self, suffix):
+        sources = self.get_sources(suffix)
+        if not sources:
+            return None, sources
+        if suffix == '.js':
+            # the separator guards against files not ending with ";".
+            content = '\n;\n'.join(
+                minify_js(p.read_text(), strip_console=self.strip_console)
+                for p in sources)
+        else:
+            content = '\n'.join(minify_css(p.read_text()) for p in sources)
+        return content.encode(), sources
+
+    def _write(self, name, data):
+        filepath = self.output_dir.joinpath(name)
+        if filepath.exists():
+            return filepath
+        tmp = filepath.with_name(f'.{name}.{os.getpid()}.tmp')
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp, 'wb') as fo:
+                fo.write(data)
+            os.replace(tmp, filepath)
+        except OSError as e:
+            self.logger.warning(f"unable to write asset {filepath}: {e}")
+            return None
+        return filepath
+
+    def build(self):
+        """Build the bundles.
+
+        Returns
+        -------
+        dict
+            The bundle names keyed by the suffix.
+        """
+        result = dict()
+        for suffix in self._mimetypes.keys():
+            data, sources = self._bundle(suffix)
+            if data is None:
+                continue
+            digest = hashlib.blake2b(data, digest_size=8).hexdigest()
+            name = f'bundle.{digest}{suffix}'
+            encoded = {None: data, 'gzip': gzip.compress(data, mtime=0)}
+            if _has_brotli():
+                import brotli
+                encoded['br'] = brotli.compress(data)
+            if self.output_dir is not None:
+                exts = {None: '', 'gzip': '.gz', 'br': '.br'}
+                for encoding, d in encoded.items():
+                    self._write(name + exts[encoding], d)
+            self._files[name] = encoded
+            size_in = sum(p.stat().st_size for p in sources)
+            self.logger.info(
+                f"bundled {len(sources)} {suffix} assets to {name}: "
+                f"{size_in} -> {len(data)} bytes "
+                f"({len(encoded['gzip'])} gzipped)")
+            result[suffix] = name
+        return result
+
+    def serve(self, filename):
+        """The view function to serve the bundle `filename`."""
+        encoded = self._files.get(filename, None)
+        if encoded is None:
+            flask.abort(404)
+        accepted = _parse_accept_encoding(
+            flask.request.headers.get('Accept-Encoding', None))
+        for encoding in ('br', 'gzip', None):
+            if encoding in encoded and (
+                    encoding is None or encoding in accepted):
+                break
+        response = flask.Response(
+            encoded[encoding],
+            mimetype=self._mimetypes[Path(filename).suffix])
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = self.cache_control
+        return response
+
+
+def init_asset_bundle(app, config):
+    """Build the assets of Dash `app` and serve them as bundles.
+
+    The bundled files are added to the ``assets_ignore`` of `app` so Dash
+    does not serve them individually.
+
+    Parameters
+    ----------
+    app : `~dash.Dash`
+        The Dash app.
+    config : dict or bool
+        The keyword arguments to `AssetBundle`. True to use the defaults,
+        and False to skip.
+
+    Returns
+    -------
+    `AssetBundle` or None
+    """
+    if config is False:
+        return None
+    if config is True or config is None:
+        config = dict()
+    if not app.config.include_assets_files:
+        return None
+    bundle = AssetBundle(
+        app.config.assets_folder, ignore=app.config.assets_ignore, **config)
+    names = bundle.build()
+    if not names:
+        return None
+    ignore = r'\.(js|css)$'
+    if app.config.assets_ignore:
+        ignore = f'{app.config.assets_ignore}|{ignore}'
+    app.config.assets_ignore = ignore
+    app.server.add_url_rule(
+        f'{app.config.routes_pathname_prefix}{bundle.url_path}'
+        '<path:filename>',
+        endpoint=f'{app.config.routes_pathname_prefix}dasha-assets',
+        view_func=bundle.serve)
+    url_base = f'{app.config.requests_pathname_prefix}{bundle.url_path}'
+    if '.css' in names:
+        app.config.external_stylesheets.append(url_base + names['.css'])
+    if '.js' in names:
+        app.config.external_scripts.append(url_base + names['.js'])
+    return bundle
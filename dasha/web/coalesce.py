@@ -0,0 +1,144 @@
+#! /usr/bin/env python
+
+"""The coalescing of the identical concurrent callback calls.
+
+When the timers of many clients fire at the same time, the same callback
+runs with the same inputs in parallel. With the ``CALLBACK_COALESCE``
+config of the DashA extension, which is a list of the `fnmatch` patterns of
+the output ids (see `~dasha.web.admission.match_callback_id`), the calls
+of the matched callbacks with the same inputs, outputs and triggered props
+wait for the one in flight and share its response, or its exception.
+
+Only the callbacks whose outputs depend on nothing but the inputs should
+be coalesced, e.g., not those that use the user of the session.
+
+The counts of the calls and of those coalesced are kept in
+`~dasha.web.metrics.metrics` with prefix ``coalesce.``, and are returned
+with the ratios by `get_stats`.
+"""
+
+import json
+import functools
+import threading
+
+import flask
+from tollan.utils.log import get_logger
+
+from .metrics import metrics
+from .admission import match_callback_id, wrap_callbacks
+
+
+__all__ = ['Singleflight', 'init_callback_coalescing', 'get_stats']
+
+
+class _Flight(object):
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.exc = None
+
+
+class Singleflight(object):
+    """A class to run a function once for the concurrent calls of the same
+    key.
+
+    Parameters
+    ----------
+    name : str
+        The name used in the counter names.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._flights = dict()
+        self._counters = {
+            k: metrics.counter(f'coalesce.{name}.{k}')
+            for k in ('n_calls', 'n_coalesced')}
+
+    def do(self, key, func, *args, **kwargs):
+        """Return ``func(*args, **kwargs)``, or the result of the call of
+        the same `key` in flight."""
+        self._counters['n_calls'].inc()
+        with self._lock:
+            flight = self._flights.get(key, None)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            self._counters['n_coalesced'].inc()
+            flight.done.wait()
+            if flight.exc is not None:
+                raise flight.exc
+            return flight.result
+        try:
+            flight.result = func(*args, **kwargs)
+        except BaseException as e:
+            flight.exc = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def wrap(self, func):
+        """Return callback function `func` wrapped to coalesce the calls."""
+
+        @functools.wraps(func)
+        def coalesced(*args, **kwargs):
+            key = self._make_key(args, kwargs)
+            return self.do(key, func, *args, **kwargs)
+
+        return coalesced
+
+    @staticmethod
+    def _make_key(args, kwargs):
+        changed = None
+        if flask.has_request_context():
+            body = flask.request.get_json(silent=True) or dict()
+            changed = body.get('changedPropIds', None)
+        return json.dumps(
+            [args, kwargs.get('outputs_list', None), changed],
+            sort_keys=True, default=str)
+
+
+def init_callback_coalescing(app, patterns):
+    """Coalesce the identical concurrent calls of the callbacks of Dash
+    `app` that match `patterns`.
+
+    Parameters
+    ----------
+    app : `~dash.Dash`
+        The Dash app.
+    patterns : list of str
+        The patterns of the output ids.
+    """
+    logger = get_logger()
+    if isinstance(patterns, str):
+        patterns = [patterns]
+
+    def make_wrapper(cid, func):
+        if match_callback_id(cid, patterns) is None:
+            return None
+        logger.debug(f"coalesce callback {cid}")
+        return Singleflight(cid).wrap(func)
+
+    wrap_callbacks(app, make_wrapper, '_dasha_coalesce')
+    logger.info(f"coalesce callbacks matching {patterns}")
+    return app
+
+
+def get_stats():
+    """Return the counts of the coalesced callbacks, and the ratios of the
+    calls coalesced."""
+    stats = metrics.snapshot(prefix='coalesce.')
+    for name in list(stats.keys()):
+        if not name.endswith('.n_calls'):
+            continue
+        prefix = name[:-len('n_calls')]
+        n_calls = stats[name]
+        n_coalesced = stats.get(f'{prefix}n_coalesced', 0)
+        stats[f'{prefix}ratio'] = n_coalesced / n_calls if n_calls else 0.
+    return stats
@@ -0,0 +1,306 @@
+#! /usr/bin/env python
+
+"""The response compression for DashA sites.
+
+The `CompressionMiddleware` compresses the responses with brotli (when the
+``brotli`` package is installed) or gzip, per the ``Accept-Encoding`` of the
+request. Responses smaller than ``min_size`` or of types that do not
+benefit from compression are sent as is. Large bodies are compressed in a
+streaming fashion.
+
+It is set up by the DashA extension with the ``COMPRESSION`` config, which
+is a dict of the keyword arguments to `CompressionMiddleware`, or True to
+use the defaults. It is disabled by default, since the responses are
+usually compressed by the reverse proxy in front of the site.
+
+The statistics are collected in `~dasha.web.metrics.metrics` as counters
+with prefix ``compression.``. They are logged when the process exits, and
+served as JSON under ``_dasha-compression`` in debug mode.
+"""
+
+import time
+import zlib
+import itertools
+
+from tollan.utils.fmt import pformat_yaml
+from tollan.utils.log import get_logger
+
+from .metrics import metrics
+
+
+__all__ = ['CompressionMiddleware', 'init_compression']
+
+
+_compressible_mimetypes = (
+    'text/html', 'text/css', 'text/plain', 'text/javascript',
+    'application/json', 'application/javascript', 'image/svg+xml',
+    )
+
+
+def _get_header(headers, name):
+    name = name.lower()
+    for k, v in headers:
+        if k.lower() == name:
+            return v
+    return None
+
+
+def _parse_accept_encoding(value):
+    """Return the set of encodings accepted."""
+    result = set()
+    for item in (value or '').split(','):
+        coding, _, params = item.strip().partition(';')
+        q = params.strip()
+        if q.startswith('q='):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            result.add(coding.strip().lower())
+    return result
+
+
+class _GzipCompressor(object):
+
+    def __init__(self, level):
+        # wbits=31 makes the gzip container.
+        self._c = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._c.compress(data)
+
+    def finish(self):
+        return self._c.flush()
+
+
+class _BrotliCompressor(object):
+
+    def __init__(self, level):
+        import brotli
+        self._c = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._c.process(data)
+
+    def finish(self):
+        return self._c.finish()
+
+
+def _has_brotli():
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class CompressionMiddleware(object):
+    """A WSGI middleware to compress the responses.
+
+    Parameters
+    ----------
+    app : callable
+        The WSGI app.
+    min_size : int
+        Responses smaller than this are not compressed.
+    gzip_level : int
+        The gzip compression level, from 1 to 9.
+    brotli : bool
+        Use brotli when accepted and the ``brotli`` package is installed.
+    brotli_level : int
+        The brotli compression quality, from 0 to 11.
+    mimetypes : list of str, optional
+        The content types to compress.
+    """
+
+    logger = get_logger()
+
+    def __init__(
+            self, app, min_size=1024, gzip_level=6, brotli=True,
+            brotli_level=4, mimetypes=None):
+        self.app = app
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli = brotli and _has_brotli()
+        self.brotli_level = brotli_level
+        self.mimetypes = tuple(mimetypes or _compressible_mimetypes)
+        self._counters = {
+            name: metrics.counter(f'compression.{name}', description)
+            for name, description in [
+                ('n_compressed', 'The number of compressed responses.'),
+                ('n_skipped', 'The number of responses not compressed.'),
+                ('bytes_in', 'The size before compression.'),
+                ('bytes_out', 'The size after compression.'),
+                ('cpu_time', 'The CPU seconds spent in compression.'),
+                ]
+            }
+
+    @staticmethod
+    def get_stats():
+        """Return the compression counters with the compression ratio."""
+        stats = metrics.snapshot(prefix='compression.')
+        bytes_in = stats.get('compression.bytes_in', 0)
+        stats['compression.ratio'] = (
+            stats.get('compression.bytes_out', 0) / bytes_in
+            if bytes_in > 0 else None)
+        return stats
+
+    def log_stats(self):
+        """Log the compression counters."""
+        self.logger.info(
+            f"response compression stats:\n{pformat_yaml(self.get_stats())}")
+
+    def _select_encoding(self, environ):
+        if environ.get('REQUEST_METHOD', 'GET') == 'HEAD':
+            return None
+        accepted = _parse_accept_encoding(
+            environ.get('HTTP_ACCEPT_ENCODING', None))
+        if self.brotli and 'br' in accepted:
+            return 'br'
+        if 'gzip' in accepted:
+            return 'gzip'
+        return None
+
+    def _make_compressor(self, encoding):
+        if encoding == 'br':
+            return _BrotliCompressor(self.brotli_level)
+        return _GzipCompressor(self.gzip_level)
+
+    def _is_compressible(self, status, headers):
+        if not status.startswith('200'):
+            return False
+        if _get_header(headers, 'Content-Encoding') is not None:
+            return False
+        content_type = _get_header(headers, 'Content-Type') or ''
+        if not content_type.split(';', 1)[0].strip().lower().startswith(
+                self.mimetypes):
+            return False
+        content_length = _get_header(headers, 'Content-Length')
+        if content_length is not None:
+            try:
+                return int(content_length) >= self.min_size
+            except ValueError:
+                return False
+        return True
+
+    def __call__(self, environ, start_response):
+        encoding = self._select_encoding(environ)
+        if encoding is None:
+            return self.app(environ, start_response)
+        return self._iter_response(encoding, environ, start_response)
+
+    def _iter_response(self, encoding, environ, start_response):
+        counters = self._counters
+        state = dict()
+        pending = list()
+
+        def _start_response(status, headers, exc_info=None):
+            if exc_info is not None and state.get('started', False):
+                # the error happens after the response is started.
+                return start_response(status, headers, exc_info)
+            state.update(status=status, headers=headers, exc_info=exc_info)
+            return pending.append
+
+        result = self.app(environ, _start_response)
+        try:
+            chunks = iter(result)
+            if 'status' not in state:
+                # start_response may be deferred to the first chunk.
+                pending.extend(itertools.islice(chunks, 1))
+            if 'status' not in state:
+                # the app does not call start_response, which is left for
+                # the server to report.
+                yield from pending
+                return
+            status = state['status']
+            headers = state['headers']
+            exc_info = state['exc_info']
+            if not self._is_compressible(status, headers):
+                counters['n_skipped'].inc()
+                state['started'] = True
+                start_response(status, headers, exc_info)
+                yield from pending
+                yield from chunks
+                return
+            # buffer the body until min_size to check if it is worth it.
+            size = sum(len(c) for c in pending)
+            while size < self.min_size:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                pending.append(chunk)
+                size += len(chunk)
+            if size < self.min_size:
+                counters['n_skipped'].inc()
+                state['started'] = True
+                start_response(status, headers, exc_info)
+                yield from pending
+                return
+            headers = [
+                (k, v) for k, v in headers
+                if k.lower() not in ('content-length', 'etag', 'vary')]
+            headers.append(('Content-Encoding', encoding))
+            vary = _get_header(state['headers'], 'Vary')
+            headers.append((
+                'Vary',
+                'Accept-Encoding' if not vary else
+                f'{vary}, Accept-Encoding'))
+            etag = _get_header(state['headers'], 'ETag')
+            if etag is not None:
+                # the compressed body is only semantically equivalent.
+                if not etag.startswith('W/'):
+                    etag = f'W/{etag}'
+                headers.append(('ETag', etag))
+            state['started'] = True
+            start_response(status, headers, exc_info)
+            counters['n_compressed'].inc()
+            compressor = self._make_compressor(encoding)
+            for chunk in itertools.chain(pending, chunks):
+                if not chunk:
+                    continue
+                c0 = time.thread_time()
+                data = compressor.compress(chunk)
+                counters['cpu_time'].inc(time.thread_time() - c0)
+                counters['bytes_in'].inc(len(chunk))
+                counters['bytes_out'].inc(len(data))
+                if data:
+                    yield data
+            c0 = time.thread_time()
+            data = compressor.finish()
+            counters['cpu_time'].inc(time.thread_time() - c0)
+            counters['bytes_out'].inc(len(data))
+            yield data
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+
+def init_compression(server, config):
+    """Install `CompressionMiddleware` to `server`.
+
+    Parameters
+    ----------
+    server : `~flask.Flask`
+        The flask server.
+    config : dict or bool
+        The keyword arguments to `CompressionMiddleware`. True to use the
+        defaults, and False to skip.
+    """
+    if config is False:
+        return None
+    if config is True or config is None:
+        config = dict()
+    wsgi_app = server.wsgi_app
+    if isinstance(wsgi_app, CompressionMiddleware):
+        # this happens when multiple dash apps are in the server.
+        return wsgi_app
+    middleware = server.wsgi_app = CompressionMiddleware(wsgi_app, **config)
+    from . import exit_stack
+    exit_stack.callback(middleware.log_stats)
+    CompressionMiddleware.logger.info(
+        f"enabled response compression with "
+        f"{'brotli and ' if middleware.brotli else ''}gzip, "
+        f"min_size={middleware.min_size}")
+    return middleware
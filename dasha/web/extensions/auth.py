@@ -22,6 +22,10 @@ github_auth = ObjectProxy(None)
 DASHA_AUTH_DB_BIND = 'dasha_auth'
 
 
+requires = ['dasha.web.extensions.db']
+"""The db extension sets up the binds that auth checks."""
+
+
 def get_github_login_url():
     """Return the GitHub login URL."""
     return url_for("auth.github.login")
@@ -1,8 +1,6 @@
 #! /usr/bin/env python
 
-from flask_celeryext import FlaskCeleryExt
-from wrapt import ObjectProxy
-from celery_once import QueueOnce
+from ...core import ExtensionProxy
 
 from copy import deepcopy
 
@@ -17,16 +15,22 @@ __all__ = [
         ]
 
 
-celery_app = ObjectProxy(None)
+celery_app = ExtensionProxy(__name__)
 """A proxy to the `~celery.Celery` instance."""
 
 
-_flask_celery_ext = ObjectProxy(None)
+_flask_celery_ext = ExtensionProxy(__name__)
 """A proxy to the `~flask_celeryext.FlaskCeleryExt` instance."""
 
 
 def init_ext(config):
+    from celery import current_app
+    from flask_celeryext import FlaskCeleryExt
     ext = _flask_celery_ext.__wrapped__ = FlaskCeleryExt()
+    # this is the celery app that init_app configures, so the tasks can be
+    # defined before init_app, e.g., when the lazy extension is loaded by
+    # accessing the proxy.
+    celery_app.__wrapped__ = current_app._get_current_object()
     return ext
 
 
@@ -75,6 +79,8 @@ def init_app(server, config):
         worker_pool_restarts=True,
         )
 
+    from celery_once import QueueOnce
+
     class ContextQueueOnce(QueueOnce):
         def __call__(self, *args, **kwargs):
             with server.app_context():
@@ -88,6 +94,24 @@ def init_app(server, config):
             post_init_app()
 
 
+def post_fork(server, config):
+    """Reset the broker connection pool of
+    `~dasha.web.extensions.celery.celery_app` in a forked child process.
+    """
+    if celery_app.__wrapped__ is None:
+        return
+    # this drops the connection and producer pools without closing them.
+    celery_app._after_fork()
+
+
+def teardown(server, config):
+    """Close the broker connections of
+    `~dasha.web.extensions.celery.celery_app`."""
+    if celery_app.__wrapped__ is None:
+        return
+    celery_app.close()
+
+
 def schedule_task(task, **kwargs):
     if not isinstance(task, str):
         task = task.name
@@ -1,19 +1,49 @@
 #! /usr/bin/env python
 
+import os
 from wrapt import ObjectProxy
 import inspect
+import contextvars
+import json
+import threading
+import flask
 from dash import Dash
 import dash_bootstrap_components as dbc
+from plotly.io.json import to_json_plotly
 from tollan.utils.log import timeit, get_logger
 from tollan.utils.fmt import pformat_yaml
 from tollan.utils import rupdate, ensure_prefix
 import copy
+from ...utils.profiler import profile_section
 from ..templates import resolve_template
+from ..templates.utils import layout_hash
+from ..templates import compactid
+from ..templates.minify import minify_layout
+from ..snapshot import LayoutSnapshot, load_layout
+from ..compression import init_compression
+from ..assets import init_asset_bundle
+from ..vendor import init_vendor
+from ..json_engine import init_json_engine
+from ..typed_arrays import init_typed_arrays
+from ..prerender import init_prerender
+from ..admission import init_callback_limits
+from ..coalesce import init_callback_coalescing
+from ..serverstore import server_store
 
 
 __all__ = [
-    'DashA', 'dasha', 'dash_app', 'resolve_url', 'get_url_stem',
-    'CSS']
+    'DashA', 'dasha', 'dash_app', 'get_dash_app', 'get_dasha_config',
+    'get_dasha_instances',
+    'resolve_url', 'get_url_stem', 'CSS']
+
+
+requires = [
+    'dasha.web.extensions.db',
+    'dasha.web.extensions.auth',
+    'dasha.web.extensions.celery',
+    'dasha.web.extensions.slurm',
+    ]
+"""The templates may use the other extensions in ``setup_layout``."""
 
 
 dash_app = ObjectProxy(None)
@@ -24,6 +54,15 @@ dasha = ObjectProxy(None)
 """A proxy to the `~dasha.web.extensions.dasha.DashA` instance."""
 
 
+_pending_instances = list()
+"""The `DashA` instances created by `init_ext` and not yet passed to
+`init_app`, paired with their configs."""
+
+
+_current_dash_app = contextvars.ContextVar('dasha_dash_app', default=None)
+"""The Dash app being set up."""
+
+
 class CSS(object):
     """A set of commonly used CSS."""
 
@@ -44,6 +83,66 @@ class DashA(object):
         Dash configurations shall be specified as ALL CAPS.
         This object is passed to `~dasha.web.templates.Template.from_dict`
         to create the template instance when `init_app` is called.
+
+    Notes
+    -----
+    When ``LAYOUT_SNAPSHOT_DIR`` is set, the serialized layout and the
+    callback registry are saved to a snapshot file in that directory, keyed
+    by the hash of the config, the template modules and the dasha version.
+    Later boots with the same key still call ``setup_layout`` to bind the
+    callback functions, but the layout is served from the snapshot instead of
+    being resolved and serialized again. ``app.layout`` is set to a function
+    that re-creates the components from the snapshot when first called. The
+    snapshot is discarded if the callbacks registered differ from those
+    recorded. The layouts built from data at startup (e.g., the options
+    queried from a database) are served as in the snapshot until the key
+    changes, so the snapshot should not be used for such layouts, or the
+    directory should be cleared when the data change.
+
+    The layout and the callback dependencies are serialized once, and served
+    with ETag so the browser gets 304 on reloads when unchanged. The cache is
+    invalidated when the Dash hot reload hash changes.
+
+    When ``COMPRESSION`` is set, the responses are compressed by
+    `~dasha.web.compression.CompressionMiddleware`. It can be a dict of its
+    keyword arguments. This is off by default.
+
+    The JS and CSS files in the assets folder are served as bundles by
+    `~dasha.web.assets.AssetBundle`, configured by ``ASSETS_BUNDLE``, which
+    is a dict of its keyword arguments, or False to disable. The default
+    is to disable in debug mode and with ``DASHA_HOT_RELOAD``.
+
+    The external stylesheets and scripts are replaced with the local copies
+    when available. See `~dasha.web.vendor`.
+
+    The JSON engine to serialize the payloads and parse the requests is set
+    by ``JSON_ENGINE``. See `~dasha.web.json_engine`.
+
+    When ``TYPED_ARRAYS`` is set, the numeric arrays in the callback outputs
+    are sent in binary. See `~dasha.web.typed_arrays`.
+
+    When ``COMPACT_IDS`` is set, the template ids are replaced with short
+    hashes. It can be a dict with ``debug`` to serve the mapping to the
+    readable ids. See `~dasha.web.templates.compactid`.
+
+    When ``MINIFY_LAYOUT`` is set, the props of default values and the
+    wrapper divs are removed from the layout. See
+    `~dasha.web.templates.minify`.
+
+    When ``PRERENDER`` is set, the static HTML of the layout and the page of
+    the requested path is put in the index page. It can be a dict with
+    ``cache`` set to False for the layouts that depend on the request. See
+    `~dasha.web.prerender`.
+
+    ``CALLBACK_LIMITS`` sets the max concurrent calls of the callbacks by
+    their output ids. See `~dasha.web.admission`.
+
+    ``CALLBACK_COALESCE`` is the list of the patterns of the output ids of
+    the callbacks whose identical concurrent calls are run once. See
+    `~dasha.web.coalesce`.
+
+    ``SERVER_STORE`` sets the backend of the values of the server-side data
+    stores. See `~dasha.web.serverstore`.
     """
 
     logger = get_logger()
@@ -70,8 +169,14 @@ class DashA(object):
         self.config = copy.deepcopy(self._dash_config_default)
         rupdate(self.config, config)
         self.dash_app = None
+        self.asset_bundle = None
+        self._layout_json = None
 
     def init_app(self, server):
+        with profile_section('DashA.init_app'):
+            return self._init_app(server)
+
+    def _init_app(self, server):
 
         def extract_args(config, args):
             result = dict()
@@ -89,7 +194,13 @@ class DashA(object):
         def extract_dasha_args(config):
             return extract_args(
                 config,
-                {'DEBUG', 'NO_DEFAULT_STYLESHEETS', 'THEME'})
+                {
+                    'DEBUG', 'NO_DEFAULT_STYLESHEETS', 'THEME',
+                    'LAYOUT_SNAPSHOT_DIR', 'COMPRESSION', 'ASSETS_BUNDLE',
+                    'JSON_ENGINE', 'TYPED_ARRAYS', 'COMPACT_IDS',
+                    'MINIFY_LAYOUT', 'PRERENDER', 'CALLBACK_LIMITS',
+                    'SERVER_STORE', 'CALLBACK_COALESCE',
+                    })
 
         dash_config, config = extract_dash_args(copy.deepcopy(self.config))
         dasha_config, template_config = extract_dasha_args(config)
@@ -113,45 +224,344 @@ class DashA(object):
             suppress_callback_exceptions=True,
             **dash_config
             )
+        # this is read by get_dasha_config.
+        app._dasha_config = dasha_config
+        # this makes resolve_url work for this app in setup_layout.
+        token = _current_dash_app.set(app)
+        try:
+            self._init_dash_app(app, server, dash_config, dasha_config, config)
+        finally:
+            _current_dash_app.reset(token)
+        self.dash_app = app
+        server.extensions.setdefault('dasha', list()).append(self)
+        return server
+
+    def _init_dash_app(
+            self, app, server, dash_config, dasha_config, config):
 
         serve_locally = dash_config["serve_locally"]
         app.scripts.config.serve_locally = serve_locally
         app.css.config.serve_locally = serve_locally
 
         # dev tools
-        if dasha_config.get('DEBUG', False):
+        debug = dasha_config.get('DEBUG', False)
+        if debug:
             app.enable_dev_tools(debug=True),
 
+        json_engine = dasha_config.get('JSON_ENGINE', None)
+        if json_engine is not None:
+            init_json_engine(server, json_engine)
+        compression = init_compression(
+            server, dasha_config.get('COMPRESSION', False))
+        if compression is not None and debug:
+            endpoint = f'{app.config.routes_pathname_prefix}_dasha-compression'
+            server.add_url_rule(
+                endpoint, endpoint=endpoint,
+                view_func=lambda: flask.jsonify(compression.get_stats()))
+        init_vendor(app)
+        typed_arrays = dasha_config.get('TYPED_ARRAYS', False)
+        if typed_arrays:
+            init_typed_arrays(
+                app,
+                **(typed_arrays if isinstance(typed_arrays, dict) else {}))
+        callback_limits = dasha_config.get('CALLBACK_LIMITS', None)
+        if callback_limits:
+            init_callback_limits(app, callback_limits)
+        # this is applied after the limits so the coalesced calls do not
+        # take the slots of the limits.
+        callback_coalesce = dasha_config.get('CALLBACK_COALESCE', None)
+        if callback_coalesce:
+            init_callback_coalescing(app, callback_coalesce)
+        server_store_config = dasha_config.get('SERVER_STORE', None)
+        if server_store_config is not None:
+            server_store.configure(**server_store_config)
+        self.asset_bundle = init_asset_bundle(
+            app, dasha_config.get(
+                'ASSETS_BUNDLE',
+                not debug and os.environ.get('DASHA_HOT_RELOAD') != '1'))
+
+        compact_ids = dasha_config.get('COMPACT_IDS', False)
+        if compact_ids:
+            compactid.install_compact_ids()
+        minify = dasha_config.get('MINIFY_LAYOUT', False)
+
         with server.app_context():
             template = resolve_template(config)
-            with timeit("setup layout"):
+            snapshot_dir = dasha_config.get('LAYOUT_SNAPSHOT_DIR', None)
+            if snapshot_dir is not None:
+                snapshot = LayoutSnapshot(
+                    snapshot_dir,
+                    key=LayoutSnapshot.make_key(
+                        self.config,
+                        module_names=[template.__class__.__module__]))
+            else:
+                snapshot = None
+            with timeit("setup layout"), profile_section('setup_layout'):
                 template.setup_layout(app)
                 # try infer a title if title is not set
                 if app.title is None:
                     app.title = getattr(template, 'title_text', 'Dash App')
-            with timeit('serve layout'):
+            if snapshot is None:
+                with timeit('serve layout'), profile_section('serve layout'):
+                    app.layout = template.layout
+                if minify:
+                    self._minify_layout(app)
+                if not app._layout_is_function:
+                    _replace_view_func(
+                        app, '_dash-layout', _CachedJSONView(
+                            lambda: to_json_plotly(app._layout_value()),
+                            get_version=lambda: app._hot_reload.hash))
+            else:
+                self._setup_layout_snapshot(
+                    app, template, snapshot, minify=minify)
+            if compact_ids:
+                self._report_compact_ids(app)
+            if isinstance(compact_ids, dict) and compact_ids.get(
+                    'debug', False):
+                self._setup_compact_ids_debug(app)
+            _replace_view_func(
+                app, '_dash-dependencies', _CachedJSONView(
+                    lambda: to_json_plotly(app._callback_list),
+                    get_version=lambda: app._hot_reload.hash))
+        prerender = dasha_config.get('PRERENDER', False)
+        if prerender:
+            self._setup_prerender(
+                app, **(prerender if isinstance(prerender, dict) else {}))
+
+    def _minify_layout(self, app):
+        with timeit('minify layout'):
+            layout, stats = minify_layout(app.layout, app._callback_list)
+        app.layout = layout
+        self.logger.info(f"minified layout:\n{pformat_yaml(stats)}")
+
+    def _setup_prerender(self, app, **kwargs):
+        # the page trees fill in the page content of the requested path.
+        from ..templates.multipage import PageTree
+        page_trees = [p for p in PageTree._instances if p._app is app]
+
+        def get_fills(path):
+            fills = dict()
+            for page_tree in page_trees:
+                fills.update(page_tree.get_prerender_fills(path))
+            return fills
+
+        def get_page(path):
+            # only the paths of the pages are rendered with the fills.
+            key = tuple(p.resolve_route_name(path) for p in page_trees)
+            if all(k is None for k in key):
+                return None
+            return key
+
+        init_prerender(
+            app, self.get_layout_json, get_fills=get_fills,
+            get_page=get_page, **kwargs)
+
+    def _report_compact_ids(self, app):
+        with timeit('measure compact ids'):
+            sizes = compactid.measure_compact_ids(
+                layout=self._layout_json or app._layout_value(),
+                dependencies=app._callback_list)
+        self.logger.info(
+            "bytes saved by compact ids:\n" + pformat_yaml({
+                k: {**v, 'saved': v['readable'] - v['compact']}
+                for k, v in sizes.items()}))
+
+    def _setup_compact_ids_debug(self, app):
+        endpoint = f'{app.config.routes_pathname_prefix}_dasha-ids'
+        app.server.add_url_rule(
+            endpoint, endpoint=endpoint,
+            view_func=lambda: flask.jsonify(compactid.get_id_map()))
+
+    def get_layout_json(self):
+        """Return the serialized layout."""
+        if self._layout_json is not None:
+            return self._layout_json
+        return to_json_plotly(self.dash_app._layout_value())
+
+    def layout_hash(self):
+        """Return the content hash of the layout.
+
+        The layout of the same config serializes to the same JSON in any
+        process, so this can be used as the key of caches.
+        """
+        return layout_hash(self.get_layout_json())
+
+    def _setup_layout_snapshot(self, app, template, snapshot, minify=False):
+        # the callbacks are always re-registered by setup_layout
+        # so we can check the snapshot is still valid.
+        callbacks = json.loads(to_json_plotly(app._callback_list))
+        d = snapshot.load()
+        if d is not None and d['callbacks'] == callbacks:
+            self.logger.info(f"use layout snapshot {snapshot.filepath}")
+            layout_json = d['layout']
+            # the components are only re-created when app.layout is read,
+            # e.g., by the layout validation of Dash on the first request.
+            app.layout = self._make_snapshot_layout(template, layout_json)
+        else:
+            with timeit('serve layout'), profile_section('serve layout'):
                 app.layout = template.layout
-        return server
+            if minify:
+                self._minify_layout(app)
+            with timeit('serialize layout'), \
+                    profile_section('serialize layout'):
+                layout_json = to_json_plotly(app.layout)
+            snapshot.save(layout_json, callbacks)
+        self._layout_json = layout_json
+        _replace_view_func(
+            app, '_dash-layout', _CachedJSONView(lambda: self._layout_json))
+
+    def _make_snapshot_layout(self, template, layout_json):
+        cached = list()
+        lock = threading.Lock()
+
+        def get_layout():
+            with lock:
+                if not cached:
+                    try:
+                        cached.append(load_layout(layout_json))
+                    except (TypeError, ValueError) as e:
+                        self.logger.warning(
+                            f"unable to load layout snapshot: {e}")
+                        cached.append(template.layout)
+                return cached[0]
+        return get_layout
+
+
+class _CachedJSONView(object):
+    """A view function that serves the JSON serialized once.
+
+    The response has a strong ETag of the content hash, and 304 is returned
+    when it matches the ``If-None-Match`` of the request.
+
+    Parameters
+    ----------
+    get_json : callable
+        Return the serialized JSON. This is called on the first request.
+    get_version : callable, optional
+        If set, the cached JSON is re-created when the returned value
+        changes.
+    """
+
+    cache_control = 'no-cache'
+    """The browser may store the response but has to re-validate it."""
+
+    def __init__(self, get_json, get_version=None):
+        self._get_json = get_json
+        self._get_version = get_version or (lambda: None)
+        self._lock = threading.Lock()
+        self._cached = None
+
+    def _get_cached(self):
+        version = self._get_version()
+        with self._lock:
+            if self._cached is None or self._cached[0] != version:
+                s = self._get_json()
+                # for the layout this is the same as `DashA.layout_hash`.
+                self._cached = (version, s.encode(), layout_hash(s))
+            return self._cached
+
+    def __call__(self):
+        _, data, etag = self._get_cached()
+        response = flask.Response(data, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = self.cache_control
+        return response.make_conditional(flask.request)
+
+
+def _replace_view_func(app, name, view_func):
+    """Replace the view function of Dash route `name`."""
+    endpoint = app.config.routes_pathname_prefix + name
+    app.server.view_functions[endpoint] = view_func
 
 
 def init_ext(config):
     ext = dasha.__wrapped__ = DashA(config)
+    _pending_instances.append((config, ext))
     return ext
 
 
 def init_app(server, config):
-    return dasha.init_app(server)
+    # the config is matched by identity since the equal configs of multiple
+    # sites can not be told apart otherwise.
+    for i, (c, ext) in enumerate(_pending_instances):
+        if c is config:
+            del _pending_instances[i]
+            break
+    else:
+        raise RuntimeError("DashA init_app is called before init_ext.")
+    return ext.init_app(server)
+
+
+def get_dasha_config(app=None):
+    """Return the DashA config of Dash `app`.
+
+    If `app` is None, the app returned by `get_dash_app` is used. An empty
+    dict is returned if the app is not set up by `DashA`.
+    """
+    if app is None:
+        app = get_dash_app()
+    return getattr(app, '_dasha_config', None) or dict()
+
+
+def get_dasha_instances(server):
+    """Return the `DashA` instances set up on Flask `server`.
+
+    There are more than one when multiple sites are hosted.
+    """
+    return server.extensions.get('dasha', list())
+
+
+def mount_config(config, prefix):
+    """Return the config to serve the Dash app under URL `prefix`.
+
+    This is used when multiple sites are hosted in one server, in which case
+    each site has its own `DashA` instance.
+    """
+    prefix = ensure_prefix(prefix.strip('/') + '/', '/')
+    config = dict(config)
+    config.pop('URL_BASE_PATHNAME', None)
+    config['ROUTES_PATHNAME_PREFIX'] = prefix
+    config['REQUESTS_PATHNAME_PREFIX'] = prefix
+    return config
+
+
+def get_dash_app(fallback=True):
+    """Return the Dash app of the current context.
+
+    This is the app being set up, the only app of the server of the current
+    request, or the app whose URL prefix matches the path of the current
+    request when multiple sites are hosted. Otherwise, `dash_app` is
+    returned, or None if `fallback` is False.
+    """
+    app = _current_dash_app.get()
+    if app is not None:
+        return app
+    if flask.has_request_context():
+        apps = [
+            d.dash_app for d in get_dasha_instances(flask.current_app)
+            if d.dash_app is not None]
+        if len(apps) == 1:
+            return apps[0]
+        path = flask.request.path
+        matched = [
+            a for a in apps
+            if path.startswith(a.config.routes_pathname_prefix or '/')]
+        if matched:
+            return max(
+                matched,
+                key=lambda a: len(a.config.routes_pathname_prefix or '/'))
+    return dash_app if fallback else None
 
 
 def resolve_url(path):
     """Expands an internal URL to include prefix the app is mounted at."""
-    routes_prefix = dash_app.config.routes_pathname_prefix or ''
+    routes_prefix = get_dash_app().config.routes_pathname_prefix or ''
     return f"{routes_prefix}{path}".replace('//', '/')
 
 
 def get_url_stem(path):
     """The inverse of `resolve_url`."""
-    routes_prefix = dash_app.config.routes_pathname_prefix or ''
+    routes_prefix = get_dash_app().config.routes_pathname_prefix or ''
     if routes_prefix == '':
         return path
     routes_prefix = ensure_prefix(routes_prefix.strip('/'), '/')
@@ -1,15 +1,11 @@
 #! /usr/bin/env python
 
 import flask
-from flask_sqlalchemy import SQLAlchemy
-import pandas as pd
-from wrapt import ObjectProxy
+from ...core import ExtensionProxy
 from tollan.utils.log import get_logger
 from tollan.utils.fmt import pformat_yaml
 from collections import UserDict
 from copy import deepcopy
-from sqlalchemy import MetaData
-from tollan.utils.db import SqlaDB
 from tollan.utils.registry import Registry, register_to
 import cachetools.func
 
@@ -19,11 +15,12 @@ __all__ = [
         'DatabaseRuntime']
 
 
-db = ObjectProxy(None)
+db = ExtensionProxy(__name__)
 """A proxy to the `~flask_sqlalchemy.SQLAlchemy` instance."""
 
 
 def init_ext(config):
+    from flask_sqlalchemy import SQLAlchemy
     ext = db.__wrapped__ = SQLAlchemy()
     return ext
 
@@ -79,6 +76,31 @@ def init_app(server, config):
             post_init_app()
 
 
+def post_fork(server, config):
+    """Reset the connection pools of `~dasha.web.extensions.db.db` in a
+    forked child process.
+
+    The connections are dropped without closing, since they are still in use
+    by the parent process.
+    """
+    binds = [None] + list(server.config.get('SQLALCHEMY_BINDS', None) or [])
+    for bind in binds:
+        engine = db.get_engine(server, bind)
+        try:
+            engine.dispose(close=False)
+        except TypeError:
+            # sqlalchemy<1.4.33 does not support close=False
+            engine.pool = engine.pool.recreate()
+
+
+def teardown(server, config):
+    """Close the connections in the pools of
+    `~dasha.web.extensions.db.db`."""
+    binds = [None] + list(server.config.get('SQLALCHEMY_BINDS', None) or [])
+    for bind in binds:
+        db.get_engine(server, bind).dispose()
+
+
 def get_db_engine(bind, server=None):
     """Return the database engine for `bind`."""
     if server is None:
@@ -88,6 +110,7 @@ def get_db_engine(bind, server=None):
 
 def get_db_metadata(bind, server=None):
     """Return the database metadata for `bind`."""
+    from sqlalchemy import MetaData
     metadata = MetaData()
     metadata.reflect(bind=get_db_engine(bind, server))
     return metadata
@@ -129,6 +152,7 @@ def dataframe_from_db(query, bind=None, session=None, **kwargs):
     parse_dates = [
             'Date', 'DateTime' 'created_at', 'updated_at'
             ] + kwargs.pop('parse_dates', list())
+    import pandas as pd
     return pd.read_sql_query(
             query,
             # con=session.get_bind(),
@@ -225,6 +249,7 @@ class DatabaseRuntime(UserDict):
 
     @classmethod
     def _get_sqladb(cls, bind, raise_on_error=True):
+        from tollan.utils.db import SqlaDB
         try:
             result = SqlaDB.from_flask_sqla(db, bind=bind)
         except Exception as e:
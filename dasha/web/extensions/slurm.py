@@ -1,21 +1,19 @@
 #! /usr/bin/env python
 
-from wrapt import ObjectProxy
-import requests
+from ...core import ExtensionProxy
 from urllib.parse import urljoin
 import functools
-import pandas as pd
 from pathlib import Path
 from io import StringIO
-from fabric import Connection
 import uuid
+import weakref
 
 __all__ = [
         'slurm_api',
         ]
 
 
-slurm_api = ObjectProxy(None)
+slurm_api = ExtensionProxy(__name__)
 """A proxy to the `SlurmAPI` instance."""
 
 
@@ -61,6 +59,7 @@ class SlurmRestAPI(SlurmAPI):
         headers = self._make_auth_header()
         url = self._make_url(endpoint)
         try:
+            import requests
             resp = requests.get(url, params=params, headers=headers)
             if resp.status_code >= 300:
                 if resp.text:
@@ -102,6 +101,7 @@ class SlurmRestAPI(SlurmAPI):
         headers = self._make_auth_header()
         url = self._make_url(endpoint)
         try:
+            import requests
             resp = requests.post(
                 url, data=data, params=params, files=files, headers=headers)
             if resp.status_code >= 300:
@@ -122,9 +122,17 @@ class SlurmRestAPI(SlurmAPI):
         return NotImplemented
 
 
+def _read_table(s):
+    """Return the table from the ``|`` separated SLURM output `s`."""
+    import pandas as pd
+    return pd.read_csv(StringIO(s), sep='|')
+
+
 class SlurmOnSSH(object):
     """A class to interact with SLURM using SSH"""
 
+    _connections = weakref.WeakSet()
+
     def __init__(self, remote_host, partition=None, chdir=None):
         self._remote_host = remote_host
         self._partition = partition
@@ -132,7 +140,9 @@ class SlurmOnSSH(object):
 
     def create_connection(self, open=True):
         """Return a new connection to the remote."""
+        from fabric import Connection
         conn = Connection(self._remote_host)
+        self._connections.add(conn)
         if open:
             conn.open()
         return conn
@@ -185,7 +195,7 @@ class SlurmOnSSH(object):
         result = conn.run(cmd, hide=True)
         stdout = result.stdout
         # load the table as csv
-        df = pd.read_csv(StringIO(stdout), sep='|')
+        df = _read_table(stdout)
         return df
 
     def get_queue_info(self, _conn_key='get_queue_info'):
@@ -195,7 +205,7 @@ class SlurmOnSSH(object):
         result = conn.run(cmd, hide=True)
         stdout = result.stdout
         # load the table as csv
-        df = pd.read_csv(StringIO(stdout), sep='|')
+        df = _read_table(stdout)
         return df
 
     def get_job_info(self, job_id, show_steps=True, _conn_key='get_job_info'):
@@ -207,7 +217,7 @@ class SlurmOnSSH(object):
         result = conn.run(cmd, hide=True)
         stdout = result.stdout
         # load the table as csv
-        df = pd.read_csv(StringIO(stdout), sep='|')
+        df = _read_table(stdout)
         if show_steps:
             return df
         # return the record for the job as dict
@@ -301,3 +311,17 @@ def init_app(server, config):
     """Setup `~dasha.web.extensions.slurm.slurm_api` for `server`.
     """
     pass
+
+
+def post_fork(server, config):
+    """Drop the SSH connections inherited from the parent process."""
+    SlurmOnSSH.get_or_create_connection.cache_clear()
+    # so they are not closed by teardown in this process.
+    SlurmOnSSH._connections.clear()
+
+
+def teardown(server, config):
+    """Close the SSH connections."""
+    SlurmOnSSH.get_or_create_connection.cache_clear()
+    for conn in list(SlurmOnSSH._connections):
+        conn.close()
@@ -0,0 +1,171 @@
+#! /usr/bin/env python
+
+"""The JSON engine used to serialize the Dash payloads.
+
+The Dash callback responses and the layout are serialized with
+`plotly.io.json.to_json_plotly`, and the callback requests are parsed by
+the JSON provider of the flask server. `init_json_engine` sets both to the
+engine specified by the ``JSON_ENGINE`` config of the DashA extension:
+
+* ``json``: The built-in `json` module.
+* ``orjson``: The `orjson` package, which handles numpy arrays, pandas
+  objects and datetimes natively and is several times faster.
+* ``auto``: ``orjson`` if installed, otherwise ``json``.
+
+Run ``python -m dasha.web.json_engine`` to compare the engines on figures
+like those produced by the ``PlotPanel`` example.
+"""
+
+import time
+import importlib.util
+
+from tollan.utils.log import get_logger
+
+
+__all__ = ['init_json_engine', 'resolve_json_engine', 'benchmark']
+
+
+_engines = ('json', 'orjson', 'auto')
+
+
+def resolve_json_engine(engine):
+    """Return the actual engine to use for `engine`."""
+    logger = get_logger()
+    if engine not in _engines:
+        raise ValueError(
+            f"invalid JSON engine {engine}, choose from {_engines}")
+    has_orjson = importlib.util.find_spec('orjson') is not None
+    if engine == 'auto':
+        return 'orjson' if has_orjson else 'json'
+    if engine == 'orjson' and not has_orjson:
+        logger.warning("orjson is not installed, use json instead")
+        return 'json'
+    return engine
+
+
+def _make_orjson_provider_cls():
+    import orjson
+    from flask.json.provider import DefaultJSONProvider
+
+    class OrjsonProvider(DefaultJSONProvider):
+        """The flask JSON provider that uses orjson."""
+
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+        def dumps(self, obj, **kwargs):
+            option = self.option
+            if kwargs.pop('indent', None):
+                option |= orjson.OPT_INDENT_2
+            if kwargs.pop('sort_keys', self.sort_keys):
+                option |= orjson.OPT_SORT_KEYS
+            # orjson output is always compact.
+            kwargs.pop('separators', None)
+            default = kwargs.pop('default', self.default)
+            if kwargs:
+                return super().dumps(obj, **kwargs)
+            return orjson.dumps(obj, default=default, option=option).decode()
+
+        def loads(self, s, **kwargs):
+            if kwargs:
+                return super().loads(s, **kwargs)
+            return orjson.loads(s)
+
+    return OrjsonProvider
+
+
+def init_json_engine(server, engine):
+    """Use JSON `engine` for the Dash payloads of `server`.
+
+    Parameters
+    ----------
+    server : `~flask.Flask`
+        The flask server.
+    engine : str
+        One of ``json``, ``orjson`` and ``auto``.
+
+    Returns
+    -------
+    str
+        The engine used.
+    """
+    import plotly.io.json
+    logger = get_logger()
+    engine = resolve_json_engine(engine)
+    plotly.io.json.config.default_engine = engine
+    if engine == 'orjson':
+        try:
+            provider_cls = _make_orjson_provider_cls()
+        except ImportError:
+            # flask < 2.2 does not have the JSON provider.
+            logger.warning(
+                "unable to use orjson to parse the requests with "
+                "this version of flask")
+        else:
+            server.json_provider_class = provider_cls
+            server.json = provider_cls(server)
+    logger.info(f"use JSON engine {engine}")
+    return engine
+
+
+def make_benchmark_figure(n_traces=4, n_points=10000):
+    """Return a figure of subplots of scatter traces of numpy arrays and
+    the literal children, similar to the ``PlotPanel`` callback output."""
+    import numpy as np
+    import pandas as pd
+    from plotly.subplots import make_subplots
+    from dash import html
+    rng = np.random.default_rng(0)
+    fig = make_subplots(n_traces, 1)
+    t = pd.date_range('2022-01-01', periods=n_points, freq='s')
+    for i in range(n_traces):
+        fig.add_scatter(
+            x=t, y=rng.normal(size=n_points), mode='lines',
+            name=f'trace {i}', row=i + 1, col=1)
+    children = [html.Pre(f'value {i}: {i * 0.1}') for i in range(10)]
+    return [children, fig]
+
+
+def benchmark(
+        engines=('json', 'orjson'), n_traces=4, n_points=10000,
+        n_repeat=10):
+    """Return the mean seconds to serialize the benchmark figure per
+    engine, and to parse the result with the flask JSON provider.
+
+    Parameters
+    ----------
+    engines : list of str
+        The engines to compare. Those not installed are skipped.
+    """
+    import flask
+    import plotly.io.json
+    from plotly.io.json import to_json_plotly
+    value = make_benchmark_figure(n_traces=n_traces, n_points=n_points)
+    result = dict()
+    default_engine = plotly.io.json.config.default_engine
+    try:
+        for engine in engines:
+            if resolve_json_engine(engine) != engine:
+                continue
+            server = flask.Flask(__name__)
+            init_json_engine(server, engine)
+            s = to_json_plotly(value, engine=engine)
+            t0 = time.perf_counter()
+            for _ in range(n_repeat):
+                s = to_json_plotly(value, engine=engine)
+            t1 = time.perf_counter()
+            for _ in range(n_repeat):
+                server.json.loads(s)
+            t2 = time.perf_counter()
+            result[engine] = {
+                'size': len(s),
+                'dumps': (t1 - t0) / n_repeat,
+                'loads': (t2 - t1) / n_repeat,
+                }
+    finally:
+        plotly.io.json.config.default_engine = default_engine
+    return result
+
+
+if __name__ == "__main__":
+    from tollan.utils.fmt import pformat_yaml
+    print(pformat_yaml(benchmark()))
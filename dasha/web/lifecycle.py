@@ -0,0 +1,220 @@
+#! /usr/bin/env python
+
+"""The lifecycle management of DashA server processes.
+
+The `Lifecycle` instance `lifecycle` tracks the in-flight requests via a
+WSGI middleware installed in `~dasha.web.create_app`. On shutdown, it
+stops accepting new requests (they get 503 so the load balancer retries
+elsewhere), waits for the running ones up to a deadline, and then closes the
+resources registered in `~dasha.web.exit_stack`.
+
+The health check path ``/_dasha-health`` returns 200 when the process
+accepts requests and 503 otherwise.
+
+With gunicorn (see `~dasha.web.serve`), the workers are replaced in place
+by the master on SIGHUP. A worker stops accepting requests as soon as it is
+told to exit, so the health check fails and the push streams end, while
+gunicorn waits for the in-flight requests. With the single
+process servers, SIGTERM and SIGINT drain and exit, and SIGHUP drains and
+re-executes the process.
+"""
+
+import os
+import sys
+import time
+import signal
+import threading
+
+from tollan.utils.log import get_logger
+from werkzeug.wsgi import ClosingIterator
+
+
+__all__ = ['Lifecycle', 'lifecycle']
+
+
+class Lifecycle(object):
+    """A class to track the in-flight requests and drain them on shutdown.
+
+    Parameters
+    ----------
+    drain_timeout : float
+        The max seconds to wait for the in-flight requests.
+    health_path : str
+        The URL path that reports the state.
+    """
+
+    logger = get_logger()
+
+    def __init__(self, drain_timeout=30., health_path='/_dasha-health'):
+        self.drain_timeout = drain_timeout
+        self.health_path = health_path
+        self._cond = threading.Condition()
+        self._n_inflight = 0
+        self._state = 'running'
+        self._restart = False
+
+    @property
+    def state(self):
+        """One of ``running``, ``draining``, and ``stopped``."""
+        return self._state
+
+    @property
+    def n_inflight(self):
+        """The number of requests being processed."""
+        return self._n_inflight
+
+    @property
+    def accepting(self):
+        """True if new requests are accepted."""
+        return self._state == 'running'
+
+    def _enter(self):
+        with self._cond:
+            if not self.accepting:
+                return False
+            self._n_inflight += 1
+            return True
+
+    def _exit(self):
+        with self._cond:
+            self._n_inflight -= 1
+            self._cond.notify_all()
+
+    def wrap(self, wsgi_app):
+        """Return `wsgi_app` wrapped to track the in-flight requests."""
+        return _LifecycleMiddleware(wsgi_app, self)
+
+    def stop_accepting(self):
+        """Stop accepting new requests without waiting.
+
+        This is safe to call in signal handlers.
+        """
+        if self._state == 'running':
+            self._state = 'draining'
+
+    def drain(self, timeout=None):
+        """Stop accepting requests and wait for the in-flight ones.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            The max seconds to wait. Default is :attr:`drain_timeout`.
+
+        Returns
+        -------
+        bool
+            True if all requests finished in time.
+        """
+        if timeout is None:
+            timeout = self.drain_timeout
+        t0 = time.monotonic()
+        with self._cond:
+            self.stop_accepting()
+            n = self._n_inflight
+            self.logger.info(
+                f"draining {n} in-flight requests, timeout={timeout}s")
+            done = self._cond.wait_for(
+                lambda: self._n_inflight == 0, timeout=timeout)
+            n_left = self._n_inflight
+        if done:
+            self.logger.info(
+                f"drained in {time.monotonic() - t0:.3f}s")
+        else:
+            self.logger.warning(
+                f"drain timed out with {n_left} requests in flight")
+        return done
+
+    def close(self):
+        """Close the resources registered in `~dasha.web.exit_stack`."""
+        from . import exit_stack
+        self._state = 'stopped'
+        exit_stack.close()
+
+    def shutdown(self, timeout=None):
+        """Drain the requests and close the resources."""
+        done = self.drain(timeout=timeout)
+        self.close()
+        return done
+
+    @property
+    def restart_requested(self):
+        """True if SIGHUP is received."""
+        return self._restart
+
+    def install_signal_handlers(self, stop_server):
+        """Handle the signals for the single process servers.
+
+        SIGTERM and SIGINT drain the requests and stop the server. SIGHUP
+        does the same but sets :attr:`restart_requested` so that the caller
+        can re-execute the process via :meth:`restart`. SIGHUP is not
+        handled on windows.
+
+        Parameters
+        ----------
+        stop_server : callable
+            The function to stop the server, which makes the serving call
+            in the main thread return.
+        """
+        def _stop():
+            self.drain()
+            stop_server()
+
+        def _handler(signum, frame):
+            if self._state != 'running':
+                return
+            self.logger.info(f"received {signal.Signals(signum).name}")
+            self._restart = signum == sighup
+            # drain in a thread, because the server may need the main
+            # thread to finish the in-flight requests.
+            threading.Thread(
+                target=_stop, name='dasha_drain', daemon=True).start()
+
+        # there is no SIGHUP on windows.
+        sighup = getattr(signal, 'SIGHUP', None)
+        for signum in (signal.SIGTERM, signal.SIGINT, sighup):
+            if signum is not None:
+                signal.signal(signum, _handler)
+
+    def restart(self):
+        """Re-execute the process with the same arguments."""
+        self.logger.info("restart")
+        spec = getattr(sys.modules['__main__'], '__spec__', None)
+        if spec is not None:
+            args = ['-m', spec.name] + sys.argv[1:]
+        else:
+            args = sys.argv
+        os.execv(sys.executable, [sys.executable] + args)
+
+
+class _LifecycleMiddleware(object):
+    """The WSGI middleware that counts the in-flight requests."""
+
+    def __init__(self, app, lifecycle):
+        self.app = app
+        self.lifecycle = lifecycle
+
+    def __call__(self, environ, start_response):
+        lifecycle = self.lifecycle
+        if environ.get('PATH_INFO', None) == lifecycle.health_path:
+            status = '200 OK' if lifecycle.accepting else \
+                '503 Service Unavailable'
+            start_response(status, [('Content-Type', 'text/plain')])
+            return [lifecycle.state.encode()]
+        if not lifecycle._enter():
+            start_response('503 Service Unavailable', [
+                ('Content-Type', 'text/plain'),
+                ('Retry-After', '1'),
+                ])
+            return [lifecycle.state.encode()]
+        try:
+            result = self.app(environ, start_response)
+        except BaseException:
+            lifecycle._exit()
+            raise
+        # the request is done when the response is closed by the server.
+        return ClosingIterator(result, lifecycle._exit)
+
+
+lifecycle = Lifecycle(
+    drain_timeout=float(os.environ.get('DASHA_DRAIN_TIMEOUT', 30.)))
+"""The `Lifecycle` instance of this process."""
@@ -0,0 +1,93 @@
+#! /usr/bin/env python
+
+"""A minimal registry of counters for the DashA server internals.
+
+The counters are per process. Use `metrics.snapshot` to get the values.
+"""
+
+import threading
+from tollan.utils.fmt import pformat_yaml
+
+
+__all__ = ['Counter', 'MetricsRegistry', 'metrics']
+
+
+class Counter(object):
+    """A thread-safe counter.
+
+    Parameters
+    ----------
+    name : str
+        The name of the counter.
+    description : str, optional
+        The description of the counter.
+    """
+
+    def __init__(self, name, description=None):
+        self.name = name
+        self.description = description
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.name}={self._value})'
+
+    @property
+    def value(self):
+        return self._value
+
+    def inc(self, n=1):
+        """Increase the counter by `n`."""
+        with self._lock:
+            self._value += n
+
+    def reset(self):
+        with self._lock:
+            self._value = 0
+
+
+class MetricsRegistry(object):
+    """A class to hold the counters by name."""
+
+    def __init__(self):
+        self._counters = dict()
+        self._lock = threading.Lock()
+
+    def counter(self, name, description=None):
+        """Return the counter `name`, which is created if not exist."""
+        with self._lock:
+            counter = self._counters.get(name, None)
+            if counter is None:
+                counter = self._counters[name] = Counter(
+                    name, description=description)
+            return counter
+
+    def snapshot(self, prefix=None):
+        """Return the counter values as dict.
+
+        Parameters
+        ----------
+        prefix : str, optional
+            If set, only the counters with names starting with `prefix`
+            are returned.
+        """
+        with self._lock:
+            counters = list(self._counters.values())
+        return {
+            c.name: c.value for c in counters
+            if prefix is None or c.name.startswith(prefix)
+            }
+
+    def report(self):
+        """Return the counter values as formatted text."""
+        return pformat_yaml(self.snapshot())
+
+    def reset(self):
+        with self._lock:
+            counters = list(self._counters.values())
+        for c in counters:
+            c.reset()
+
+
+metrics = MetricsRegistry()
+"""The `MetricsRegistry` instance of this process."""
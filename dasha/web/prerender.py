@@ -0,0 +1,284 @@
+#! /usr/bin/env python
+
+"""The static HTML of the layout in the index page.
+
+By default, the index page of a Dash app is empty until the renderer is
+loaded and the layout is fetched from ``_dash-layout``. For multipage
+templates like ``SlapDash``, the page content is only rendered after that
+by the callback of ``dcc.Location``.
+
+When enabled by the ``PRERENDER`` config of the DashA extension,
+`init_prerender` puts the static HTML of the layout, with the content of
+the page of the requested path filled in, into the index page. This is
+shown before the scripts are loaded, and is replaced when the renderer
+renders the layout. The HTML approximates the rendering of the components
+of ``dash.html``, and of the ``dash_bootstrap_components`` components used
+for the page structures. Other components are rendered as plain divs of
+their children.
+
+The index page also has preload links to ``_dash-layout`` and
+``_dash-dependencies`` so they are fetched along with the scripts.
+
+The config is True, or a dict of the keyword arguments to `init_prerender`
+(``cache`` and ``cache_size``). The rendered HTML is cached per page, so
+the sites whose layouts depend on the request, e.g., on the user logged in
+via the auth extension, have to set ``cache`` to False.
+"""
+
+import re
+import json
+import threading
+from html import escape
+from collections import OrderedDict
+
+import flask
+from plotly.io.json import to_json_plotly
+from tollan.utils.log import get_logger
+
+
+__all__ = ['render_html', 'init_prerender']
+
+
+_void_tags = {'area', 'br', 'col', 'hr', 'img', 'input', 'source', 'wbr'}
+
+_html_attrs = {
+    'className': 'class', 'htmlFor': 'for', 'colSpan': 'colspan',
+    'rowSpan': 'rowspan', 'href': 'href', 'src': 'src', 'alt': 'alt',
+    'title': 'title', 'target': 'target', 'rel': 'rel', 'role': 'role',
+    'type': 'type', 'name': 'name', 'value': 'value',
+    'placeholder': 'placeholder', 'width': 'width', 'height': 'height',
+    'disabled': 'disabled', 'hidden': 'hidden',
+    }
+
+_unitless_styles = {
+    'flex', 'flexGrow', 'flexShrink', 'fontWeight', 'lineHeight', 'opacity',
+    'order', 'zIndex', 'zoom',
+    }
+
+_hidden_components = {
+    ('dash_core_components', 'Location'), ('dash_core_components', 'Store'),
+    ('dash_core_components', 'Interval'),
+    ('dash_core_components', 'Download'),
+    }
+
+
+def _render_style(style):
+    items = list()
+    for k, v in style.items():
+        if isinstance(v, (int, float)) and not isinstance(v, bool) and \
+                k not in _unitless_styles:
+            v = f'{v}px'
+        name = k if '-' in k else re.sub(r'([A-Z])', r'-\1', k).lower()
+        items.append(f'{name}: {v}')
+    return '; '.join(items)
+
+
+def _render_attrs(attrs):
+    items = list()
+    for k, v in attrs.items():
+        if v is None or v is False or v == '':
+            continue
+        if k == 'style':
+            v = _render_style(v)
+        if v is True:
+            items.append(f' {k}')
+        else:
+            items.append(f' {k}="{escape(str(v))}"')
+    return ''.join(items)
+
+
+def _classes(*args):
+    return ' '.join(a for a in args if a)
+
+
+def _get_dbc_tag_attrs(type_, props):
+    cls = props.get('className', None)
+    if type_ == 'Container':
+        return 'div', _classes(
+            'container-fluid' if props.get('fluid') else 'container', cls)
+    if type_ == 'Row':
+        align = props.get('align', None)
+        justify = props.get('justify', None)
+        return 'div', _classes(
+            'row',
+            align and f'align-items-{align}',
+            justify and f'justify-content-{justify}', cls)
+    if type_ == 'Col':
+        classes = list()
+        for bp in ('width', 'xs', 'sm', 'md', 'lg', 'xl', 'xxl'):
+            size = props.get(bp, None)
+            if isinstance(size, dict):
+                size = size.get('size', None)
+            if size is None:
+                continue
+            infix = '' if bp in ('width', 'xs') else f'-{bp}'
+            classes.append(
+                f'col{infix}' if size is True else f'col{infix}-{size}')
+        return 'div', _classes(*(classes or ['col']), cls)
+    if type_ == 'Nav':
+        return 'div', _classes(
+            'nav', props.get('vertical') and 'flex-column',
+            props.get('pills') and 'nav-pills', cls)
+    if type_ == 'NavLink':
+        return 'a', _classes(
+            'nav-link', props.get('active') is True and 'active', cls)
+    if type_ == 'Button':
+        return 'button', _classes(
+            'btn', f"btn-{props.get('color', None) or 'primary'}",
+            props.get('size') and f"btn-{props['size']}", cls)
+    if type_ == 'Collapse':
+        return 'div', _classes(
+            'collapse', props.get('is_open') and 'show', cls)
+    simple = {
+        'NavItem': 'nav-item', 'Card': 'card', 'CardBody': 'card-body',
+        'CardHeader': 'card-header', 'CardFooter': 'card-footer',
+        'Alert': 'alert', 'Badge': 'badge', 'Label': 'form-label',
+        }
+    return 'div', _classes(simple.get(type_, None), cls)
+
+
+def _render(layout, fills):
+    if layout is None or isinstance(layout, bool):
+        return ''
+    if isinstance(layout, (list, tuple)):
+        return ''.join(_render(c, fills) for c in layout)
+    if not isinstance(layout, dict):
+        return escape(str(layout))
+    namespace = layout.get('namespace', None)
+    type_ = layout.get('type', None)
+    props = layout.get('props', dict())
+    if (namespace, type_) in _hidden_components:
+        return ''
+    id = props.get('id', None)
+    if not isinstance(id, str):
+        id = None
+    children = props.get('children', None)
+    if id is not None and id in fills:
+        children = fills[id]
+    if namespace == 'dash_html_components':
+        tag = type_.lower()
+        attrs = {'id': id}
+        for k, v in props.items():
+            if k in _html_attrs:
+                attrs[_html_attrs[k]] = v
+            elif k == 'style' or k.startswith(('data-', 'aria-')):
+                attrs[k] = v
+    elif namespace == 'dash_bootstrap_components':
+        tag, cls = _get_dbc_tag_attrs(type_, props)
+        attrs = {
+            'id': id, 'class': cls, 'style': props.get('style', None),
+            'href': props.get('href', None) if tag == 'a' else None,
+            }
+    else:
+        tag = 'a' if type_ == 'Link' else 'div'
+        attrs = {
+            'id': id, 'class': props.get('className', None),
+            'style': props.get('style', None),
+            'href': props.get('href', None) if tag == 'a' else None,
+            }
+    if tag in _void_tags:
+        return f'<{tag}{_render_attrs(attrs)}>'
+    return (
+        f'<{tag}{_render_attrs(attrs)}>'
+        f'{_render(children, fills)}</{tag}>')
+
+
+def render_html(layout, fills=None):
+    """Return the static HTML of `layout`.
+
+    Parameters
+    ----------
+    layout : `~dash.development.base_component.Component`, dict or str
+        The layout, or its JSON serialization as str or parsed.
+    fills : dict, optional
+        The children to use in place of those of the components, keyed by
+        the component ids.
+    """
+    if isinstance(layout, str):
+        layout = json.loads(layout)
+    elif not isinstance(layout, (dict, list)):
+        layout = json.loads(to_json_plotly(layout))
+    if fills is None:
+        fills = dict()
+    fills = {
+        k: v if isinstance(v, (dict, str)) or v is None
+        else json.loads(to_json_plotly(v))
+        for k, v in fills.items()
+        }
+    return _render(layout, fills)
+
+
+def init_prerender(
+        app, get_layout_json, get_fills=None, get_page=None, cache=True,
+        cache_size=64):
+    """Put the static HTML of the layout in the index page of Dash `app`.
+
+    Parameters
+    ----------
+    app : `~dash.Dash`
+        The Dash app.
+    get_layout_json : callable
+        Return the serialized layout.
+    get_fills : callable, optional
+        Called with the request path to return the ``fills`` passed to
+        `render_html`, e.g., the content of the page of the path.
+    get_page : callable, optional
+        Called with the request path to return the hashable key of the page
+        of the path, or None if the path is not a page, in which case the
+        layout is rendered without the fills. This is the cache key, so the
+        cache is not filled by arbitrary paths. Default is to use the path.
+    cache : bool
+        If False, the HTML is rendered for every request. This is needed if
+        the layout or the fills depend on the request, e.g., the user.
+    cache_size : int
+        The number of pages to keep the rendered HTML for.
+    """
+    logger = get_logger()
+    lock = threading.Lock()
+    results = OrderedDict()
+    # the hash of the hot reload is None when it is not enabled.
+    state = {'layout': None, 'version': object()}
+    interpolate_index = app.interpolate_index
+
+    def get_html(path):
+        version = app._hot_reload.hash
+        key = get_page(path) if get_page is not None else path
+        with lock:
+            if state['version'] != version:
+                results.clear()
+                state['layout'] = json.loads(get_layout_json())
+                state['version'] = version
+            if cache and key in results:
+                results.move_to_end(key)
+                return results[key]
+            layout = state['layout']
+        if get_fills is not None and key is not None:
+            fills = get_fills(path)
+        else:
+            fills = None
+        result = render_html(layout, fills=fills)
+        if cache:
+            with lock:
+                results[key] = result
+                while len(results) > cache_size:
+                    results.popitem(last=False)
+        return result
+
+    def prerender_interpolate_index(**kwargs):
+        prefix = app.config.requests_pathname_prefix
+        try:
+            html = get_html(flask.request.path)
+        except Exception:
+            logger.error("unable to prerender the layout", exc_info=True)
+        else:
+            kwargs['app_entry'] = (
+                f'<div id="react-entry-point">{html}</div>')
+        kwargs['metas'] = kwargs.get('metas', '') + ''.join(
+            f'<link rel="preload" href="{prefix}{name}" as="fetch" '
+            f'crossorigin="anonymous">'
+            for name in ('_dash-layout', '_dash-dependencies'))
+        return interpolate_index(**kwargs)
+
+    app.interpolate_index = prerender_interpolate_index
+    logger.info(f"prerender the layout in the index page, cache={cache}")
+    return app
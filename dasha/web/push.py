@@ -0,0 +1,254 @@
+#! /usr/bin/env python
+
+"""The server-sent events to push updates to the browsers.
+
+A `Channel` computes its value once per interval, in a thread that runs
+only while there are subscribers, and broadcasts it to all of them. The
+browsers subscribe via the ``_dasha-push/<name>`` route, which streams the
+messages as server-sent events. The template
+`~dasha.web.templates.pushchannel.PushChannel` sets the route up and
+feeds the values to the components on the client side, so the server
+work does not grow with the number of viewers.
+
+Each open stream holds a server thread for as long as the tab is open. With
+a fixed size thread pool (the gunicorn ``gthread`` workers and waitress),
+the streams beyond the pool size leave no thread for the callbacks, so
+``DASHA_SERVE_THREADS`` has to be larger than the expected number of viewers
+per worker, or gunicorn has to use an async worker class via
+``DASHA_SERVE_WORKER_CLASS`` (e.g., ``gevent``). `~dasha.web.serve` warns
+about this at startup.
+
+The channels are per process. The streams are closed when the process stops
+accepting requests (see `~dasha.web.lifecycle`), and the browsers reconnect
+to the other processes.
+"""
+
+import time
+import queue
+import threading
+
+import flask
+from plotly.io.json import to_json_plotly
+from tollan.utils.log import get_logger
+
+from .lifecycle import lifecycle
+from .metrics import metrics
+
+
+__all__ = ['Channel', 'PushBroker', 'push_broker']
+
+
+class Channel(object):
+    """A named source of updates pushed to the subscribers.
+
+    Parameters
+    ----------
+    name : str
+        The name of the channel.
+    func : callable
+        Called with no argument to return the value to push, which has to
+        be serializable by `~plotly.io.json.to_json_plotly`.
+    interval : float
+        The seconds between the updates.
+    maxsize : int
+        The max number of messages queued per subscriber. The oldest ones
+        are dropped for the slow subscribers.
+    """
+
+    logger = get_logger()
+
+    def __init__(self, name, func, interval=1., maxsize=16):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.maxsize = maxsize
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._seq = 0
+        self._message = None
+
+    def __repr__(self):
+        return (
+            f'{self.__class__.__name__}({self.name}, '
+            f'interval={self.interval}, '
+            f'n_subscribers={self.n_subscribers})')
+
+    @property
+    def n_subscribers(self):
+        """The number of subscribers."""
+        return len(self._subscribers)
+
+    def subscribe(self):
+        """Return a queue that gets the messages.
+
+        The last message is put in the queue right away.
+        """
+        q = queue.Queue(maxsize=self.maxsize)
+        with self._lock:
+            if self._message is not None:
+                q.put_nowait(self._message)
+            self._subscribers.add(q)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=f'dasha_push_{self.name}',
+                    daemon=True)
+                self._thread.start()
+        metrics.counter('push.n_subscribers').inc()
+        return q
+
+    def unsubscribe(self, q):
+        """Remove the subscriber queue `q`."""
+        with self._lock:
+            if q not in self._subscribers:
+                return
+            self._subscribers.discard(q)
+        metrics.counter('push.n_subscribers').inc(-1)
+
+    def update(self):
+        """Compute the value and broadcast it to the subscribers.
+
+        Returns
+        -------
+        str
+            The message sent.
+        """
+        t0 = time.time()
+        value = to_json_plotly(self.func())
+        with self._lock:
+            seq = self._seq
+            self._seq += 1
+            message = (
+                f'id: {seq}\ndata: '
+                f'{{"seq": {seq}, "time": {t0}, "value": {value}}}\n\n')
+            self._message = message
+            subscribers = list(self._subscribers)
+        n_dropped = 0
+        for q in subscribers:
+            while True:
+                try:
+                    q.put_nowait(message)
+                    break
+                except queue.Full:
+                    try:
+                        q.get_nowait()
+                        n_dropped += 1
+                    except queue.Empty:
+                        pass
+        metrics.counter('push.n_updates').inc()
+        metrics.counter('push.n_messages').inc(len(subscribers))
+        if n_dropped:
+            metrics.counter('push.n_dropped').inc(n_dropped)
+        return message
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            t0 = time.monotonic()
+            try:
+                self.update()
+            except Exception:
+                self.logger.error(
+                    f"unable to update channel {self.name}", exc_info=True)
+            time.sleep(max(self.interval - (time.monotonic() - t0), 0.))
+
+    def iter_stream(self, heartbeat=15., poll=1.):
+        """Return a generator of the messages as server-sent events.
+
+        The generator ends when the process stops accepting requests.
+
+        Parameters
+        ----------
+        heartbeat : float
+            The seconds between the comments sent to keep the connection.
+        poll : float
+            The seconds between the checks of the process state.
+        """
+        q = self.subscribe()
+        try:
+            yield 'retry: 3000\n\n'
+            t_sent = time.monotonic()
+            while lifecycle.accepting:
+                try:
+                    yield q.get(timeout=poll)
+                    t_sent = time.monotonic()
+                except queue.Empty:
+                    if time.monotonic() - t_sent > heartbeat:
+                        yield ': heartbeat\n\n'
+                        t_sent = time.monotonic()
+        finally:
+            self.unsubscribe(q)
+
+
+class PushBroker(object):
+    """A class to hold the channels and serve the streams."""
+
+    logger = get_logger()
+
+    url_path = '_dasha-push/'
+
+    def __init__(self):
+        self._channels = dict()
+        self._lock = threading.Lock()
+        self._n_routes = 0
+
+    @property
+    def enabled(self):
+        """True if the route of the streams is added to any app."""
+        return self._n_routes > 0
+
+    def add_channel(self, name, func, interval=1., **kwargs):
+        """Return the channel `name`.
+
+        The channel is created if not exist, otherwise its `func` and
+        `interval` are replaced, e.g., when the page that adds it is
+        rebuilt. `kwargs` are passed to `Channel`.
+        """
+        with self._lock:
+            channel = self._channels.get(name, None)
+            if channel is None:
+                channel = self._channels[name] = Channel(
+                    name, func, interval=interval, **kwargs)
+                self.logger.debug(f"add push channel {channel}")
+            else:
+                channel.func = func
+                channel.interval = interval
+            return channel
+
+    def get_channel(self, name):
+        """Return the channel `name`."""
+        return self._channels[name]
+
+    def get_url(self, app, name):
+        """Return the URL of the stream of channel `name` for Dash `app`."""
+        return f'{app.config.requests_pathname_prefix}{self.url_path}{name}'
+
+    def init_app(self, app):
+        """Add the route of the streams to Dash `app`, if not added."""
+        server = app.server
+        rule = f'{app.config.routes_pathname_prefix}{self.url_path}<name>'
+        endpoint = f'{app.config.routes_pathname_prefix}{self.url_path}'
+        if endpoint in server.view_functions:
+            return app
+
+        def serve(name):
+            channel = self._channels.get(name, None)
+            if channel is None:
+                flask.abort(404)
+            response = flask.Response(
+                channel.iter_stream(), mimetype='text/event-stream')
+            response.headers['Cache-Control'] = 'no-cache'
+            # disable the buffering of nginx.
+            response.headers['X-Accel-Buffering'] = 'no'
+            return response
+
+        server.add_url_rule(rule, endpoint=endpoint, view_func=serve)
+        self._n_routes += 1
+        return app
+
+
+push_broker = PushBroker()
+"""The `PushBroker` of the process."""
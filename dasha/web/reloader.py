@@ -0,0 +1,184 @@
+#! /usr/bin/env python
+
+"""An incremental reloader for developing DashA sites.
+
+The reloader polls the source files of the site module and the template
+modules of the pages in the `~dasha.web.templates.multipage.PageTree`
+instances. When a page template module changes, the module is reloaded and
+only the pages defined by it are rebuilt, with their callbacks re-registered
+in the running Dash app. The extensions, hence the connections to databases
+or remote hosts, are kept. Changes to the site module restart the process.
+
+The reloader is enabled by setting ``DASHA_HOT_RELOAD=1`` for the
+development server run by the ``dasha`` and ``flask dasha`` commands, in
+which case the werkzeug reloader is not used. Changes to the other modules,
+e.g., the helper modules of the pages, dasha itself, or the extensions, are
+not picked up, so the werkzeug reloader, which restarts the process on any
+change, is the default.
+"""
+
+import os
+import sys
+import time
+import threading
+import importlib
+from pathlib import Path
+
+from tollan.utils.log import get_logger
+
+from .templates.multipage import PageTree
+
+
+__all__ = ['IncrementalReloader', ]
+
+
+def _get_module_file(name):
+    module = sys.modules.get(name, None)
+    if module is None:
+        return None
+    filepath = getattr(module, '__file__', None)
+    if filepath is None or not os.path.isfile(filepath):
+        return None
+    return filepath
+
+
+def _get_site_file(site):
+    """Return the source file of site module `site` as in ``DASHA_SITE``."""
+    filepath = Path(site).expanduser()
+    if filepath.is_file():
+        return filepath.resolve().as_posix()
+    return _get_module_file(site.split(':', 1)[0])
+
+
+class IncrementalReloader(object):
+    """A class to reload the pages of running site when their source change.
+
+    Parameters
+    ----------
+    dash_app : `~dash.Dash`
+        The Dash app.
+    site : str, optional
+        The site module or path, typically the value of ``DASHA_SITE``.
+    interval : float
+        The interval in seconds to poll the files.
+    """
+
+    logger = get_logger()
+
+    def __init__(self, dash_app, site=None, interval=0.5):
+        self._dash_app = dash_app
+        self._site_file = None if site is None else _get_site_file(site)
+        self._interval = interval
+        self._mtimes = dict()
+        self._thread = None
+
+    def _get_watched(self):
+        """Return the watched files with the modules and pages to reload.
+
+        The items are ``filepath: (module_name, [(page_tree, route_name)])``,
+        where module name is None for the site module.
+        """
+        watched = dict()
+        if self._site_file is not None:
+            watched[self._site_file] = (None, list())
+        for page_tree in list(PageTree._instances):
+            for route_name in page_tree.route_names:
+                for name in page_tree.get_page_module_names(route_name):
+                    filepath = _get_module_file(name)
+                    if filepath is None:
+                        continue
+                    watched.setdefault(
+                        filepath, (name, list()))[1].append(
+                            (page_tree, route_name))
+        return watched
+
+    def _get_changed(self, watched):
+        changed = list()
+        for filepath in watched:
+            try:
+                mtime = os.stat(filepath).st_mtime
+            except OSError:
+                continue
+            old_mtime = self._mtimes.get(filepath, None)
+            self._mtimes[filepath] = mtime
+            if old_mtime is not None and mtime != old_mtime:
+                changed.append(filepath)
+        return changed
+
+    def check(self):
+        """Reload the changed modules and rebuild the affected pages.
+
+        Returns
+        -------
+        list
+            The rebuilt pages as a list of ``(page_tree, route_name)``.
+        """
+        watched = self._get_watched()
+        changed = self._get_changed(watched)
+        if not changed:
+            return list()
+        for filepath in changed:
+            name, pages = watched[filepath]
+            if name is None or not pages:
+                self.restart(f"{filepath} changed")
+        rebuilt = list()
+        for filepath in changed:
+            name, pages = watched[filepath]
+            t0 = time.perf_counter()
+            try:
+                importlib.reload(sys.modules[name])
+                for page_tree, route_name in pages:
+                    page_tree.rebuild_page(route_name)
+                    rebuilt.append((page_tree, route_name))
+            except Exception as e:
+                self.logger.error(
+                    f"failed to reload {name}: {e}", exc_info=True)
+                continue
+            self.logger.info(
+                f"reloaded {name} and rebuilt pages "
+                f"{[r for _, r in pages]} in "
+                f"{time.perf_counter() - t0:.3f}s")
+        if rebuilt:
+            self._notify_client()
+        return rebuilt
+
+    def _notify_client(self):
+        # when the dash dev tools hot reload is on, the client reloads the
+        # page when the reload hash changes.
+        from dash._utils import generate_hash
+        _reload = self._dash_app._hot_reload
+        with _reload.lock:
+            _reload.hash = generate_hash()
+            _reload.hard = True
+
+    def restart(self, reason):
+        """Restart the process."""
+        self.logger.info(f"{reason}, restart")
+        spec = getattr(sys.modules['__main__'], '__spec__', None)
+        if spec is not None:
+            args = ['-m', spec.name] + sys.argv[1:]
+        else:
+            args = sys.argv
+        os.execv(sys.executable, [sys.executable] + args)
+
+    def _run(self):
+        while True:
+            time.sleep(self._interval)
+            try:
+                self.check()
+            except Exception as e:
+                self.logger.error(f"reloader error: {e}", exc_info=True)
+
+    def start(self):
+        """Start polling the files in a daemon thread."""
+        if self._thread is not None:
+            return self._thread
+        # initialize the mtimes.
+        self._get_changed(self._get_watched())
+        self._thread = threading.Thread(
+            target=self._run, name='dasha_reloader', daemon=True)
+        self._thread.start()
+        self.logger.info(
+            f"incremental reloader started, watching "
+            f"{len(self._mtimes)} files")
+        return self._thread
@@ -0,0 +1,345 @@
+#! /usr/bin/env python
+
+"""Production serving of DashA sites.
+
+The site is served with gunicorn (multi-process, multi-threaded) or
+waitress (multi-threaded) when installed, and falls back to the threaded
+werkzeug server otherwise. The settings are taken from the env vars, so they
+can be put in the same env files as the site:
+
+* ``DASHA_SERVE_BACKEND``: One of ``gunicorn``, ``waitress``, ``werkzeug``.
+  The first installed one is used if not set.
+* ``DASHA_SERVE_WORKERS``: The number of worker processes.
+* ``DASHA_SERVE_THREADS``: The number of threads per worker.
+* ``DASHA_SERVE_WORKER_CLASS``: The gunicorn worker class. Default is
+  ``gthread``. The async ones (e.g., ``gevent``) are needed to serve many
+  push streams (see `~dasha.web.push`) without a thread per stream.
+* ``DASHA_SERVE_KEEPALIVE``: The seconds to keep idle connections.
+* ``DASHA_SERVE_BACKLOG``: The max number of pending connections.
+* ``DASHA_SERVE_SELF_CHECK``: The number of requests to send at startup to
+  report the requests per second. Set to 0 to disable.
+* ``DASHA_SERVE_SELF_CHECK_PATH``: The URL path to send the requests to.
+* ``FLASK_RUN_HOST`` and ``FLASK_RUN_PORT``: The address to bind to.
+* ``DASHA_DRAIN_TIMEOUT``: The seconds to wait for the in-flight requests
+  on shutdown. See `~dasha.web.lifecycle`.
+"""
+
+import gc
+import os
+import time
+import signal
+import threading
+import importlib.util
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+
+from tollan.utils.fmt import pformat_yaml
+from tollan.utils.log import get_logger
+
+from .lifecycle import lifecycle
+
+
+__all__ = ['ServeConfig', 'serve', 'self_check']
+
+
+_backends = ('gunicorn', 'waitress', 'werkzeug')
+
+# the gunicorn worker classes that do not take a thread per connection.
+_async_worker_classes = ('gevent', 'eventlet', 'tornado')
+
+
+def _get_env_int(name, default):
+    value = os.environ.get(name, None)
+    if value is None or value == '':
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"invalid value of {name}: {value}")
+
+
+def _get_default_backend():
+    for backend in _backends[:-1]:
+        if importlib.util.find_spec(backend) is not None:
+            return backend
+    return _backends[-1]
+
+
+@dataclass
+class ServeConfig(object):
+    """The settings of serving the site."""
+
+    backend: str = field(default_factory=_get_default_backend)
+    host: str = '127.0.0.1'
+    port: int = 8050
+    workers: int = field(
+        default_factory=lambda: min(os.cpu_count() or 1, 4))
+    threads: int = 4
+    worker_class: str = 'gthread'
+    keepalive: int = 5
+    backlog: int = 2048
+    self_check: int = 100
+    self_check_path: str = '/'
+
+    def __post_init__(self):
+        if self.backend not in _backends:
+            raise ValueError(
+                f"invalid serve backend {self.backend}, "
+                f"choose from {_backends}")
+
+    @classmethod
+    def from_env(cls):
+        """Return the config from env vars."""
+        defaults = cls()
+        return cls(
+            backend=os.environ.get(
+                'DASHA_SERVE_BACKEND', None) or defaults.backend,
+            host=os.environ.get('FLASK_RUN_HOST', None) or defaults.host,
+            port=_get_env_int('FLASK_RUN_PORT', defaults.port),
+            workers=_get_env_int('DASHA_SERVE_WORKERS', defaults.workers),
+            threads=_get_env_int('DASHA_SERVE_THREADS', defaults.threads),
+            worker_class=os.environ.get(
+                'DASHA_SERVE_WORKER_CLASS', None) or defaults.worker_class,
+            keepalive=_get_env_int(
+                'DASHA_SERVE_KEEPALIVE', defaults.keepalive),
+            backlog=_get_env_int('DASHA_SERVE_BACKLOG', defaults.backlog),
+            self_check=_get_env_int(
+                'DASHA_SERVE_SELF_CHECK', defaults.self_check),
+            self_check_path=os.environ.get(
+                'DASHA_SERVE_SELF_CHECK_PATH', None
+                ) or defaults.self_check_path,
+            )
+
+    @property
+    def url(self):
+        host = self.host
+        if host in ('0.0.0.0', ''):
+            host = '127.0.0.1'
+        elif host == '::':
+            host = '[::1]'
+        return f'http://{host}:{self.port}'
+
+
+def self_check(url, n_requests=100, concurrency=4, timeout=60.):
+    """Send requests to `url` and return the stats.
+
+    The requests are sent once `url` is reachable, which is waited for up
+    to `timeout` seconds.
+
+    Returns
+    -------
+    dict
+        The number of requests, the number of failed ones, the elapsed
+        time, and the requests per second.
+    """
+    def _get(*args):
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as r:
+                r.read()
+                return r.status < 400
+        except (urllib.error.URLError, OSError):
+            return False
+
+    t_start = time.monotonic()
+    while not _get():
+        if time.monotonic() - t_start > timeout:
+            raise RuntimeError(f"unable to reach {url} in {timeout}s")
+        time.sleep(0.5)
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(_get, range(n_requests)))
+    elapsed = time.perf_counter() - t0
+    return {
+        'n_requests': n_requests,
+        'n_failed': results.count(False),
+        'elapsed': elapsed,
+        'requests_per_second': n_requests / elapsed if elapsed > 0 else 0.,
+        }
+
+
+def _start_self_check(config):
+    """Run `self_check` in a daemon thread and log the result."""
+    logger = get_logger()
+    if config.self_check <= 0:
+        return None
+    url = config.url + config.self_check_path
+
+    def _run():
+        try:
+            stats = self_check(
+                url, n_requests=config.self_check,
+                concurrency=max(config.threads, 1))
+        except Exception as e:
+            logger.warning(f"self check failed: {e}")
+            return
+        logger.info(
+            f"self check {url}: {stats['requests_per_second']:.1f} req/s "
+            f"({stats['n_requests']} requests, {stats['n_failed']} failed, "
+            f"{stats['elapsed']:.3f}s)")
+
+    thread = threading.Thread(
+        target=_run, name='dasha_serve_self_check', daemon=True)
+    thread.start()
+    return thread
+
+
+def _check_push_streams(config):
+    """Warn if the push streams can take all the threads of a worker."""
+    from .push import push_broker
+    if not push_broker.enabled:
+        return False
+    if config.backend == 'werkzeug':
+        # this starts a thread per connection without limit.
+        return False
+    if config.backend == 'gunicorn' and \
+            config.worker_class in _async_worker_classes:
+        return False
+    get_logger().warning(
+        f"push channels are used with {config.threads} threads per worker. "
+        f"Each open push stream holds a thread, so more than "
+        f"{config.threads - 1} viewers per worker stall the callbacks. "
+        f"Increase DASHA_SERVE_THREADS or use an async gunicorn worker "
+        f"class via DASHA_SERVE_WORKER_CLASS.")
+    return True
+
+
+def _gunicorn_post_worker_init(worker):
+    # gunicorn has no hook for SIGTERM, which stops the worker gracefully,
+    # so its handler is wrapped to stop accepting right away.
+    handle_exit = worker.handle_exit
+
+    def _handle_exit(signum, frame):
+        lifecycle.stop_accepting()
+        handle_exit(signum, frame)
+
+    signal.signal(signal.SIGTERM, _handle_exit)
+
+
+def _gunicorn_worker_int(worker):
+    lifecycle.stop_accepting()
+
+
+def _gunicorn_worker_exit(server, worker):
+    # gunicorn has waited for the in-flight requests up to the
+    # graceful_timeout.
+    lifecycle.shutdown(timeout=0)
+
+
+def _serve_gunicorn(config):
+    from gunicorn.app.base import BaseApplication
+
+    class DashaApplication(BaseApplication):
+        """The gunicorn app that preloads the site in the master process."""
+
+        def load_config(self):
+            options = {
+                'bind': f'{config.host}:{config.port}',
+                'workers': config.workers,
+                'threads': config.threads,
+                'worker_class': config.worker_class,
+                'keepalive': config.keepalive,
+                'backlog': config.backlog,
+                # the post fork hooks re-create the resources not
+                # shareable with the workers.
+                'preload_app': True,
+                'when_ready': lambda server: _start_self_check(config),
+                # the master replaces the workers on SIGHUP, and the
+                # workers finish the in-flight requests before exit.
+                'graceful_timeout': lifecycle.drain_timeout,
+                'post_worker_init': _gunicorn_post_worker_init,
+                'worker_int': _gunicorn_worker_int,
+                'worker_exit': _gunicorn_worker_exit,
+                }
+            for k, v in options.items():
+                self.cfg.set(k, v)
+
+        def load(self):
+            from .wsgi import application
+            _check_push_streams(config)
+            # this runs in the master before the workers are forked.
+            # Moving the objects of the preloaded app to the permanent
+            # generation keeps the garbage collector from touching, hence
+            # copying, their memory pages in the workers.
+            gc.freeze()
+            return application
+
+    DashaApplication().run()
+
+
+def _serve_waitress(config):
+    import waitress
+    from .wsgi import application
+    _check_push_streams(config)
+    logger = get_logger()
+    if config.workers > 1:
+        logger.warning(
+            f"waitress runs in single process, "
+            f"ignore workers={config.workers}")
+    server = waitress.create_server(
+        application,
+        host=config.host,
+        port=config.port,
+        threads=config.threads,
+        backlog=config.backlog,
+        # this closes the idle connections.
+        channel_timeout=max(config.keepalive, 1),
+        )
+    lifecycle.install_signal_handlers(server.close)
+    _start_self_check(config)
+    server.run()
+    _exit_lifecycle()
+
+
+def _serve_werkzeug(config):
+    from werkzeug.serving import ThreadedWSGIServer
+    from .wsgi import application
+    logger = get_logger()
+    if config.workers > 1:
+        logger.warning(
+            f"werkzeug server runs in single process, "
+            f"ignore workers={config.workers}")
+    # this server starts a thread per request and closes the connection
+    # after each response.
+    logger.warning(
+        f"werkzeug server does not use a thread pool or keep connections "
+        f"alive, ignore threads={config.threads} "
+        f"keepalive={config.keepalive}")
+
+    class _Server(ThreadedWSGIServer):
+        request_queue_size = config.backlog
+
+    server = _Server(config.host, config.port, application)
+    lifecycle.install_signal_handlers(server.shutdown)
+    _start_self_check(config)
+    server.serve_forever()
+    server.server_close()
+    _exit_lifecycle()
+
+
+def _exit_lifecycle():
+    # this is called after the single process servers stop.
+    lifecycle.close()
+    if lifecycle.restart_requested:
+        lifecycle.restart()
+
+
+def serve(config=None):
+    """Serve the site for production.
+
+    Parameters
+    ----------
+    config : `ServeConfig`, optional
+        The settings. Default is to create from the env vars.
+    """
+    logger = get_logger()
+    if config is None:
+        config = ServeConfig.from_env()
+    logger.info(f"serve site at {config.url}:\n{pformat_yaml(asdict(config))}")
+    dispatch = {
+        'gunicorn': _serve_gunicorn,
+        'waitress': _serve_waitress,
+        'werkzeug': _serve_werkzeug,
+        }
+    return dispatch[config.backend](config)
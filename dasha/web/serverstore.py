@@ -0,0 +1,279 @@
+#! /usr/bin/env python
+
+"""The server-side storage of the values of data stores.
+
+The values of ``dcc.Store`` are sent back to the server in every callback
+that reads them. `ServerStore` keeps the values on the server instead,
+keyed by the store id and a random token per browser session, so the
+browser only holds the reference ``{"token": ..., "version": ...}``. The
+template `~dasha.web.templates.serversidestore.ServerSideStore` uses the
+process-wide `server_store`, which is configured by the ``SERVER_STORE``
+config of the DashA extension with the keyword arguments of
+`ServerStore.configure`.
+
+Two backends are available:
+
+* ``filesystem``: Pickle files in a directory, which can be shared by the
+  processes of the site on the same host. The directory has to be private
+  to the user running the site, since the files in it are unpickled. This
+  is the default, with a new temporary directory created when the layout of
+  the first `~dasha.web.templates.serversidestore.ServerSideStore` is set
+  up, so the worker processes forked from a preloaded app (e.g., by
+  `~dasha.web.serve` with gunicorn) share it.
+
+* ``memory``: A TTL cache in the process. This requires that the requests
+  of a session are served by the same process, i.e., a single worker
+  process.
+
+The values are dropped after ``ttl`` seconds since the last write, after
+which the callbacks get the default value.
+"""
+
+import os
+import time
+import json
+import pickle
+import secrets
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+
+import cachetools
+from tollan.utils.log import get_logger
+
+from .metrics import metrics
+
+
+__all__ = [
+    'MemoryBackend', 'FileSystemBackend', 'ServerStore', 'server_store']
+
+
+class MemoryBackend(object):
+    """The backend that keeps the values in the process.
+
+    Parameters
+    ----------
+    maxsize : int
+        The max number of values. The least recently used are dropped.
+    ttl : float
+        The seconds to keep the values.
+    """
+
+    def __init__(self, maxsize=1024, ttl=3600.):
+        self._cache = cachetools.TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the ``(version, value)`` of `key`, or None."""
+        with self._lock:
+            return self._cache.get(key, None)
+
+    def set(self, key, version, value):
+        with self._lock:
+            self._cache[key] = (version, value)
+
+    def delete(self, key):
+        with self._lock:
+            self._cache.pop(key, None)
+
+
+class FileSystemBackend(object):
+    """The backend that keeps the values as files.
+
+    Parameters
+    ----------
+    cache_dir : str or `~pathlib.Path`, optional
+        The directory of the files. It is created with mode 0o700 if it does
+        not exist. `ValueError` is raised if it is owned by another user or
+        writable by others. Default is a new private temporary directory,
+        which is only shared by the processes forked after this is created.
+    ttl : float
+        The seconds to keep the values.
+    cleanup_interval : float
+        The min seconds between the removals of the expired files.
+    """
+
+    def __init__(self, cache_dir=None, ttl=3600., cleanup_interval=60.):
+        if cache_dir is None:
+            cache_dir = tempfile.mkdtemp(prefix='dasha_server_store_')
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        self._check_cache_dir()
+        self.ttl = ttl
+        self.cleanup_interval = cleanup_interval
+        self._t_cleanup = time.time()
+
+    def _check_cache_dir(self):
+        # the files are unpickled so no one else shall be able to put
+        # files in the directory. The modes are not meaningful on windows.
+        if os.name != 'posix':
+            return
+        st = self.cache_dir.stat()
+        if st.st_uid != os.getuid():
+            raise ValueError(
+                f"server store directory {self.cache_dir} is not owned by "
+                f"the current user.")
+        if st.st_mode & 0o022:
+            raise ValueError(
+                f"server store directory {self.cache_dir} is writable by "
+                f"other users.")
+
+    def _get_filepath(self, key):
+        name = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+        return self.cache_dir.joinpath(f'{name}.pickle')
+
+    def get(self, key):
+        """Return the ``(version, value)`` of `key`, or None."""
+        filepath = self._get_filepath(key)
+        try:
+            if time.time() - filepath.stat().st_mtime > self.ttl:
+                return None
+            with open(filepath, 'rb') as fo:
+                return pickle.load(fo)
+        except (
+                OSError, EOFError, pickle.UnpicklingError,
+                AttributeError, ImportError):
+            # the classes of the stale files may be gone after a reload.
+            return None
+
+    def set(self, key, version, value):
+        filepath = self._get_filepath(key)
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fo:
+                pickle.dump((version, value), fo)
+            os.replace(tmp, filepath)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self._cleanup()
+
+    def delete(self, key):
+        try:
+            self._get_filepath(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _cleanup(self):
+        t = time.time()
+        if t - self._t_cleanup < self.cleanup_interval:
+            return
+        self._t_cleanup = t
+        for filepath in self.cache_dir.glob('*.pickle'):
+            try:
+                if t - filepath.stat().st_mtime > self.ttl:
+                    filepath.unlink()
+            except OSError:
+                continue
+
+
+class ServerStore(object):
+    """A class to keep the values of data stores on the server.
+
+    The values are referred to by the data of the stores in the browser,
+    which are dicts of ``token`` and ``version``.
+    """
+
+    logger = get_logger()
+
+    _backends = {
+        'memory': MemoryBackend,
+        'filesystem': FileSystemBackend,
+        }
+
+    def __init__(self):
+        self._backend = None
+        self._counters = {
+            k: metrics.counter(f'server_store.{k}')
+            for k in ('n_get', 'n_miss', 'n_set')}
+
+    def configure(self, backend='filesystem', **kwargs):
+        """Set the backend.
+
+        Parameters
+        ----------
+        backend : str
+            One of ``memory`` and ``filesystem``.
+        **kwargs
+            Passed to the backend class.
+        """
+        if backend not in self._backends:
+            raise ValueError(
+                f"invalid server store backend {backend}, "
+                f"choose from {list(self._backends.keys())}")
+        self._backend = self._backends[backend](**kwargs)
+        self.logger.info(f"use server store backend {backend}")
+        return self
+
+    @property
+    def backend(self):
+        """The backend, which is ``filesystem`` if not configured."""
+        if self._backend is None:
+            self.configure()
+        return self._backend
+
+    @staticmethod
+    def _make_key(store_id, token):
+        if not isinstance(store_id, str):
+            store_id = json.dumps(store_id, sort_keys=True)
+        return f'{store_id}:{token}'
+
+    def get(self, store_id, ref, default=None):
+        """Return the value of store `store_id` referred to by `ref`.
+
+        Parameters
+        ----------
+        store_id : str or dict
+            The id of the store.
+        ref : dict
+            The data of the store. `default` is returned if this is None or
+            the value has expired.
+        default : object
+            The value to return if there is no value.
+        """
+        self._counters['n_get'].inc()
+        if not ref or 'token' not in ref:
+            return default
+        item = self.backend.get(self._make_key(store_id, ref['token']))
+        if item is None:
+            self._counters['n_miss'].inc()
+            return default
+        return item[1]
+
+    def set(self, store_id, value, ref=None):
+        """Store `value` for store `store_id` and return the new reference.
+
+        Parameters
+        ----------
+        store_id : str or dict
+            The id of the store.
+        value : object
+            The value, which has to be picklable for the ``filesystem``
+            backend.
+        ref : dict, optional
+            The current data of the store. A new token is made if not set.
+
+        Returns
+        -------
+        dict
+            The data to set to the store.
+        """
+        if ref and 'token' in ref:
+            token = ref['token']
+            version = ref.get('version', 0) + 1
+        else:
+            token = secrets.token_urlsafe(16)
+            version = 0
+        self.backend.set(self._make_key(store_id, token), version, value)
+        self._counters['n_set'].inc()
+        return {'token': token, 'version': version}
+
+    def delete(self, store_id, ref):
+        """Remove the value of store `store_id` referred to by `ref`."""
+        if ref and 'token' in ref:
+            self.backend.delete(self._make_key(store_id, ref['token']))
+
+
+server_store = ServerStore()
+"""The `ServerStore` of the process."""
@@ -0,0 +1,224 @@
+#! /usr/bin/env python
+
+"""This module implements the persistent snapshot of the layout of DashA apps.
+
+The snapshot is keyed by the config and the source files only, so a layout
+built from data at startup is served as in the snapshot until the key
+changes.
+"""
+
+import os
+import re
+import sys
+import json
+import hashlib
+import inspect
+import functools
+import importlib.util
+from pathlib import Path
+from collections.abc import Mapping
+
+from tollan.utils.log import get_logger
+
+from .. import __version__
+
+
+__all__ = ['LayoutSnapshot', 'load_layout']
+
+
+def _stable_repr(obj):
+    """Return a repr of `obj` that does not change across processes."""
+    if isinstance(obj, Mapping):
+        items = sorted(
+            (_stable_repr(k), _stable_repr(v)) for k, v in obj.items())
+        return '{' + ', '.join(f'{k}: {v}' for k, v in items) + '}'
+    if isinstance(obj, (list, tuple)):
+        return '[' + ', '.join(_stable_repr(v) for v in obj) + ']'
+    if inspect.ismodule(obj):
+        return f'<module {obj.__name__}>'
+    if inspect.isclass(obj) or inspect.isroutine(obj):
+        return f'<{obj.__module__}:{obj.__qualname__}>'
+    # strip memory addresses
+    return re.sub(r' at 0x[0-9a-fA-F]+', '', repr(obj))
+
+
+def _get_module_file(name):
+    """Return the source file of module `name`."""
+    module = sys.modules.get(name, None)
+    if module is not None:
+        return getattr(module, '__file__', None)
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+    if spec is None:
+        return None
+    return spec.origin
+
+
+def _iter_module_names(obj):
+    """Yield the names of the modules referenced in config `obj`."""
+    if isinstance(obj, Mapping):
+        for k, v in obj.items():
+            if k == 'template' and isinstance(v, str):
+                yield v.split(':', 1)[0]
+            else:
+                yield from _iter_module_names(v)
+    elif isinstance(obj, (list, tuple)):
+        for v in obj:
+            yield from _iter_module_names(v)
+    elif inspect.ismodule(obj):
+        yield obj.__name__
+    elif inspect.isclass(obj) or inspect.isroutine(obj):
+        yield obj.__module__
+
+
+@functools.lru_cache(maxsize=None)
+def _get_dasha_source_hash():
+    """Return the hash of the source files of the dasha package.
+
+    This covers a fixed set of files so it does not depend on which dasha
+    modules happen to be imported.
+    """
+    h = hashlib.sha256()
+    root = Path(__file__).parent.parent
+    for filepath in sorted(root.rglob('*.py')):
+        relpath = filepath.relative_to(root)
+        if 'tests' in relpath.parts:
+            continue
+        h.update(relpath.as_posix().encode())
+        h.update(filepath.read_bytes())
+    return h.hexdigest()
+
+
+def _get_component_classes():
+    """Return the Dash component classes keyed by namespace and type."""
+    from dash.development.base_component import Component
+    result = dict()
+    stack = [Component]
+    while stack:
+        cls = stack.pop()
+        stack.extend(cls.__subclasses__())
+        namespace = getattr(cls, '_namespace', None)
+        type_ = getattr(cls, '_type', None)
+        if namespace is not None and type_ is not None:
+            result[(namespace, type_)] = cls
+    return result
+
+
+def load_layout(layout_json):
+    """Return the Dash components re-created from `layout_json`.
+
+    `ValueError` is raised if a component class is not loaded.
+    """
+    classes = _get_component_classes()
+
+    def _load(obj):
+        if isinstance(obj, list):
+            return [_load(v) for v in obj]
+        if not isinstance(obj, dict):
+            return obj
+        if obj.keys() == {'type', 'namespace', 'props'}:
+            cls = classes.get((obj['namespace'], obj['type']), None)
+            if cls is None:
+                raise ValueError(
+                    f"unknown component {obj['namespace']}.{obj['type']}")
+            return cls(**{k: _load(v) for k, v in obj['props'].items()})
+        return {k: _load(v) for k, v in obj.items()}
+
+    return _load(json.loads(layout_json))
+
+
+class LayoutSnapshot(object):
+    """A class to manage a persisted snapshot of a Dash app.
+
+    The snapshot holds the serialized layout and the callback registry
+    metadata (the list served as ``_dash-dependencies``).
+
+    Parameters
+    ----------
+    cache_dir : str or `~pathlib.Path`
+        The directory to save the snapshot files.
+    key : str
+        The key of the snapshot, typically created by :meth:`make_key`.
+    """
+
+    logger = get_logger()
+
+    def __init__(self, cache_dir, key):
+        self._cache_dir = Path(cache_dir).expanduser()
+        self._key = key
+
+    @property
+    def key(self):
+        return self._key
+
+    @property
+    def filepath(self):
+        return self._cache_dir.joinpath(f'dasha_snapshot_{self._key}.json')
+
+    @staticmethod
+    def make_key(config, module_names=None):
+        """Return the snapshot key for app `config`.
+
+        The key is a hash of the config, the dasha version, the source files
+        of the dasha package, and those of the modules referenced in the
+        config and in `module_names`.
+        """
+        h = hashlib.sha256()
+        h.update(__version__.encode())
+        h.update(_get_dasha_source_hash().encode())
+        h.update(_stable_repr(config).encode())
+        names = set(_iter_module_names(config))
+        names.update(module_names or tuple())
+        for name in sorted(names):
+            filepath = _get_module_file(name)
+            if filepath is None or not os.path.isfile(filepath):
+                continue
+            h.update(name.encode())
+            with open(filepath, 'rb') as fo:
+                h.update(fo.read())
+        return h.hexdigest()
+
+    def load(self):
+        """Return the snapshot dict, or None if not available."""
+        filepath = self.filepath
+        if not filepath.exists():
+            return None
+        try:
+            with open(filepath, 'r') as fo:
+                return json.load(fo)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"unable to load snapshot {filepath}: {e}")
+            return None
+
+    def save(self, layout_json, callbacks):
+        """Save the snapshot.
+
+        Parameters
+        ----------
+        layout_json : str
+            The serialized layout.
+        callbacks : list
+            The callback registry metadata.
+        """
+        filepath = self.filepath
+        d = {
+            'key': self._key,
+            'dasha_version': __version__,
+            'layout': layout_json,
+            'callbacks': callbacks,
+            }
+        try:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            # write to a temporary file first because other workers
+            # may be reading the snapshot at the same time.
+            tmp = filepath.with_suffix(f'.{os.getpid()}.tmp')
+            with open(tmp, 'w') as fo:
+                json.dump(d, fo)
+            os.replace(tmp, filepath)
+        except OSError as e:
+            self.logger.warning(f"unable to save snapshot {filepath}: {e}")
+            return None
+        self.logger.info(f"saved layout snapshot {filepath}")
+        return filepath
@@ -3,12 +3,13 @@
 
 from tollan.utils import getobj
 from dash_component_template.template import Template
+import sys
 import collections.abc
 import inspect
 import copy
 
 
-__all__ = ['resolve_template']
+__all__ = ['resolve_template', 'get_template_module_names']
 
 
 def resolve_template(arg):
@@ -35,3 +36,28 @@ def resolve_template(arg):
             return cls(**arg)
         raise ValueError(f"invalid template class {cls}")
     raise ValueError(f"cannot resolve template from {arg}")
+
+
+def get_template_module_names(arg, template=None):
+    """Return the names of the modules that define template `arg`.
+
+    Parameters
+    ----------
+    arg : str, class, or module
+        The template item as in the dict passed to `resolve_template`.
+    template : `~dash_component_template.Template`, optional
+        The resolved template instance.
+    """
+    names = list()
+    if isinstance(arg, str):
+        name = arg.split(':', 1)[0]
+        if name not in sys.modules and '.' in name:
+            name = name.rsplit('.', 1)[0]
+        names.append(name)
+    elif inspect.ismodule(arg):
+        names.append(arg.__name__)
+    elif inspect.isclass(arg):
+        names.append(arg.__module__)
+    if template is not None:
+        names.append(template.__class__.__module__)
+    return [n for n in dict.fromkeys(names) if n in sys.modules]
@@ -5,13 +5,12 @@ from dash_component_template import ComponentTemplate
 
 from tollan.utils import rupdate
 
-import dash_defer_js_import as dji
 from dash.dependencies import Output
-import dash_html_components as html
-from jinja2 import Template
+from dash import html
 from schema import Schema, Optional
 
 from ..extensions.dasha import resolve_url
+from ..vendor import vendor_url
 
 
 class AladinLiteView(ComponentTemplate):
@@ -20,6 +19,12 @@ class AladinLiteView(ComponentTemplate):
     class Meta: 
         component_cls = html.Div
 
+    aladin_css_url = 'https://aladin.u-strasbg.fr/AladinLite/api/v2/latest/aladin.min.css'  # noqa: E501
+    aladin_js_url = 'https://aladin.u-strasbg.fr/AladinLite/api/v2/latest/aladin.min.js'  # noqa: E501
+    jquery_url = 'https://code.jquery.com/jquery-1.12.1.min.js'
+    vendor_urls = [aladin_css_url, aladin_js_url, jquery_url]
+    """The URLs that are replaced with the local copies when available."""
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         view_props = {
@@ -40,11 +45,12 @@ class AladinLiteView(ComponentTemplate):
         container.child(html.Div([
             html.Link(
                 rel='stylesheet',
-                href='https://aladin.u-strasbg.fr/AladinLite/api/v2/latest/aladin.min.css'  # noqa: E501
+                href=vendor_url(self.aladin_css_url)
             )]))
-        jquery_url = 'https://code.jquery.com/jquery-1.12.1.min.js'
-        al_url = 'https://aladin.u-strasbg.fr/AladinLite/api/v2/latest/aladin.min.js'  # noqa: E501
+        jquery_url = vendor_url(self.jquery_url)
+        al_url = vendor_url(self.aladin_js_url)
         alview_url = resolve_url(f'/js/alview_{view_div.id}.js')
+        import dash_defer_js_import as dji
         container.child(dji.Import, src=jquery_url)
         container.child(dji.Import, src=al_url)
         container.child(dji.Import, src=alview_url)
@@ -72,6 +78,7 @@ class AladinLiteView(ComponentTemplate):
     @staticmethod
     def make_aladin_lite_js(component_id):
         """Return Aladin Lite javascript snippet for `component_id`."""
+        from jinja2 import Template
         template = Template("""
     // the DOM element that holds the aladin lite app.
     const dal = document.getElementById('{{id}}');
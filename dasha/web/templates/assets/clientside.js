@@ -142,6 +142,45 @@ window.dash_clientside.ui = {
     // },
 }
 
+// the bridge of dasha.web.templates.pushchannel.PushChannel
+window.dash_clientside.push = {
+    _sources: {},
+    _connect: function(url) {
+        var source = this._sources[url];
+        if (!source) {
+            source = this._sources[url] = {message: null};
+            // one stream per channel is shared by all the templates.
+            var eventSource = new EventSource(url);
+            eventSource.onmessage = function(e) {
+                source.message = JSON.parse(e.data);
+            };
+            source.eventSource = eventSource;
+        }
+        return source;
+    },
+    receive: function(n, state) {
+        var no_update = window.dash_clientside.no_update;
+        var message = window.dash_clientside.push._connect(
+            state['url']).message;
+        var n_outputs = state['n_outputs'];
+        if (message === null || (
+                message['seq'] === state['seq'] &&
+                message['time'] === state['time'])) {
+            return new Array(n_outputs + 1).fill(no_update);
+        }
+        var values = n_outputs === 1 ? [message['value']] : message['value'];
+        if (n_outputs === 0) {
+            values = [];
+        }
+        return [{
+            ...state,
+            seq: message['seq'],
+            time: message['time'],
+        }].concat(values);
+    },
+}
+
+
 window.dash_clientside.datastore = {
     getKey: function(data, key) {
         // console.log("get " + key + " from " + data)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+
+"""The compact component ids.
+
+The ids of nested templates are the ids of all the ancestors joined, e.g.,
+``slapdash0-div1-container0-row2-col0-button0``, and they are repeated in
+the layout, the callback dependencies, and every callback request and
+response. For the Dash apps with the ``COMPACT_IDS`` config of the DashA
+extension, the template ids and the string values in the
+`~dasha.web.templates.utils.PatternMatchingId` dicts are replaced with short
+hashes of them, which are the same for the same layout in any process. The
+other apps in the process keep the readable ids. The ids can also be made
+compact in the context of `use_compact_ids`.
+
+The mapping back to the readable ids is returned by `get_readable_id`.
+The bytes saved are reported at startup. With ``COMPACT_IDS: {debug:
+True}``, the mapping is served as JSON at ``_dasha-ids``.
+"""
+
+import re
+import base64
+import hashlib
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+
+from dash_component_template.idtree import IdTree
+
+
+__all__ = [
+    'install_compact_ids', 'use_compact_ids', 'compact_ids_enabled',
+    'compact_id', 'get_readable_id', 'get_id_map', 'expand_compact_ids',
+    'measure_compact_ids']
+
+
+_installed = False
+_use_compact_ids = contextvars.ContextVar('dasha_compact_ids', default=None)
+_lock = threading.Lock()
+_readable_ids = dict()
+"""The readable ids keyed by the compact ids."""
+
+_compact_id_prefix = 'i'
+_compact_id_re = re.compile(r'\bi[a-z2-7]{7,}\b')
+
+
+def compact_ids_enabled():
+    """True if the ids made in the current context are compact.
+
+    This is the case in the context of `use_compact_ids`, or in the setup
+    or the requests of a Dash app with the ``COMPACT_IDS`` config.
+    """
+    enabled = _use_compact_ids.get()
+    if enabled is not None:
+        return enabled
+    if not _installed:
+        return False
+    from ..extensions.dasha import get_dash_app, get_dasha_config
+    app = get_dash_app(fallback=False)
+    if app is None:
+        return False
+    return bool(get_dasha_config(app).get('COMPACT_IDS', False))
+
+
+def compact_id(name, length=8):
+    """Return the compact id of readable id `name`.
+
+    The compact id is a letter followed by base32 hash digits. A longer one
+    is returned in the unlikely case of collision.
+    """
+    digest = base64.b32encode(
+        hashlib.blake2b(name.encode(), digest_size=10).digest()
+        ).decode().lower()
+    with _lock:
+        for n in range(length - 1, len(digest) + 1):
+            cid = f'{_compact_id_prefix}{digest[:n]}'
+            readable = _readable_ids.setdefault(cid, name)
+            if readable == name:
+                return cid
+    raise ValueError(f"unable to make compact id for {name}")
+
+
+def get_readable_id(cid):
+    """Return the readable id of compact id `cid`, or `cid` if unknown."""
+    return _readable_ids.get(cid, cid)
+
+
+def get_id_map():
+    """Return the readable ids keyed by the compact ids."""
+    with _lock:
+        return dict(_readable_ids)
+
+
+_readable_id_cached = IdTree.__dict__['_id_cached']
+
+
+def _id_cached(self):
+    if not compact_ids_enabled():
+        return _readable_id_cached.func(self)
+    parent = self.parent
+    if parent is None or parent.id is None:
+        return compact_id(self.idbase)
+    return compact_id(f'{get_readable_id(parent.id)}-{self.idbase}')
+
+
+def install_compact_ids():
+    """Make the template ids compact where `compact_ids_enabled`.
+
+    This replaces the id of `~dash_component_template.idtree.IdTree`, which
+    is the same as before where `compact_ids_enabled` is False.
+    """
+    global _installed
+    with _lock:
+        if _installed:
+            return
+        prop = functools.cached_property(_id_cached)
+        prop.__set_name__(IdTree, '_id_cached')
+        IdTree._id_cached = prop
+        _installed = True
+
+
+@contextmanager
+def use_compact_ids(enabled=True):
+    """Make the template ids compact, or readable if `enabled` is False,
+    in the context."""
+    install_compact_ids()
+    token = _use_compact_ids.set(enabled)
+    try:
+        yield
+    finally:
+        _use_compact_ids.reset(token)
+
+
+def expand_compact_ids(s):
+    """Return `s` with the compact ids in it replaced by the readable ids."""
+    return _compact_id_re.sub(lambda m: get_readable_id(m.group(0)), s)
+
+
+def measure_compact_ids(**values):
+    """Return the sizes of `values` serialized, with and without the compact
+    ids.
+
+    Parameters
+    ----------
+    **values
+        The objects to measure, e.g., the layout and the callback list. The
+        str values are taken as serialized.
+    """
+    from plotly.io.json import to_json_plotly
+    result = dict()
+    for name, value in values.items():
+        s = value if isinstance(value, str) else to_json_plotly(value)
+        result[name] = {
+            'compact': len(s.encode()),
+            'readable': len(expand_compact_ids(s).encode()),
+            }
+    return result
@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+
+"""The layout minifier.
+
+The layouts built with ``child`` and ``grid`` have many props set to the
+values the React components would use anyway, and many ``html.Div``
+wrappers that hold a single component and do nothing else. When enabled
+by the ``MINIFY_LAYOUT`` config of the DashA extension, `minify_layout` is
+run on the app layout and the page layouts of
+`~dasha.web.templates.multipage.PageTree` to:
+
+* Remove the props that equal the default values of the components, as
+  declared in the ``metadata.json`` of the component packages.
+
+* Replace the ``html.Div`` that has a single component child and no prop
+  other than the id with the child.
+
+The props and ids used in the callback dependencies, and the ids that
+appear as the values of the other props (e.g., the ``target`` of tooltips),
+are always kept. The ids used only in custom JS or CSS are not seen, so
+the minifier should not be enabled for such layouts.
+
+The config is read from the app of each page, so the sites hosted in one
+server can enable the minifier separately.
+"""
+
+import json
+import inspect
+import functools
+from pathlib import Path
+
+from dash.development.base_component import Component
+
+
+__all__ = [
+    'get_default_props', 'get_dependency_props', 'minify_layout']
+
+
+def _parse_default_value(value):
+    # the default values are JS literals.
+    if value.get('computed', False):
+        raise ValueError("computed default value")
+    s = value['value']
+    if len(s) >= 2 and s[0] == s[-1] == "'" and "'" not in s[1:-1] \
+            and '\\' not in s:
+        return s[1:-1]
+    return json.loads(s.replace("'", '"'))
+
+
+@functools.lru_cache(maxsize=None)
+def _load_metadata(filepath):
+    if not filepath.exists():
+        return dict()
+    with open(filepath, 'r') as fo:
+        return {
+            v['displayName']: v['props'] for v in json.load(fo).values()
+            if 'displayName' in v}
+
+
+@functools.lru_cache(maxsize=None)
+def get_default_props(component_cls):
+    """Return the props of Dash `component_cls` that have default values.
+
+    The default values are read from the ``metadata.json`` of the component
+    package. Those not of JSON literals are skipped.
+    """
+    try:
+        filepath = Path(inspect.getfile(component_cls)).parent.joinpath(
+            'metadata.json')
+    except TypeError:
+        return dict()
+    props = _load_metadata(filepath).get(component_cls._type, dict())
+    result = dict()
+    for name, prop in props.items():
+        if name in ('id', 'children') or 'defaultValue' not in prop:
+            continue
+        try:
+            result[name] = _parse_default_value(prop['defaultValue'])
+        except ValueError:
+            continue
+    return result
+
+
+def _iter_callback_deps(callback):
+    output = callback['output']
+    if output.startswith('..'):
+        outputs = output[2:-2].split('...')
+    else:
+        outputs = [output]
+    for output in outputs:
+        yield output.rsplit('.', 1)
+    for dep in callback['inputs'] + callback['state']:
+        yield dep['id'], dep['property']
+
+
+def get_dependency_props(callback_list):
+    """Return the ``(id, prop)`` used in the callbacks.
+
+    The dict ids are returned as the str ``"{"``, which matches any dict
+    id.
+
+    Parameters
+    ----------
+    callback_list : list
+        The callback specs, i.e., ``app._callback_list``.
+    """
+    result = set()
+    for callback in callback_list:
+        for id, prop in _iter_callback_deps(callback):
+            if id.startswith('{'):
+                id = '{'
+            result.add((id, prop))
+    return result
+
+
+def _iter_components(layout):
+    if isinstance(layout, (list, tuple)):
+        for c in layout:
+            yield from _iter_components(c)
+    elif isinstance(layout, Component):
+        yield layout
+        yield from _iter_components(getattr(layout, 'children', None))
+
+
+def _dep_key(id):
+    if isinstance(id, dict):
+        return '{'
+    return id
+
+
+def _get_props(component):
+    return component.to_plotly_json()['props']
+
+
+def _is_default(value, default):
+    if isinstance(value, bool) or isinstance(default, bool):
+        return value is default
+    if isinstance(value, (int, float)) and isinstance(default, (int, float)):
+        return value == default
+    return type(value) is type(default) and value == default
+
+
+def _copy_component(component):
+    result = component.__class__.__new__(component.__class__)
+    result.__dict__.update(component.__dict__)
+    return result
+
+
+class _Minifier(object):
+
+    def __init__(self, dep_props):
+        self._dep_props = dep_props
+        self._dep_ids = {id for id, _ in dep_props}
+        self.n_props_removed = 0
+
+    def collect_ref_ids(self, layout):
+        # the ids that appear in the prop values, e.g., tooltip targets.
+        ref_ids = set()
+        for c in _iter_components(layout):
+            for k, v in _get_props(c).items():
+                if k not in ('id', 'children') and isinstance(v, str):
+                    ref_ids.add(v)
+        self._ref_ids = ref_ids
+
+    def _is_used(self, id):
+        if id is None:
+            return False
+        key = _dep_key(id)
+        return key in self._dep_ids or key in self._ref_ids
+
+    def minify(self, layout):
+        if isinstance(layout, (list, tuple)):
+            return type(layout)(self.minify(c) for c in layout)
+        if not isinstance(layout, Component):
+            return layout
+        component = _copy_component(layout)
+        id = getattr(component, 'id', None)
+        key = _dep_key(id)
+        props = _get_props(component)
+        for name, default in get_default_props(type(component)).items():
+            if name not in props or (key, name) in self._dep_props:
+                continue
+            if _is_default(props[name], default):
+                delattr(component, name)
+                del props[name]
+                self.n_props_removed += 1
+        children = props.get('children', None)
+        if children is not None:
+            children = component.children = self.minify(children)
+        if (
+                component._namespace == 'dash_html_components'
+                and component._type == 'Div'
+                and set(props.keys()) <= {'id', 'children'}
+                and not self._is_used(id)):
+            if isinstance(children, (list, tuple)) and len(children) == 1:
+                children = children[0]
+            if isinstance(children, Component):
+                return children
+        return component
+
+
+def minify_layout(layout, callback_list=None):
+    """Return the minified `layout` and the stats.
+
+    The components in `layout` are not modified.
+
+    Parameters
+    ----------
+    layout : `~dash.development.base_component.Component`
+        The layout.
+    callback_list : list, optional
+        The callback specs of the app, i.e., ``app._callback_list``. The
+        props used in them are kept.
+
+    Returns
+    -------
+    layout : `~dash.development.base_component.Component`
+        The minified layout.
+    stats : dict
+        The numbers of components before and after, and the number of
+        props removed.
+    """
+    minifier = _Minifier(get_dependency_props(callback_list or list()))
+    minifier.collect_ref_ids(layout)
+    n_nodes = sum(1 for _ in _iter_components(layout))
+    result = minifier.minify(layout)
+    return result, {
+        'n_nodes_before': n_nodes,
+        'n_nodes_after': sum(1 for _ in _iter_components(result)),
+        'n_props_removed': minifier.n_props_removed,
+        }
@@ -1,5 +1,9 @@
 #!/usr/bin/env python
 
+import sys
+import time
+import weakref
+from contextlib import contextmanager
 from anytree import AnyNode, RenderTree
 from tollan.utils import ensure_prefix
 from tollan.utils.log import get_logger
@@ -9,9 +13,12 @@ from dash import html, Output, Input, State, ClientsideFunction, MATCH
 import dash_bootstrap_components as dbc
 from dash_component_template import ComponentTemplate
 
-from ..extensions.dasha import resolve_url
-from . import resolve_template
-from .utils import fa, PatternMatchingId
+from ...utils.profiler import profile_section
+from ..extensions.dasha import resolve_url, get_dash_app, get_dasha_config
+from ..admission import notify_callbacks_changed
+from . import resolve_template, get_template_module_names
+from .utils import fa, PatternMatchingId, layout_hash
+from .minify import minify_layout
 
 
 __all__ = ['Page', 'PageTree']
@@ -77,13 +84,19 @@ class Page(ComponentTemplate):
                 )
 
     def setup_layout(self, app):
-        self._template.setup_layout(app)
+        with profile_section(f'setup_layout {self._route_name}'):
+            self._template.setup_layout(app)
 
     @property
     def layout(self):
         logger = get_logger()
         try:
             layout = self._template.layout
+            app = get_dash_app()
+            if get_dasha_config(app).get('MINIFY_LAYOUT', False):
+                layout, stats = minify_layout(layout, app._callback_list)
+                logger.debug(
+                    f"minified layout of page {self._route_name}: {stats}")
             return layout
         except Exception as e:
             logger.error(
@@ -92,6 +105,10 @@ class Page(ComponentTemplate):
             reason = str(e)
             return self._get_404_layout(self._route_name, reason)
 
+    def layout_hash(self):
+        """Return the content hash of the page layout."""
+        return layout_hash(self.layout)
+
     @staticmethod
     def _get_404_layout(route, reason):
         return html.Div([
@@ -105,6 +122,53 @@ class Page(ComponentTemplate):
                         ], className='jumbotron bg-light')
 
 
+class _PageCallbacks(object):
+    """The callbacks registered by the setup of a page.
+
+    These are the entries appended to ``app._callback_list``, and the entries
+    set in ``app.callback_map`` along with those they replaced.
+    """
+
+    def __init__(self):
+        self.callback_list = list()
+        self.callback_map = dict()
+        self.replaced = dict()
+
+    @contextmanager
+    def record(self, app):
+        """Record the callbacks registered to `app` in the context."""
+        n_callbacks = len(app._callback_list)
+        callback_map = dict(app.callback_map)
+        try:
+            yield self
+        finally:
+            self.callback_list = app._callback_list[n_callbacks:]
+            self.callback_map = {
+                k: v for k, v in app.callback_map.items()
+                if callback_map.get(k, None) is not v}
+            self.replaced = {
+                k: callback_map[k] for k in self.callback_map
+                if k in callback_map}
+
+    def remove(self, app):
+        """Remove the recorded callbacks from `app`."""
+        ids = {id(c) for c in self.callback_list}
+        app._callback_list[:] = [
+            c for c in app._callback_list if id(c) not in ids]
+        for k, v in self.callback_map.items():
+            if app.callback_map.get(k, None) is not v:
+                continue
+            if k in self.replaced:
+                app.callback_map[k] = self.replaced[k]
+            else:
+                del app.callback_map[k]
+
+    def restore(self, app):
+        """Add the recorded callbacks back to `app`."""
+        app._callback_list.extend(self.callback_list)
+        app.callback_map.update(self.callback_map)
+
+
 class PageTree(object):
     """A class to manage a set of pages in a tree structure.
 
@@ -118,6 +182,8 @@ class PageTree(object):
 
     logger = get_logger()
 
+    _instances = weakref.WeakSet()
+
     @staticmethod
     def _is_leaf(d):
         return 'template' in d and 'pages' not in d
@@ -133,7 +199,11 @@ class PageTree(object):
         def _make_tree(d, parent):
             if self._is_leaf(d):
                 p = Page(template=resolve_template(d))
-                n = AnyNode(page=p, parent=parent)
+                # the page def and the callbacks registered by the page are
+                # kept for rebuilding the page.
+                n = AnyNode(
+                    page=p, parent=parent, page_def=d,
+                    callbacks=_PageCallbacks())
                 # use the unresolved route_name so we don't need the
                 # app context
                 route_name = p._route_name
@@ -152,12 +222,34 @@ class PageTree(object):
         self.logger.info('page tree:\n{}'.format(RenderTree(root)))
         self._root = root
         self._page_index = page_index
+        self._app = None
+        self._content_container_id = None
+        self._instances.add(self)
+
+    @property
+    def route_names(self):
+        """The route names of the pages."""
+        return list(self._page_index.keys())
+
+    def get_page_module_names(self, route_name):
+        """Return the names of the modules that define the page template."""
+        node = self._page_index[route_name]
+        return get_template_module_names(
+            node.page_def['template'], node.page._template)
+
+    @staticmethod
+    def _setup_page_layout(app, node, page):
+        callbacks = node.callbacks = _PageCallbacks()
+        with callbacks.record(app):
+            page.setup_layout(app)
 
     def setup_page_layouts(self, app, location, content_container):
         """Setup multi-page layout and the location callback for rendering.
         """
+        self._app = app
+        self._content_container_id = content_container.id
         for node in self._page_index.values():
-            node.page.setup_layout(app)
+            self._setup_page_layout(app, node, node.page)
 
         @app.callback(
             output=Output(content_container.id, 'children'),
@@ -171,17 +263,82 @@ class PageTree(object):
                 return dash.no_update
             return self.get_page_layout(route_name=pathname)
 
-    def get_page_layout(self, route_name):
-        route_name = route_name.rstrip('/')
+    def rebuild_page(self, route_name):
+        """Re-create the page of `route_name` and re-register its callbacks.
+
+        This is used by the development reloader after the page template
+        module is reloaded. The callbacks of the old page are removed from
+        the app before the new page is set up, and are restored if the setup
+        fails, in which case the old page is kept.
+
+        Returns
+        -------
+        float
+            The time spent in rebuilding the page.
+        """
+        app = self._app
+        if app is None:
+            raise RuntimeError("the page layouts are not setup yet.")
+        node = self._page_index[route_name]
+        t0 = time.perf_counter()
+        page_def = dict(node.page_def)
+        template = page_def['template']
+        if isinstance(template, type):
+            # get the class from the reloaded module.
+            template = getattr(
+                sys.modules[template.__module__],
+                template.__qualname__, template)
+            page_def['template'] = template
+        page = Page(template=resolve_template(page_def))
+        # the old callbacks are removed first because the new page may
+        # register callbacks of the same outputs.
+        old_callbacks = node.callbacks
+        old_callbacks.remove(app)
+        try:
+            with _allow_server_setup(app.server), app.server.app_context():
+                self._setup_page_layout(app, node, page)
+        except Exception:
+            node.callbacks.remove(app)
+            old_callbacks.restore(app)
+            node.callbacks = old_callbacks
+            raise
+        finally:
+            # the callbacks of the same ids may be replaced.
+            notify_callbacks_changed(app)
+        node.page = page
+        return time.perf_counter() - t0
+
+    def resolve_route_name(self, pathname):
+        """Return the route name of the page of `pathname`, or None if there
+        is no such page."""
+        route_name = pathname.rstrip('/')
         if route_name not in self._page_index:
             if route_name == resolve_url('').rstrip('/'):
                 # route to the default page
                 route_name = next(iter(self._page_index.keys()))
         if route_name in self._page_index:
-            return self._page_index[route_name].page.layout
+            return route_name
+        return None
+
+    def get_page_layout(self, route_name):
+        resolved = self.resolve_route_name(route_name)
+        if resolved is not None:
+            return self._page_index[resolved].page.layout
+        route_name = route_name.rstrip('/')
         return Page._get_404_layout(
             route_name, f'Page {route_name} does not exist')
 
+    def get_prerender_fills(self, pathname):
+        """Return the page layout of `pathname` keyed by the id of the
+        content container, for `~dasha.web.prerender.render_html`.
+
+        This is empty if `pathname` is not a page.
+        """
+        if self._content_container_id is None or \
+                self.resolve_route_name(pathname) is None:
+            return dict()
+        return {self._content_container_id: self.get_page_layout(pathname)}
+
     def setup_nav_tree(
             self, app, container, make_navlist, make_sub_container,
             location, clientside_state):
@@ -231,3 +388,15 @@ class PageTree(object):
                     State(clientside_state.id, 'data')
                     ],
                 )
+
+
+@contextmanager
+def _allow_server_setup(server):
+    # flask refuses to add routes after the first request. This is relaxed
+    # temporarily so that the rebuilt pages can add their routes.
+    got_first_request = server._got_first_request
+    server._got_first_request = False
+    try:
+        yield
+    finally:
+        server._got_first_request = got_first_request
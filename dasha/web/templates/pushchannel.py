@@ -0,0 +1,97 @@
+#! /usr/bin/env python
+
+
+from dash import dcc, html, Input, Output, State, ClientsideFunction
+from dash_component_template import ComponentTemplate
+
+from ..push import push_broker
+
+
+__all__ = ['PushChannel', ]
+
+
+class PushChannel(ComponentTemplate):
+    """A template to feed the values pushed by a channel to components.
+
+    Unlike `~dasha.web.templates.timer.IntervalTimer`, which triggers the
+    callbacks of each browser tab, the value is computed once per interval
+    on the server and pushed to all the tabs subscribed to the channel via
+    server-sent events. See `~dasha.web.push`.
+
+    Each tab showing the channel holds a server thread while open. With the
+    thread-per-connection settings of `~dasha.web.serve`, set
+    ``DASHA_SERVE_THREADS`` above the expected number of tabs per worker,
+    or use an async gunicorn worker class, otherwise the open tabs take all
+    the threads and the callbacks stall.
+
+    Parameters
+    ----------
+    channel : str
+        The name of the channel.
+    func : callable, optional
+        The function of the channel, which returns the value for `outputs`,
+        or a list of values if there are more than one outputs. If not set,
+        the channel has to be added to `~dasha.web.push.push_broker`
+        elsewhere.
+    interval : float
+        The seconds between the updates of the channel.
+    outputs : list of `~dash.Output`, optional
+        The props to update with the values.
+    check_interval : int
+        The milliseconds between the checks of new values in the browser.
+        This does not send any request.
+    """
+
+    class Meta:
+        component_cls = html.Div
+
+    def __init__(
+            self, channel, *args, func=None, interval=1., outputs=None,
+            check_interval=250, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.channel = channel
+        self.func = func
+        self.interval = interval
+        self.outputs = list(outputs or list())
+        self._check = self.child(dcc.Interval, interval=check_interval)
+        self._state_store = self.child(dcc.Store)
+
+    def setup_layout(self, app):
+        push_broker.init_app(app)
+        if self.func is not None:
+            push_broker.add_channel(
+                self.channel, self.func, interval=self.interval)
+        self._state_store.data = {
+            'url': push_broker.get_url(app, self.channel),
+            'n_outputs': len(self.outputs),
+            'seq': None,
+            'time': None,
+            }
+        super().setup_layout(app)
+
+        app.clientside_callback(
+            ClientsideFunction(
+                namespace='push',
+                function_name='receive',
+                ),
+            [Output(self._state_store.id, 'data')] + self.outputs,
+            [
+                Input(self._check.id, 'n_intervals'),
+                State(self._state_store.id, 'data'),
+                ],
+            )
+
+    def add_outputs(self, *outputs):
+        """Add `outputs` to update with the values.
+
+        This has to be called before `setup_layout`.
+        """
+        self.outputs.extend(outputs)
+
+    @property
+    def inputs(self):
+        """The inputs that trigger when new values are received.
+
+        The data has keys ``seq`` and ``time`` of the last update.
+        """
+        return [Input(self._state_store.id, 'data')]
@@ -0,0 +1,62 @@
+#! /usr/bin/env python
+
+from dash import dcc
+from dash_component_template import ComponentTemplate
+
+from ..serverstore import server_store
+
+
+__all__ = ['ServerSideStore', ]
+
+
+class ServerSideStore(ComponentTemplate):
+    """A data store that keeps the value on the server.
+
+    The store data in the browser is only a reference to the value, so the
+    value is not sent in the callbacks that read the store. The callbacks
+    use the store data as usual, and get and set the value with `get` and
+    `set`::
+
+        store = container.child(ServerSideStore)
+
+        @app.callback(
+            Output(store.id, 'data'),
+            Input(button.id, 'n_clicks'),
+            State(store.id, 'data'),
+            )
+        def update(n_clicks, ref):
+            df = store.get(ref)
+            ...
+            return store.set(df, ref)
+
+    See `~dasha.web.serverstore` for the storage backends.
+    """
+
+    class Meta:
+        component_cls = dcc.Store
+
+    def get(self, ref, default=None):
+        """Return the value referred to by the store data `ref`."""
+        return server_store.get(self.id, ref, default=default)
+
+    def set(self, value, ref=None):
+        """Store `value` and return the store data to refer to it.
+
+        Parameters
+        ----------
+        value : object
+            The value.
+        ref : dict, optional
+            The current store data, which is updated to refer to `value`.
+        """
+        return server_store.set(self.id, value, ref=ref)
+
+    def delete(self, ref):
+        """Remove the value referred to by the store data `ref`."""
+        server_store.delete(self.id, ref)
+
+    def setup_layout(self, app):
+        # this creates the backend before the worker processes are forked
+        # from a preloaded app, so they share it.
+        server_store.backend
+        super().setup_layout(app)
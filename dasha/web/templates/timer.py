@@ -6,7 +6,6 @@ import dash_bootstrap_components as dbc
 from dash_component_template import ComponentTemplate
 
 import copy
-from astropy.utils.console import human_time
 
 from .collapsecontent import CollapseContent
 
@@ -59,6 +58,8 @@ class IntervalTimer(ComponentTemplate):
             if v == self._INTERVAL_PAUSE:
                 return '∞'
             if v >= 1000:
+                # astropy is slow to import so do it only when needed.
+                from astropy.utils.console import human_time
                 return human_time(v / 1000)
             return f"{v / 1000.:.1f}s"
 
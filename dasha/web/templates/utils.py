@@ -3,15 +3,17 @@
 import json
 import dash
 import copy
+import hashlib
 from dash import html, Output, Input, State
-from plotly.subplots import make_subplots as _make_subplots
+
+from .compactid import compact_ids_enabled, compact_id, get_readable_id
 
 
 __all__ = [
     'PatternMatchingId',
     'update_class_name', 'remove_class_name',
     'fa', 'to_dependency', 'parse_prop_id', 'parse_triggered_prop_ids',
-    'make_subplots']
+    'make_subplots', 'layout_hash']
 
 
 class PatternMatchingId(object):
@@ -40,8 +42,20 @@ class PatternMatchingId(object):
         if 'index' not in kwargs:
             if self._auto_index:
                 id['index'] = self.make_id()
+        if compact_ids_enabled():
+            id = {k: self._compact_value(k, v) for k, v in id.items()}
         return id
 
+    @staticmethod
+    def _compact_value(key, value):
+        # the keys and indices are kept as they may be used in callbacks.
+        if key == 'index' or not isinstance(value, str) or not value:
+            return value
+        if get_readable_id(value) != value:
+            # already compact
+            return value
+        return compact_id(f'{key}={value}')
+
     def make_id(self):
         """Return an unique id."""
         return next(self._iter_index_inst)
@@ -55,14 +69,18 @@ class PatternMatchingId(object):
 
 
 class ClassName(object):
-    """A helper class to manage the ``className`` property."""
+    """A helper class to manage the ``className`` property.
+
+    The classes are kept in the order they are added, so the same inputs
+    always result in the same string.
+    """
     def __init__(self, className):
         if isinstance(className, ClassName):
             self._data = copy.copy(className._data)
         elif not className:
-            self._data = set()
+            self._data = dict()
         else:
-            self._data = set(className.split(' '))
+            self._data = dict.fromkeys(className.split())
 
     def update(self, other):
         other = self.__class__(other)
@@ -70,7 +88,8 @@ class ClassName(object):
 
     def remove(self, other):
         other = self.__class__(other)
-        self._data -= other._data
+        for k in other._data:
+            self._data.pop(k, None)
 
     def __str__(self):
         return ' '.join(self._data)
@@ -144,6 +163,21 @@ def make_subplots(nrows, ncols, fig_layout=None, **kwargs):
             }
     if fig_layout is not None:
         _fig_layout.update(fig_layout)
+    from plotly.subplots import make_subplots as _make_subplots
     fig = _make_subplots(nrows, ncols, **kwargs)
     fig.update_layout(**_fig_layout)
     return fig
+
+
+def layout_hash(layout):
+    """Return the content hash of `layout`.
+
+    Parameters
+    ----------
+    layout : `~dash.development.base_component.Component` or str
+        The layout, or the serialized layout.
+    """
+    if not isinstance(layout, str):
+        from plotly.io.json import to_json_plotly
+        layout = to_json_plotly(layout)
+    return hashlib.blake2b(layout.encode(), digest_size=16).hexdigest()
@@ -0,0 +1,148 @@
+#! /usr/bin/env python
+
+"""The binary encoding of numeric arrays in Dash callback outputs.
+
+When enabled by the ``TYPED_ARRAYS`` config of the DashA extension, the
+numpy arrays (and numeric pandas series) in the outputs of the callbacks
+registered with ``app.callback`` are sent as::
+
+    {"dtype": "f8", "shape": "100000", "bdata": "<base64 of the buffer>"}
+
+instead of lists of decimal numbers. This is the typed array spec of
+plotly.js, which plotly.py 6 also uses to encode the figures. The script
+``typed_arrays.js``, which is added to the page, decodes them into JS
+typed arrays in the responses of ``_dash-update-component`` before they reach the components.
+
+The config is a dict of the keyword arguments to `init_typed_arrays`
+(except ``app``), or True to use the defaults.
+"""
+
+import base64
+import functools
+from pathlib import Path
+
+import flask
+from dash import no_update
+from tollan.utils.log import get_logger
+
+
+__all__ = ['encode_arrays', 'init_typed_arrays']
+
+
+_js_filepath = Path(__file__).parent.parent.joinpath(
+    'data', 'typed_arrays.js')
+
+
+# the dtypes that have corresponding JS typed arrays.
+_dtype_codes = {
+    'float64': 'f8', 'float32': 'f4',
+    'int32': 'i4', 'int16': 'i2', 'int8': 'i1',
+    'uint32': 'u4', 'uint16': 'u2', 'uint8': 'u1',
+    }
+
+
+def _encode_array(arr, min_size):
+    import numpy as np
+    if arr.size < min_size or arr.ndim == 0 or arr.ndim > 2:
+        return None
+    dtype = arr.dtype
+    if dtype.kind in 'iu' and dtype.name not in _dtype_codes:
+        # there is no 64-bit integer array usable by plotly.js.
+        if arr.min() >= np.iinfo(np.int32).min and \
+                arr.max() <= np.iinfo(np.int32).max:
+            arr = arr.astype('int32')
+        else:
+            arr = arr.astype('float64')
+    elif dtype.kind == 'f' and dtype.name not in _dtype_codes:
+        arr = arr.astype('float64')
+    elif dtype.kind not in 'iuf':
+        return None
+    code = _dtype_codes[arr.dtype.name]
+    arr = np.ascontiguousarray(arr, dtype=arr.dtype.newbyteorder('<'))
+    return {
+        'dtype': code,
+        'shape': ', '.join(str(n) for n in arr.shape),
+        'bdata': base64.b64encode(arr.tobytes()).decode('ascii'),
+        }
+
+
+def encode_arrays(value, min_size=1024):
+    """Return `value` with the numeric arrays in it encoded as typed arrays.
+
+    Parameters
+    ----------
+    value : object
+        The callback output. The plotly figures and the Dash components are
+        converted to dicts.
+    min_size : int
+        The arrays with fewer elements are kept as is.
+    """
+    if isinstance(value, type(no_update)):
+        # `dash.no_update` has ``to_plotly_json`` too, but dash only skips
+        # the outputs that are still instances of it.
+        return value
+    if isinstance(value, dict):
+        return {k: encode_arrays(v, min_size) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [encode_arrays(v, min_size) for v in value]
+    to_plotly_json = getattr(value, 'to_plotly_json', None)
+    if to_plotly_json is not None:
+        # figures and components
+        return encode_arrays(to_plotly_json(), min_size)
+    to_numpy = getattr(value, 'to_numpy', None)
+    if to_numpy is not None and getattr(value, 'ndim', None) == 1:
+        # pandas series and index
+        value = to_numpy()
+    if type(value).__module__ == 'numpy' and hasattr(value, 'dtype'):
+        encoded = _encode_array(value, min_size)
+        if encoded is not None:
+            return encoded
+    return value
+
+
+def init_typed_arrays(app, min_size=1024):
+    """Encode the arrays in the outputs of the callbacks of Dash `app`.
+
+    This replaces ``app.callback`` so it has to be called before the
+    callbacks are registered. The long callbacks are not affected.
+
+    Parameters
+    ----------
+    app : `~dash.Dash`
+        The Dash app.
+    min_size : int
+        The arrays with fewer elements are kept as is.
+    """
+    logger = get_logger()
+    callback = app.callback
+
+    @functools.wraps(callback)
+    def typed_arrays_callback(*args, **kwargs):
+        decorator = callback(*args, **kwargs)
+        if kwargs.get('long', None) or kwargs.get('background', None):
+            return decorator
+
+        def wrapper(func):
+            @functools.wraps(func)
+            def encoded_func(*a, **k):
+                return encode_arrays(func(*a, **k), min_size=min_size)
+            return decorator(encoded_func)
+        return wrapper
+
+    app.callback = typed_arrays_callback
+
+    name = 'dasha/typed_arrays.js'
+
+    def serve():
+        return flask.send_file(
+            _js_filepath, mimetype='application/javascript', max_age=3600)
+
+    app.server.add_url_rule(
+        f'{app.config.routes_pathname_prefix}{name}',
+        endpoint=f'{app.config.routes_pathname_prefix}{name}',
+        view_func=serve)
+    # the external scripts are loaded before the dash renderer.
+    app.config.external_scripts.append(
+        f'{app.config.requests_pathname_prefix}{name}')
+    logger.info(f"use typed arrays in callback outputs, min_size={min_size}")
+    return app
@@ -0,0 +1,187 @@
+#! /usr/bin/env python
+
+"""The local copies of the third-party assets loaded from CDNs.
+
+The assets are downloaded once with ``dasha vendor-assets`` into the vendor
+directory, which is ``data/vendor`` of the package, or ``DASHA_VENDOR_DIR``
+if set. The files are kept in the layout of the URLs, so the relative
+references in CSS (e.g., the web fonts of font-awesome) keep working.
+
+When a local copy is available, `vendor_url` returns the URL to the copy,
+served under ``_dasha-vendor/`` of the site with long-lived cache headers.
+Otherwise the original URL is returned. The DashA extension applies this to
+the external stylesheets and scripts of the Dash app.
+"""
+
+import os
+import re
+import urllib.parse
+import urllib.request
+from pathlib import Path
+
+import flask
+from tollan.utils.log import get_logger
+
+
+__all__ = [
+    'get_vendor_dir', 'vendor_url', 'download_vendor_assets',
+    'init_vendor']
+
+
+url_path = '_dasha-vendor/'
+"""The URL path relative to the Dash routes to serve the local copies."""
+
+
+cache_max_age = 31536000
+"""The URLs have the modification time so the copies can be cached long."""
+
+
+_css_url_re = re.compile(r'''url\(\s*(['"]?)(?P<ref>[^'")]+)\1\s*\)''')
+
+
+def get_vendor_dir():
+    """Return the directory of the local copies."""
+    vendor_dir = os.environ.get('DASHA_VENDOR_DIR', None)
+    if vendor_dir:
+        return Path(vendor_dir).expanduser()
+    return Path(__file__).parent.parent.joinpath('data', 'vendor')
+
+
+def get_default_urls():
+    """Return the URLs used by the DashA extension and templates."""
+    import dash_bootstrap_components as dbc
+    from .extensions.dasha import CSS
+    from .templates.aladinlite import AladinLiteView
+    return [
+        CSS.fa, dbc.themes.BOOTSTRAP,
+        ] + AladinLiteView.vendor_urls
+
+
+def _get_vendor_path(url):
+    """Return the path of the local copy relative to the vendor dir."""
+    u = urllib.parse.urlsplit(url)
+    return Path(u.netloc, u.path.lstrip('/'))
+
+
+def vendor_url(url, url_base=None, vendor_dir=None):
+    """Return the URL to the local copy of `url` if available.
+
+    Parameters
+    ----------
+    url : str
+        The URL of the asset.
+    url_base : str, optional
+        The URL prefix of the site. Default is the requests pathname
+        prefix of the current Dash app.
+    vendor_dir : str or `~pathlib.Path`, optional
+        The vendor directory. Default is from `get_vendor_dir`.
+    """
+    if not isinstance(url, str) or not url.startswith(
+            ('http://', 'https://')):
+        return url
+    if vendor_dir is None:
+        vendor_dir = get_vendor_dir()
+    path = _get_vendor_path(url)
+    filepath = Path(vendor_dir).joinpath(path)
+    if not filepath.is_file():
+        return url
+    if url_base is None:
+        from .extensions.dasha import get_dash_app
+        url_base = get_dash_app().config.requests_pathname_prefix or '/'
+    mtime = int(filepath.stat().st_mtime)
+    return f'{url_base}{url_path}{path.as_posix()}?m={mtime}'
+
+
+def _download(url, filepath, timeout):
+    with urllib.request.urlopen(url, timeout=timeout) as r:
+        data = r.read()
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    tmp = filepath.with_name(f'.{filepath.name}.{os.getpid()}.tmp')
+    with open(tmp, 'wb') as fo:
+        fo.write(data)
+    os.replace(tmp, filepath)
+    return data
+
+
+def download_vendor_assets(
+        urls=None, vendor_dir=None, overwrite=False, timeout=30.):
+    """Download the assets to the vendor directory.
+
+    The relative references in the CSS files are downloaded as well.
+
+    Parameters
+    ----------
+    urls : list of str, optional
+        The URLs to download. Default is from `get_default_urls`.
+    vendor_dir : str or `~pathlib.Path`, optional
+        The vendor directory. Default is from `get_vendor_dir`.
+    overwrite : bool
+        If True, download the files that exist.
+    timeout : float
+        The timeout of each download.
+
+    Returns
+    -------
+    dict
+        The local file paths keyed by the URLs.
+    """
+    logger = get_logger()
+    if urls is None:
+        urls = get_default_urls()
+    if vendor_dir is None:
+        vendor_dir = get_vendor_dir()
+    vendor_dir = Path(vendor_dir)
+    result = dict()
+    queue = list(urls)
+    while queue:
+        url = queue.pop(0)
+        if url in result:
+            continue
+        filepath = vendor_dir.joinpath(_get_vendor_path(url))
+        if filepath.is_file() and not overwrite:
+            logger.debug(f"skip existing {filepath}")
+            data = filepath.read_bytes()
+        else:
+            logger.info(f"download {url} to {filepath}")
+            data = _download(url, filepath, timeout=timeout)
+        result[url] = filepath
+        if filepath.suffix != '.css':
+            continue
+        for m in _css_url_re.finditer(data.decode('utf-8', 'replace')):
+            ref = m.group('ref').strip()
+            if ref.startswith(('data:', '#', '/')) or '://' in ref:
+                # only the relative references are local to the CSS.
+                continue
+            ref = urllib.parse.urljoin(url, ref)
+            queue.append(urllib.parse.urldefrag(ref).url.split('?', 1)[0])
+    return result
+
+
+def init_vendor(app):
+    """Serve the local copies for Dash `app`, and use them for the external
+    stylesheets and scripts."""
+    vendor_dir = get_vendor_dir()
+    if not vendor_dir.is_dir():
+        return None
+
+    def serve(path):
+        return flask.send_from_directory(
+            vendor_dir, path, max_age=cache_max_age)
+
+    app.server.add_url_rule(
+        f'{app.config.routes_pathname_prefix}{url_path}<path:path>',
+        endpoint=f'{app.config.routes_pathname_prefix}dasha-vendor',
+        view_func=serve)
+    url_base = app.config.requests_pathname_prefix
+    for key in ('external_stylesheets', 'external_scripts'):
+        items = app.config[key]
+        for i, item in enumerate(items):
+            if isinstance(item, dict):
+                for k in ('href', 'src'):
+                    if k in item:
+                        item[k] = vendor_url(
+                            item[k], url_base=url_base, vendor_dir=vendor_dir)
+            else:
+                items[i] = vendor_url(
+                    item, url_base=url_base, vendor_dir=vendor_dir)
+    return vendor_dir
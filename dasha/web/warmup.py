@@ -0,0 +1,176 @@
+#! /usr/bin/env python
+
+"""The recording and replaying of requests to warm up DashA sites.
+
+When ``DASHA_WARMUP_RECORD`` is set to a file path, `WarmupRecorder`
+counts the page loads and the callback requests served, and saves the most
+requested ones to the file. When ``DASHA_WARMUP_FILE`` is set to such a
+file, the requests are replayed by `~dasha.core.Site.warmup` in
+`~dasha.web.create_app`, so that the caches and connections are ready before
+the server accepts traffic.
+
+Only the page loads are replayed by default, because the callbacks may have
+side effects, e.g., submitting jobs or writing to the database. The
+callbacks to replay are opted in with ``DASHA_WARMUP_CALLBACKS``, as comma
+separated `fnmatch` patterns of the output ids (see
+`~dasha.web.admission.match_callback_id`). See `filter_warmup_requests`.
+
+When the app is preloaded in the master process (e.g., by
+`~dasha.web.serve` with gunicorn), the warmup runs before the fork. The
+forked workers inherit the in-process caches, but not the connections,
+which are dropped by the post fork hooks (see `~dasha.core.Site.post_fork`)
+and re-opened on first use in each worker.
+
+With multiple worker processes, each worker saves its own counts to the
+file and the last one wins.
+"""
+
+import io
+import os
+import json
+import time
+import threading
+from pathlib import Path
+
+from tollan.utils.log import get_logger
+
+
+__all__ = [
+    'WarmupRecorder', 'load_warmup_requests', 'filter_warmup_requests']
+
+
+def load_warmup_requests(filepath):
+    """Return the requests recorded in `filepath`."""
+    with open(filepath, 'r') as fo:
+        return json.load(fo)['requests']
+
+
+def filter_warmup_requests(requests, callbacks=None):
+    """Return the `requests` that are safe to replay.
+
+    These are the GET requests, and the callback requests of which the
+    output ids match one of the `fnmatch` patterns in `callbacks`.
+    """
+    from .admission import match_callback_id
+    callbacks = callbacks or list()
+    result = list()
+    for req in requests:
+        if req.get('method', 'GET') == 'GET':
+            result.append(req)
+            continue
+        output = (req.get('json', None) or dict()).get('output', None)
+        if isinstance(output, str) and \
+                match_callback_id(output, callbacks) is not None:
+            result.append(req)
+    return result
+
+
+class WarmupRecorder(object):
+    """A WSGI middleware to record the requests for warmup.
+
+    Only the GET requests of pages and the POST requests of the Dash
+    callbacks are recorded. The static files and the Dash internal routes
+    are ignored.
+
+    Parameters
+    ----------
+    app : callable
+        The WSGI app.
+    filepath : str or `~pathlib.Path`
+        The file to save the recorded requests.
+    max_requests : int
+        The max number of the most requested ones to save.
+    save_interval : float
+        The min seconds between saving the file.
+    max_body_size : int
+        The callback requests with larger body are not recorded.
+    """
+
+    logger = get_logger()
+
+    _ignored_path_parts = (
+        '_dash-component-suites', '_dash-layout', '_dash-dependencies',
+        '_reload-hash', '_favicon', '/assets/', '_dasha-health')
+
+    def __init__(
+            self, app, filepath, max_requests=100, save_interval=60.,
+            max_body_size=65536):
+        self.app = app
+        self._filepath = Path(filepath).expanduser()
+        self._max_requests = max_requests
+        self._save_interval = save_interval
+        self._max_body_size = max_body_size
+        self._counts = dict()
+        self._lock = threading.Lock()
+        self._t_saved = time.monotonic()
+
+    def _get_key(self, environ):
+        method = environ.get('REQUEST_METHOD', 'GET')
+        path = environ.get('SCRIPT_NAME', '') + environ.get('PATH_INFO', '')
+        if any(p in path for p in self._ignored_path_parts):
+            return None
+        if method == 'GET':
+            query = environ.get('QUERY_STRING', '')
+            if query:
+                path = f'{path}?{query}'
+            return (method, path, None)
+        if method != 'POST' or not path.endswith('_dash-update-component'):
+            return None
+        try:
+            size = int(environ.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return None
+        if size <= 0 or size > self._max_body_size:
+            return None
+        body = environ['wsgi.input'].read(size)
+        # put back the body for the app
+        environ['wsgi.input'] = io.BytesIO(body)
+        try:
+            body = json.dumps(json.loads(body), sort_keys=True)
+        except ValueError:
+            return None
+        return (method, path, body)
+
+    def __call__(self, environ, start_response):
+        key = self._get_key(environ)
+        if key is not None:
+            with self._lock:
+                self._counts[key] = self._counts.get(key, 0) + 1
+                save = (
+                    time.monotonic() - self._t_saved > self._save_interval)
+                if save:
+                    self._t_saved = time.monotonic()
+            if save:
+                self.save()
+        return self.app(environ, start_response)
+
+    def get_requests(self):
+        """Return the most requested ones, in the format for warmup."""
+        with self._lock:
+            items = sorted(
+                self._counts.items(), key=lambda kv: kv[1], reverse=True)
+        result = list()
+        for (method, path, body), count in items[:self._max_requests]:
+            req = {'method': method, 'path': path, 'count': count}
+            if body is not None:
+                req['json'] = json.loads(body)
+            result.append(req)
+        return result
+
+    def save(self):
+        """Save the recorded requests."""
+        filepath = self._filepath
+        d = {'requests': self.get_requests()}
+        try:
+            filepath.parent.mkdir(parents=True, exist_ok=True)
+            tmp = filepath.with_suffix(f'.{os.getpid()}.tmp')
+            with open(tmp, 'w') as fo:
+                json.dump(d, fo, indent=2)
+            os.replace(tmp, filepath)
+        except OSError as e:
+            self.logger.warning(
+                f"unable to save warmup requests {filepath}: {e}")
+            return None
+        self.logger.debug(
+            f"saved {len(d['requests'])} warmup requests to {filepath}")
+        return filepath
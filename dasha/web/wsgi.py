@@ -1,10 +1,28 @@
+"""WSGI entry point.
+
+The app is built at import time so it can be preloaded in the master process
+of a forking server, e.g., ``gunicorn --preload dasha.web.wsgi``. The
+resources that can not be shared with the workers are re-initialized in the
+children via `~dasha.core.Site.post_fork`.
+
+When preloaded this way, set ``DASHA_GC_FREEZE=1`` to call `gc.freeze`
+after the app is built, so the forked workers share more memory pages. This
+is done by `~dasha.web.serve` for gunicorn.
+"""
+
 from .app import create_app
+import os
+import gc
 import logging
 
-"""WSGI entry point."""
-
 application = create_app()
 
+if os.environ.get('DASHA_GC_FREEZE', '0') == '1':
+    # move the objects created so far to the permanent generation, so the
+    # garbage collector does not touch, hence copy, their memory pages in
+    # forked workers.
+    gc.freeze()
+
 
 if __name__ != "__main__":
     # propagate to gunicorn logger